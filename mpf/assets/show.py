@@ -1,12 +1,26 @@
 """Contains show related classes."""
 from mpf.core.assets import Asset, AssetPool
 from mpf.core.config_player import ConfigPlayer
+from mpf.core.config_processor import ConfigProcessor
 from mpf.core.file_manager import FileManager
+from mpf.core.rgb_color import RGBColor
 from mpf.core.utility_functions import Util
 from mpf.file_interfaces.yaml_interface import YamlInterface
 from mpf._version import __show_version__, __version__
 
 
+def load_show_file(file):
+    """Load a show file after checking its show_version."""
+    show_version = YamlInterface.get_show_file_version(file)
+
+    if show_version != int(__show_version__):   # pragma: no cover
+        raise ValueError("Show file {} cannot be loaded. MPF v{} requires "
+                         "#show_version={}".format(file, __version__,
+                                                   __show_version__))
+
+    return FileManager.load(file)
+
+
 class ShowPool(AssetPool):
 
     """A pool of shows."""
@@ -64,6 +78,8 @@ class Show(Asset):
         self.name = name
         self.total_steps = None
         self.show_steps = None
+        self.led_frames = None
+        '''LedShowFrames() instance if this show has been pre-rendered.'''
 
         if data:
             self._do_load_show(data=data)
@@ -73,9 +89,22 @@ class Show(Asset):
         """Compare two instances."""
         return id(self) < id(other)
 
+    @classmethod
+    def preload_files(cls, mc, assets):
+        """Parse all show files which will be preloaded in parallel."""
+        if not mc.config_cache:
+            return
+
+        ConfigProcessor.preload_files(
+            [x.file for x in assets if getattr(x, 'file', None)],
+            mc.config_cache,
+            mc.config['mpf']['config_loader_processes'], 'shows',
+            load_show_file)
+
     def _initialize_asset(self):
         self.loaded = False
         self.show_steps = list()
+        self.led_frames = None
         self.mode = None
 
     def do_load(self):
@@ -178,6 +207,52 @@ class Show(Asset):
 
         self._get_tokens()
 
+        if self.machine.config['mpf']['prerender_led_shows']:
+            self._prerender_led_frames()
+
+    def _can_prerender(self):
+        # only shows without tokens which exclusively set leds are rendered
+        if self.tokens or 'leds' not in ConfigPlayer.show_players:
+            return False
+
+        has_leds = False
+        for step in self.show_steps:
+            for key in step:
+                if key == 'leds':
+                    has_leds = True
+                elif key != 'duration':
+                    return False
+
+        return has_leds
+
+    def _prerender_led_frames(self):
+        if not self._can_prerender():
+            return
+
+        config_cache = self.machine.config_cache
+        led_config = None
+        if self.file and config_cache:
+            # rendered frames also depend on the names and tags of all leds
+            led_config = sorted((led.name, tuple(led.tags))
+                                for led in self.machine.leds)
+            cached = config_cache.get(self.file, 'led_frames')
+            if cached and cached[0] == led_config:
+                self.led_frames = cached[1]
+                return
+
+        try:
+            self.led_frames = LedShowFrames.render(
+                ConfigPlayer.show_players['leds'], self.show_steps)
+        except KeyError:
+            # at least one led does not exist (yet). play it the normal way
+            self.machine.show_controller.log.debug(
+                "Could not pre-render show %s", self.name)
+            return
+
+        if led_config is not None:
+            config_cache.put(self.file, (led_config, self.led_frames),
+                             'led_frames')
+
     def _show_validation_error(self, msg):  # pragma: no cover
         if self.file:
             identifier = self.file
@@ -213,6 +288,7 @@ class Show(Asset):
 
     def _do_unload(self):
         self.show_steps = None
+        self.led_frames = None
 
     def _get_tokens(self):
         self._walk_show(self.show_steps)
@@ -386,9 +462,15 @@ class Show(Asset):
             self.load(callback=self._autoplay, priority=priority)
             return False
 
+        if self.led_frames:
+            # pre-rendered shows have no tokens and are never modified
+            show_steps = self.show_steps
+        else:
+            show_steps = self.get_show_steps()
+
         return RunningShow(machine=self.machine,
                            show=self,
-                           show_steps=self.get_show_steps(),
+                           show_steps=show_steps,
                            priority=int(priority),
                            speed=float(speed),
                            start_step=int(start_step),
@@ -407,15 +489,18 @@ class Show(Asset):
 
     def load_show_from_disk(self):
         """Load show from disk."""
-        show_version = YamlInterface.get_show_file_version(self.file)
+        config_cache = self.machine.config_cache
+        if config_cache:
+            data = config_cache.get(self.file, 'shows')
+            if data is not None:
+                return data
 
-        if show_version != int(__show_version__):   # pragma: no cover
-            raise ValueError("Show file {} cannot be loaded. MPF v{} requires "
-                             "#show_version={}".format(self.file,
-                                                       __version__,
-                                                       __show_version__))
+        data = load_show_file(self.file)
 
-        return FileManager.load(self.file)
+        if config_cache and data:
+            config_cache.put(self.file, data, 'shows')
+
+        return data
 
 
 # This class is more or less a container
@@ -603,8 +688,24 @@ class RunningShow(object):
 
         current_step_index = self.next_step_index
 
+        if self.show.led_frames:
+            self._play_led_frame(current_step_index)
+        else:
+            self._play_step(current_step_index)
+
+        self.next_step_index += 1
+
+        time_to_next_step = self.show_steps[current_step_index]['duration'] / self.speed
+        if not self.manual_advance and time_to_next_step > 0:
+            self.next_step_time += time_to_next_step
+            self.machine.clock.schedule_once(self._run_next_step,
+                                             self.next_step_time - self.machine.clock.get_time())
+
+            return time_to_next_step
+
+    def _play_step(self, step_index):
         for item_type, item_dict in (
-                iter(self.show_steps[current_step_index].items())):
+                iter(self.show_steps[step_index].items())):
 
             if item_type == 'duration':
                 continue
@@ -622,12 +723,105 @@ class RunningShow(object):
                 if item_type not in self._players:
                     self._players.append(item_type)
 
-        self.next_step_index += 1
+    def _play_led_frame(self, step_index):
+        frame = self.show.led_frames.get_frame(self.machine, step_index)
+        if not frame:
+            return
 
-        time_to_next_step = self.show_steps[current_step_index]['duration'] / self.speed
-        if not self.manual_advance and time_to_next_step > 0:
-            self.next_step_time += time_to_next_step
-            self.machine.clock.schedule_once(self._run_next_step,
-                                             self.next_step_time - self.machine.clock.get_time())
+        ConfigPlayer.show_players['leds'].show_play_frame_callback(
+            frame=frame,
+            priority=self.priority,
+            context="show_" + str(self.id))
 
-            return time_to_next_step
+        if 'leds' not in self._players:
+            self._players.append('leds')
+
+
+class LedShowFrames(object):
+
+    """Pre-rendered frames of a show which only sets leds.
+
+    Every step is stored as a tuple of led indices, a bytes object with the
+    rgb channels of those leds and tuples with their fades and priorities.
+    This representation is compact and is stored in the config cache. Led
+    and RGBColor objects are created once when the show is played the first
+    time.
+
+    Args:
+        led_names: Tuple of the names of all leds used in the show.
+        steps: List with one (indices, channels, fades, priorities) tuple per
+            show step.
+    """
+
+    def __init__(self, led_names, steps):
+        """Initialise frames."""
+        self.led_names = led_names
+        self.steps = steps
+        self._frames = None
+
+    def __getstate__(self):
+        """Return state for pickle without the resolved frames."""
+        return self.led_names, self.steps
+
+    def __setstate__(self, state):
+        """Restore state from pickle."""
+        self.led_names, self.steps = state
+        self._frames = None
+
+    @classmethod
+    def render(cls, led_player, show_steps):
+        """Render validated show steps into frames.
+
+        Raises KeyError if a led in the show does not exist.
+        """
+        led_names = list()
+        led_indices = dict()
+        steps = list()
+
+        for step in show_steps:
+            indices = list()
+            channels = bytearray()
+            fades = list()
+            priorities = list()
+
+            settings = step.get('leds', dict())
+            if 'leds' in settings:
+                settings = settings['leds']
+
+            for name, rgb, fade_ms, priority in (
+                    led_player.render_show_step(settings)):
+                if name not in led_indices:
+                    led_indices[name] = len(led_names)
+                    led_names.append(name)
+
+                indices.append(led_indices[name])
+                channels.extend(rgb)
+                fades.append(fade_ms)
+                priorities.append(priority)
+
+            steps.append((tuple(indices), bytes(channels), tuple(fades),
+                          tuple(priorities)))
+
+        return cls(tuple(led_names), steps)
+
+    def get_frame(self, machine, step_index):
+        """Return a list of (led, RGBColor, fade_ms, priority) for a step."""
+        if self._frames is None:
+            self._frames = self._build_frames(machine)
+
+        return self._frames[step_index]
+
+    def _build_frames(self, machine):
+        leds = [machine.leds[name] for name in self.led_names]
+        frames = list()
+
+        for indices, channels, fades, priorities in self.steps:
+            frame = list()
+            for num, led_index in enumerate(indices):
+                frame.append((leds[led_index],
+                              RGBColor(tuple(channels[num * 3:num * 3 + 3])),
+                              fades[num], priorities[num]))
+
+            frames.append(frame)
+
+        return frames
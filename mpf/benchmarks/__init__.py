@@ -0,0 +1 @@
+"""Benchmarks of MPF internals which can be run with python -m."""
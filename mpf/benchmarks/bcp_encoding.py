@@ -0,0 +1,78 @@
+"""Compares the throughput of the BCP message encodings.
+
+Run with: python -m mpf.benchmarks.bcp_encoding [-n messages]
+
+Every message in MESSAGES is encoded and decoded with each encoding in
+mpf.core.bcp.ENCODERS and the number of messages per second is printed.
+"""
+import argparse
+import timeit
+
+from mpf.core.bcp import ENCODERS, decode_message
+
+MESSAGES = [
+    ('switch', dict(name='s_left_flipper', state=1)),
+    ('player_score', dict(value=1234560, prev_value=1234060, change=500,
+                          player_num=1)),
+    ('player_variable', dict(name='ramps_made', value=7, prev_value=6,
+                             change=1, player_num=2)),
+    ('trigger', dict(name='jackpot_lit', text='JACKPOT IS LIT!',
+                     multiplier=2.5, active=True, mode=None)),
+    ('mode_start', dict(name='multiball', priority=500)),
+    ('trigger', dict(name='high_score', award=dict(name='GRAND CHAMPION',
+                                                   value=99000000))),
+]
+"""Typical BCP messages. Most traffic is switches, scores and player
+variables."""
+
+
+def run(num_messages=100000):
+    """Runs the benchmark and returns a dict of results per encoding.
+
+    Every result is a dict with the encoded and decoded messages per second
+    and the average size of an encoded message in bytes.
+    """
+    results = dict()
+    rounds = max(1, num_messages // len(MESSAGES))
+
+    for name, encode in sorted(ENCODERS.items()):
+        encoded = [encode(command, **kwargs) for command, kwargs in MESSAGES]
+
+        for message, (command, kwargs) in zip(encoded, MESSAGES):
+            if decode_message(message) != (command, kwargs):
+                raise AssertionError('{} does not round trip {}'.format(
+                    name, message))
+
+        encode_time = timeit.timeit(
+            lambda: [encode(command, **kwargs)
+                     for command, kwargs in MESSAGES], number=rounds)
+        decode_time = timeit.timeit(
+            lambda: [decode_message(message) for message in encoded],
+            number=rounds)
+
+        results[name] = dict(
+            encode=rounds * len(MESSAGES) / encode_time,
+            decode=rounds * len(MESSAGES) / decode_time,
+            size=sum(len(x) for x in encoded) / len(encoded))
+
+    return results
+
+
+def main():
+    """Runs the benchmark and prints the results."""
+    parser = argparse.ArgumentParser(
+        description='Compares the throughput of the BCP encodings.')
+    parser.add_argument('-n', type=int, default=100000,
+                        dest='num_messages',
+                        help='Number of messages to encode and decode')
+    args = parser.parse_args()
+
+    print('{:<8} {:>14} {:>14} {:>10}'.format('encoding', 'encode msg/s',
+                                             'decode msg/s', 'avg bytes'))
+    for name, result in run(args.num_messages).items():
+        print('{:<8} {:>14,.0f} {:>14,.0f} {:>10.1f}'.format(
+            name, result['encode'], result['decode'], result['size']))
+
+
+if __name__ == '__main__':
+    main()
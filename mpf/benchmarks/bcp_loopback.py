@@ -0,0 +1,292 @@
+"""Measures BCP throughput and round trip latency over a local socket.
+
+Run with: python -m mpf.benchmarks.bcp_loopback [-n messages] [--mix ...]
+
+A stand-in media controller listens on localhost in a thread of this
+process. A BCPClientSocket connects to it like MPF connects to its media
+controller and sends a mix of messages in batches like BCP sends them per
+frame. The media controller decodes every message and sends it back
+encoded again. For dmd_frame it answers with a frame of frame_size bytes
+as &bytes= payload. So every message goes through encoding, the socket,
+framing and decoding on both sides and through the receive queue of MPF.
+
+The messages per second, the 50th and 99th percentile of the round trip
+latency and the CPU time per message (of the whole process, so it includes
+the media controller) are printed for every encoding. Every reply is
+checked, so this also fails if a message is lost or changed on the way.
+Use --min-rate to fail (e.g. in CI) if the throughput drops below a
+number of messages per second.
+"""
+import argparse
+import socket
+import sys
+import threading
+import time
+from queue import Queue, Empty
+
+from mpf.core.bcp import BCPClientSocket, BcpReceiveBuffer, ENCODERS, \
+    decode_message, encode_command_string
+from mpf.core.config_validator import ConfigValidator
+
+MESSAGES = dict(
+    switch=dict(name='s_left_flipper', state=1),
+    player_variable=dict(name='ramps_made', value=7, prev_value=6, change=1,
+                         player_num=2),
+    trigger=dict(name='jackpot_lit', text='JACKPOT IS LIT!', multiplier=2.5,
+                 active=True),
+    dmd_frame=dict(),
+)
+"""Parameters of the messages which can be used in a mix."""
+
+DEFAULT_MIX = dict(switch=10, player_variable=5, trigger=2, dmd_frame=1)
+"""Number of messages of every type in a round of the default mix."""
+
+
+class _Machine(object):
+
+    """The parts of the MachineController which BCPClientSocket uses."""
+
+    def __init__(self):
+        """Initialise stand-in machine."""
+        self.config_validator = ConfigValidator(self)
+        self.thread_stopper = threading.Event()
+        self.crash_queue = Queue()
+
+
+class _BenchmarkClient(BCPClientSocket):
+
+    """BCPClientSocket which only closes its connection on goodbye since
+    there is no BCP and machine to shut down."""
+
+    def receive_goodbye(self):
+        """Closes the connection."""
+        self._send_goodbye = False
+        self.stop()
+
+
+class MediaControllerStandIn(object):
+
+    """Answers every BCP message of one connection like a media controller.
+
+    Every message is decoded and sent back in the encoding which was picked
+    in the hello. A dmd_frame message is answered with a dmd_frame with a
+    payload of frame_size bytes. All answers to one read are sent with one
+    write.
+
+    Args:
+        frame_size: Size in bytes of the payload of every dmd_frame.
+
+    """
+
+    def __init__(self, frame_size):
+        """Initialise media controller stand-in."""
+        self.frame = bytes(frame_size)
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self._run,
+                                       name='MediaControllerStandIn')
+        self.thread.daemon = True
+
+    def start(self):
+        """Starts the thread which accepts the connection."""
+        self.thread.start()
+
+    def stop(self):
+        """Waits for the connection to be closed."""
+        self.thread.join(5)
+        self.listener.close()
+
+    def _run(self):
+        connection = self.listener.accept()[0]
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        receive_buffer = BcpReceiveBuffer()
+        encode = ENCODERS['bcp']
+
+        with connection:
+            while receive_buffer.recv_into(connection):
+                replies = list()
+
+                for message, _ in receive_buffer.get_messages():
+                    command, kwargs = decode_message(message)
+
+                    if command == 'goodbye':
+                        return
+
+                    elif command == 'hello':
+                        encoding = kwargs.get('encodings', 'bcp')
+                        replies.append(encode_command_string(
+                            'hello', version=kwargs['version'],
+                            encoding=encoding).encode() + b'\n')
+                        encode = ENCODERS[encoding]
+
+                    elif command == 'dmd_frame':
+                        replies.append(encode_command_string(
+                            command, **kwargs).encode() +
+                            '&bytes={}\n'.format(len(self.frame)).encode())
+                        replies.append(self.frame)
+
+                    else:
+                        replies.append(encode(command, **kwargs).encode() +
+                                       b'\n')
+
+                connection.sendall(b''.join(replies))
+
+
+def _percentile(values, percent):
+    # values have to be sorted
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def run(num_messages=20000, mix=None, encoding='bcp', batch_size=20,
+        frame_size=128 * 32 * 3):
+    """Runs the benchmark for one encoding and returns a dict of results.
+
+    Args:
+        num_messages: Number of messages to send.
+        mix: Dict of message type (see MESSAGES) to the number of messages
+            of that type per round. Defaults to DEFAULT_MIX.
+        encoding: Name of the encoding to negotiate.
+        batch_size: Number of messages which are sent with one flush. At
+            most two batches are waiting for their replies at any time.
+        frame_size: Size of the DMD frames in bytes.
+
+    Returns:
+        Dict with the messages per second, the 50th and 99th percentile of
+        the round trip latency in milliseconds and the CPU time per message
+        in microseconds.
+
+    """
+    mix = mix or DEFAULT_MIX
+    sequence = [command for command, count in sorted(mix.items())
+                for _ in range(count)]
+
+    media_controller = MediaControllerStandIn(frame_size)
+    media_controller.start()
+
+    machine = _Machine()
+    client = _BenchmarkClient(machine, 'benchmark',
+                              dict(host='127.0.0.1',
+                                   port=media_controller.port,
+                                   encodings=encoding),
+                              Queue())
+    receive_queue = client.receive_queue
+
+    # send the hello which was buffered when the client connected
+    client.flush()
+    for _ in range(500):
+        if client.encoding == encoding:
+            break
+        time.sleep(.01)
+    else:
+        raise AssertionError('Media controller did not pick the {} '
+                             'encoding'.format(encoding))
+
+    encode = ENCODERS[encoding]
+    sent_times = list()
+    latencies = list()
+    sent = 0
+
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+
+    while len(latencies) < num_messages:
+        if sent - len(latencies) < batch_size and sent < num_messages:
+            for _ in range(min(batch_size, num_messages - sent)):
+                command = sequence[sent % len(sequence)]
+                sent_times.append(time.perf_counter())
+                client.send(encode(command, bench_id=sent,
+                                   **MESSAGES[command]))
+                sent += 1
+
+            client.flush()
+
+        try:
+            command, kwargs, rawbytes = receive_queue.get(timeout=5)
+        except Empty:
+            raise AssertionError('No reply from the media controller. {}'
+                                 .format(''.join(machine.crash_queue.queue)))
+
+        bench_id = kwargs.pop('bench_id')
+        latencies.append(time.perf_counter() - sent_times[bench_id])
+
+        expected = sequence[bench_id % len(sequence)]
+        if (command != expected or kwargs != MESSAGES[expected] or
+                (command == 'dmd_frame') != (rawbytes is not None) or
+                (rawbytes is not None and len(rawbytes) != frame_size)):
+            raise AssertionError('Wrong reply to {} {}: {} {}'.format(
+                bench_id, expected, command, kwargs))
+
+    cpu_time = time.process_time() - start_cpu
+    elapsed = time.perf_counter() - start_time
+
+    client.stop()
+    media_controller.stop()
+
+    latencies.sort()
+    return dict(rate=num_messages / elapsed,
+                p50=_percentile(latencies, 50) * 1000,
+                p99=_percentile(latencies, 99) * 1000,
+                cpu=cpu_time / num_messages * 1000000)
+
+
+def _parse_mix(mix_string):
+    # "switch=10,dmd_frame=1" -> dict(switch=10, dmd_frame=1)
+    mix = dict()
+    for item in mix_string.split(','):
+        command, _, count = item.partition('=')
+        if command not in MESSAGES:
+            raise argparse.ArgumentTypeError(
+                'Unknown message type {}. Valid are {}'.format(
+                    command, ', '.join(sorted(MESSAGES))))
+        mix[command] = int(count or 1)
+
+    return mix
+
+
+def main():
+    """Runs the benchmark and prints the results."""
+    parser = argparse.ArgumentParser(
+        description='Measures BCP throughput and latency over localhost.')
+    parser.add_argument('-n', type=int, default=20000,
+                        dest='num_messages',
+                        help='Number of messages per encoding')
+    parser.add_argument('--mix', type=_parse_mix,
+                        default=','.join('{}={}'.format(*x) for x in
+                                         sorted(DEFAULT_MIX.items())),
+                        help='Messages per round, e.g. switch=10,'
+                             'dmd_frame=1')
+    parser.add_argument('--encoding', action='append', dest='encodings',
+                        choices=sorted(ENCODERS),
+                        help='Encoding to test. Default: all')
+    parser.add_argument('--batch-size', type=int, default=20,
+                        help='Messages per flush')
+    parser.add_argument('--frame-size', type=int, default=128 * 32 * 3,
+                        help='Size of the DMD frames in bytes')
+    parser.add_argument('--min-rate', type=float, default=0,
+                        help='Exit with an error if fewer messages per '
+                             'second are reached')
+    args = parser.parse_args()
+
+    print('{:<8} {:>10} {:>10} {:>10} {:>12}'.format(
+        'encoding', 'msg/s', 'p50 ms', 'p99 ms', 'cpu us/msg'))
+
+    failed = False
+    for encoding in args.encodings or sorted(ENCODERS):
+        result = run(args.num_messages, args.mix, encoding,
+                     args.batch_size, args.frame_size)
+        print('{:<8} {:>10,.0f} {:>10.3f} {:>10.3f} {:>12.1f}'.format(
+            encoding, result['rate'], result['p50'], result['p99'],
+            result['cpu']))
+
+        if result['rate'] < args.min_rate:
+            failed = True
+
+    if failed:
+        sys.exit('Throughput is below {:,.0f} messages per second'.format(
+            args.min_rate))
+
+
+if __name__ == '__main__':
+    main()
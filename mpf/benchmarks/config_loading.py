@@ -0,0 +1,135 @@
+"""Compares parsing config files serially and in a pool of processes.
+
+Run with: python -m mpf.benchmarks.config_loading [--files 50,200,1000]
+
+Show files like the ones of a real machine (with num_steps steps and a few
+LEDs per step) are generated in a temporary directory. For every number of
+files they are parsed once in the main process and once with
+ConfigProcessor.preload_files() like MPF does at boot with an empty config
+cache. The time to start the pool is measured separately with only two
+files.
+
+The break-even column is the estimated number of uncached files above
+which the pool is faster on this machine. It is the pool start time divided
+by the time which the workers save per file. Use it to pick a value for
+ConfigProcessor.PARALLEL_MIN_FILES.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from mpf._version import __show_version__
+from mpf.assets.show import load_show_file
+from mpf.core.config_processor import ConfigProcessor
+
+
+class _MemoryCache(object):
+
+    """The parts of the ConfigCache which preload_files uses."""
+
+    def __init__(self):
+        """Initialise memory cache."""
+        self.entries = dict()
+
+    def has_entry(self, path, section='config'):
+        """Returns True if path is cached."""
+        return (path, section) in self.entries
+
+    def put(self, path, data, section='config'):
+        """Adds the data of a file."""
+        self.entries[(path, section)] = data
+
+
+def _write_show_files(directory, num_files, num_steps):
+    filenames = list()
+    for number in range(num_files):
+        filename = os.path.join(directory, 'show{}.yaml'.format(number))
+        with open(filename, 'w') as f:
+            f.write('#show_version={}\n'.format(__show_version__))
+            for step in range(num_steps):
+                f.write('- time: {}\n  leds:\n'.format(step))
+                for led in range(8):
+                    f.write('    led_{:02}: {:06x}-f100ms\n'.format(
+                        led, (step * 8 + led) * 997 % 0xffffff))
+                f.write('  lights:\n    light_01: FF\n')
+        filenames.append(filename)
+
+    return filenames
+
+
+def _parse_in_pool(filenames, processes):
+    cache = _MemoryCache()
+    start = time.perf_counter()
+    ConfigProcessor.preload_files(filenames, cache, processes, 'shows',
+                                  load_show_file, min_files=0)
+    elapsed = time.perf_counter() - start
+
+    if len(cache.entries) != len(filenames):
+        raise AssertionError('Only {} of {} files were parsed in the pool'
+                             .format(len(cache.entries), len(filenames)))
+    return elapsed
+
+
+def run(num_files=200, processes=0, num_steps=50):
+    """Runs the benchmark for one number of files and returns a dict with
+    the serial and the parallel time and the pool start time in seconds."""
+    processes = processes or os.cpu_count() or 1
+    directory = tempfile.mkdtemp()
+
+    try:
+        filenames = _write_show_files(directory, num_files, num_steps)
+
+        start = time.perf_counter()
+        for filename in filenames:
+            load_show_file(filename)
+        serial = time.perf_counter() - start
+
+        # two files start two workers but have (almost) nothing to parse
+        startup = (_parse_in_pool(filenames[:2], 2) -
+                   serial * 2 / num_files)
+
+        parallel = _parse_in_pool(filenames, processes)
+    finally:
+        shutil.rmtree(directory)
+
+    return dict(serial=serial, parallel=parallel, startup=startup,
+                processes=processes)
+
+
+def _break_even(result, num_files):
+    # files at which the pool start is paid back by the parallel parsing
+    saved_per_file = (result['serial'] / num_files *
+                      (1 - 1 / result['processes']))
+    if saved_per_file <= 0:
+        return None
+    return result['startup'] / saved_per_file
+
+
+def main():
+    """Runs the benchmark and prints the results."""
+    parser = argparse.ArgumentParser(
+        description='Compares serial and parallel parsing of show files.')
+    parser.add_argument('--files', default='20,100,500',
+                        help='Comma separated numbers of files')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='Worker processes. Default: one per CPU')
+    parser.add_argument('--steps', type=int, default=50,
+                        help='Steps per show file')
+    args = parser.parse_args()
+
+    print('{:>6} {:>10} {:>10} {:>10} {:>11}'.format(
+        'files', 'serial s', 'pool s', 'start s', 'break-even'))
+
+    for num_files in (int(x) for x in args.files.split(',')):
+        result = run(num_files, args.processes, args.steps)
+        break_even = _break_even(result, num_files)
+        print('{:>6} {:>10.3f} {:>10.3f} {:>10.3f} {:>11}'.format(
+            num_files, result['serial'], result['parallel'],
+            result['startup'],
+            'never' if break_even is None else '{:.0f}'.format(break_even)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Compares config validation with and without the compiled spec cache.
+
+Run with: python -m mpf.benchmarks.config_validation [--boots 10]
+
+The machine configs of some tests are booted like the tests boot them and
+every call of ConfigValidator.validate_config() is timed. This is done once
+with the caches of compiled specs, parsed item specs and parsed validators
+like MPF uses them and once with all three caches cleared before every call,
+so every spec is merged and parsed again for every call.
+
+One unmeasured boot per config comes first so both passes find the files in
+the config cache.
+"""
+import argparse
+import time
+import unittest
+from importlib import import_module
+from unittest.mock import patch
+
+from mpf.core.config_validator import ConfigValidator
+
+TESTS = ['mpf.tests.test_Shots.TestShots',
+         'mpf.tests.test_BallDevice.TestBallDevice',
+         'mpf.tests.test_Modes.TestModes']
+"""Test cases whose machine configs are booted."""
+
+
+def _clear_caches():
+    ConfigValidator._compiled_specs.clear()
+    ConfigValidator._parsed_item_specs.clear()
+    ConfigValidator._parsed_validators.clear()
+
+
+class _ValidationTimer(object):
+
+    """Times the outermost calls of ConfigValidator.validate_config()."""
+
+    def __init__(self, clear_caches):
+        """Initialise validation timer."""
+        self.clear_caches = clear_caches
+        self.elapsed = 0
+        self.calls = 0
+        self._depth = 0
+        self._validate_config = ConfigValidator.validate_config
+
+    def validate_config(self, validator, *args, **kwargs):
+        """Calls and times the original validate_config()."""
+        if self.clear_caches:
+            _clear_caches()
+
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._validate_config(validator, *args, **kwargs)
+        finally:
+            self._depth -= 1
+            # sub specs are validated in nested calls
+            if not self._depth:
+                self.elapsed += time.perf_counter() - start
+                self.calls += 1
+
+
+def _get_test_case(test):
+    module_name, class_name = test.rsplit('.', 1)
+    test_class = getattr(import_module(module_name), class_name)
+    method_name = unittest.TestLoader().getTestCaseNames(test_class)[0]
+    return test_class(method_name)
+
+
+def _boot(test_case):
+    start = time.perf_counter()
+    test_case.setUp()
+    elapsed = time.perf_counter() - start
+    test_case.tearDown()
+    return elapsed
+
+
+def _run_pass(test_cases, boots, clear_caches):
+    timer = _ValidationTimer(clear_caches)
+    boot = 0
+
+    def validate_config(validator, *args, **kwargs):
+        return timer.validate_config(validator, *args, **kwargs)
+
+    with patch.object(ConfigValidator, 'validate_config', validate_config):
+        for _ in range(boots):
+            for test_case in test_cases:
+                boot += _boot(test_case)
+
+    return dict(validation=timer.elapsed, boot=boot, calls=timer.calls)
+
+
+def run(boots=10, tests=None):
+    """Runs the benchmark and returns a dict with the results of the
+    'cached' and the 'uncached' pass. Each contains the time spent in
+    validate_config, the total boot time in seconds and the number of
+    validate_config calls."""
+    test_cases = [_get_test_case(test) for test in tests or TESTS]
+
+    for test_case in test_cases:
+        _boot(test_case)
+
+    results = dict()
+    results['cached'] = _run_pass(test_cases, boots, False)
+    results['uncached'] = _run_pass(test_cases, boots, True)
+    _clear_caches()
+
+    return results
+
+
+def main():
+    """Runs the benchmark and prints the results."""
+    parser = argparse.ArgumentParser(
+        description='Compares config validation with and without the '
+                    'compiled spec cache.')
+    parser.add_argument('--boots', type=int, default=10,
+                        help='Boots of every machine config')
+    parser.add_argument('--tests', default=','.join(TESTS),
+                        help='Comma separated test cases to boot')
+    args = parser.parse_args()
+
+    results = run(args.boots, args.tests.split(','))
+
+    print('{:>10} {:>8} {:>14} {:>8}'.format(
+        'specs', 'calls', 'validation s', 'boot s'))
+    for name in ('uncached', 'cached'):
+        print('{:>10} {:>8} {:>14.3f} {:>8.3f}'.format(
+            name, results[name]['calls'], results[name]['validation'],
+            results[name]['boot']))
+
+
+if __name__ == '__main__':
+    main()
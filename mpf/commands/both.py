@@ -7,13 +7,15 @@ import sys
 
 class Command(object):
     def __init__(self, mpf_path, machine_path, args):
+        mc_args = self._get_mc_args(args)
+
         if platform.system() == 'Windows':
             subprocess.Popen(
                 '{} -m mpf game {} {}'.format(
                     sys.executable, machine_path, ' '.join(args)))
 
             os.system('{} -m mpf mc {} {}'.format(
-                sys.executable, machine_path, ' '.join(args)))
+                sys.executable, machine_path, ' '.join(mc_args)))
 
         else:
             if os.fork():
@@ -21,4 +23,25 @@ class Command(object):
                 module.Command(mpf_path, machine_path, args)
             else:
                 module = import_module('mpfmc.commands.mc')
-                module.Command(mpf_path, machine_path, args)
+                module.Command(mpf_path, machine_path, mc_args)
+
+    @staticmethod
+    def _get_mc_args(args):
+        # removes options which are only understood by the game engine
+        mc_args = list()
+        skip_value = False
+
+        for arg in args:
+            if skip_value and not arg.startswith('-'):
+                skip_value = False
+                continue
+
+            skip_value = False
+
+            if arg in ('-P', '-B'):
+                skip_value = True
+                continue
+
+            mc_args.append(arg)
+
+        return mc_args
@@ -0,0 +1,91 @@
+"""Command to build a config bundle for production machines."""
+
+import argparse
+import logging
+import os
+import sys
+
+from mpf.core.machine import MachineController
+from mpf.core.mode import LazyMode
+from mpf.core.utility_functions import Util
+
+
+def save_bundle(machine):
+    """Load everything which is loaded on demand and save the bundle.
+
+    The machine has to be started with the build_config_bundle option. Lazy
+    modes (including their assets) and all shows are loaded, so their files
+    are in the bundle as well.
+    """
+    for mode in list(machine.modes):
+        if isinstance(mode, LazyMode):
+            mode.load()
+
+    for show in list(getattr(machine, 'shows', dict()).values()):
+        if getattr(show, 'file', None) and not show.loaded:
+            show.do_load()
+
+    machine.config_cache.save()
+
+
+class Command(object):
+    def __init__(self, mpf_path, machine_path, args):
+        parser = argparse.ArgumentParser(
+            description='Builds a config bundle which contains the parsed '
+                        'and validated config and shows of a machine. Start '
+                        'MPF with -B to boot from the bundle.')
+
+        parser.add_argument("-c",
+                            action="store", dest="configfile",
+                            default="config", metavar='config_file',
+                            help="The name of a config file to load. Default "
+                                 "is config.yaml. Multiple files can be used "
+                                 "via a comma-separated list (no spaces "
+                                 "between)")
+
+        parser.add_argument("-C",
+                            action="store", dest="mpfconfigfile",
+                            default=os.path.join(mpf_path,
+                                                 "mpfconfig.yaml"),
+                            metavar='config_file',
+                            help="The MPF framework default config file. "
+                                 "Default is mpf/mpfconfig.yaml")
+
+        parser.add_argument("-o",
+                            action="store", dest="bundle_file",
+                            default=os.path.join(machine_path,
+                                                 "config.mpfbundle"),
+                            metavar='bundle_file',
+                            help="The bundle file to write. Default is "
+                                 "config.mpfbundle in the machine folder")
+
+        parser.add_argument("-v",
+                            action="store_const", dest="loglevel",
+                            const=logging.DEBUG,
+                            default=logging.INFO,
+                            help="Enables verbose logging to the console")
+
+        args = parser.parse_args(args)
+
+        logging.basicConfig(level=args.loglevel,
+                            format='%(levelname)s : %(name)s : %(message)s')
+
+        # boots the machine with the virtual platform. this loads, migrate
+        # checks and validates all config files
+        options = dict(configfile=Util.string_to_list(args.configfile),
+                       mpfconfigfile=args.mpfconfigfile,
+                       force_platform='virtual',
+                       bcp=False,
+                       no_load_cache=True,
+                       create_config_cache=False,
+                       build_config_bundle=os.path.abspath(args.bundle_file))
+
+        machine = MachineController(mpf_path, machine_path, options)
+
+        try:
+            save_bundle(machine)
+        finally:
+            machine.stop()
+
+        print("Config bundle written to {}".format(args.bundle_file))
+        sys.exit()
@@ -57,6 +57,15 @@ class Command(object):
                             action="store_false", dest="create_config_cache",
                             help="Does not create the cache config files")
 
+        parser.add_argument("-B",
+                            action="store", dest="config_bundle",
+                            nargs="?", metavar='bundle_file',
+                            const="config.mpfbundle",
+                            help="Boots from a config bundle which was built "
+                                 "with 'mpf bundle' instead of loading the "
+                                 "config files (default: config.mpfbundle "
+                                 "in the machine folder)")
+
         parser.add_argument("-X",
                             action="store_const", dest="force_platform",
                             const='smart_virtual',
@@ -87,6 +96,17 @@ class Command(object):
                                  "Default is "
                                  "mpf/mpfconfig.yaml")
 
+        parser.add_argument("-P",
+                            action="store", dest="profile_startup",
+                            nargs="?", metavar='json_file',
+                            const=os.path.join("logs",
+                                               datetime.now().strftime(
+                                                   "%Y-%m-%d-%H-%M-%S-startup-profile.json")),
+                            help="Measures the time spent in each phase of "
+                                 "the boot process. Logs a table and writes "
+                                 "it as JSON to json_file (default: "
+                                 "logs/<date>-startup-profile.json)")
+
         parser.add_argument("-p",
                             action="store_true", dest="pause", default=False,
                             help="Pause the terminal window on exit. Useful "
@@ -96,6 +116,9 @@ class Command(object):
         args = parser.parse_args(args)
         args.configfile = Util.string_to_list(args.configfile)
 
+        if args.config_bundle:
+            args.config_bundle = os.path.join(machine_path, args.config_bundle)
+
         # Configure logging. Creates a logfile and logs to the console.
         # Formatting options are documented here:
         # https://docs.python.org/2.7/library/logging.html#logrecord-attributes
@@ -1,6 +1,4 @@
 """Coil config player."""
-import copy
-
 from mpf.core.config_player import ConfigPlayer
 
 
@@ -19,9 +17,9 @@ class CoilPlayer(ConfigPlayer):
         if 'coils' in settings:
             settings = settings['coils']
 
+        # settings are shared between plays and must not be modified
         for coil, s in settings.items():
-            s = copy.deepcopy(s)
-            action = s.pop('action')
+            action = s['action']
             try:
                 coil = getattr(coil, action)
             except AttributeError:
@@ -32,7 +30,7 @@ class CoilPlayer(ConfigPlayer):
             elif action in ("on", "enable"):
                 instance_dict[coil.name] = coil
 
-            coil(**s)
+            coil(**{k: v for k, v in s.items() if k != 'action'})
 
     def clear_context(self, context):
         """Disable enabled coils."""
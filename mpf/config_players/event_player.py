@@ -23,8 +23,11 @@ class EventPlayer(ConfigPlayer):
         if 'events' in settings:
             settings = settings['events']
 
+        # settings are shared between plays and must not be modified
         for event, s in settings.items():
-            s.update(kwargs)
+            if kwargs:
+                s = dict(s)
+                s.update(kwargs)
             if ':' in event:
                 event, delay = event.split(":")
                 delay = Util.string_to_ms(delay)
@@ -12,6 +12,23 @@ class LedPlayer(ConfigPlayer):
     show_section = 'leds'
     machine_collection_name = "leds"
 
+    def __init__(self, machine):
+        """Initialise LedPlayer."""
+        super().__init__(machine)
+        self._colors = dict()
+
+    def _get_color(self, color):
+        # parsed colors are cached since the same few colors are played over
+        # and over again. RGBColor instances are never modified in the stack.
+        try:
+            return self._colors[color]
+        except KeyError:
+            self._colors[color] = RGBColor(color)
+            return self._colors[color]
+        except TypeError:
+            # not hashable (e.g. a list of channels)
+            return RGBColor(color)
+
     def play(self, settings, context, priority=0, **kwargs):
         """Set LED color based on config."""
         instance_dict = self._get_instance_dict(context)
@@ -20,34 +37,89 @@ class LedPlayer(ConfigPlayer):
         if 'leds' in settings:
             settings = settings['leds']
 
+        # settings are shared between plays and must not be modified
         for led, s in settings.items():
-            s['color'] = RGBColor(s['color'])
-            try:
-                s['priority'] += priority
-            except KeyError:
-                s['priority'] = priority
+            led_priority = s.get('priority', 0) + priority
 
             try:
-                led.color(key=full_context, **s)
+                led.color(self._get_color(s['color']),
+                          fade_ms=s.get('fade_ms'), priority=led_priority,
+                          key=full_context)
                 instance_dict[led.name] = led
 
             except AttributeError:
                 try:
-                    self._led_color(led, instance_dict, full_context, **s)
+                    self._led_color(led, instance_dict, full_context, s,
+                                    led_priority)
                 except KeyError:
                     led_list = Util.string_to_list(led)
                     if len(led_list) > 1:
                         for led1 in led_list:
-                            self._led_color(led1, instance_dict, full_context, **s)
+                            self._led_color(led1, instance_dict, full_context,
+                                            s, led_priority)
                     else:
                         for led1 in self.machine.leds.sitems_tagged(led):
-                            self._led_color(led1, instance_dict, full_context, **s)
+                            self._led_color(led1, instance_dict, full_context,
+                                            s, led_priority)
 
-    def _led_color(self, led_name, instance_dict, full_context, **s):
+    # pylint: disable-msg=too-many-arguments
+    def _led_color(self, led_name, instance_dict, full_context, s, priority):
         led = self.machine.leds[led_name]
-        led.color(key=full_context, **s)
+        led.color(self._get_color(s['color']), fade_ms=s.get('fade_ms'),
+                  priority=priority, key=full_context)
         instance_dict[led.name] = led
 
+    def _get_leds(self, led):
+        # resolves a led object, led name, list of leds or tag to leds
+        if not isinstance(led, str):
+            return [led]
+
+        if led in self.machine.leds:
+            return [self.machine.leds[led]]
+
+        led_list = Util.string_to_list(led)
+        if len(led_list) > 1:
+            return [self.machine.leds[led1] for led1 in led_list]
+
+        leds = self.machine.leds.items_tagged(led)
+        if not leds:
+            raise KeyError(led)
+
+        return leds
+
+    def render_show_step(self, settings):
+        """Render the validated leds section of a show step.
+
+        Returns a list of (led name, rgb tuple, fade_ms, priority) entries in
+        the order in which they would be played. Raises KeyError if a led
+        cannot be resolved.
+        """
+        entries = list()
+        for led, s in settings.items():
+            rgb = tuple(RGBColor(s['color']).rgb)
+            for led1 in self._get_leds(led):
+                entries.append((led1.name, rgb, s['fade_ms'], s['priority']))
+
+        return entries
+
+    def show_play_frame_callback(self, frame, priority, context):
+        """Play a pre-rendered frame from a show.
+
+        Args:
+            frame: List of (led, RGBColor, fade_ms, priority) tuples as
+                returned by LedShowFrames.get_frame().
+            priority: Priority of the running show.
+            context: Context of the running show.
+        """
+        self._init_instance_dict(context)
+        instance_dict = self._get_instance_dict(context)
+        full_context = self._get_full_context(context)
+
+        for led, color, fade_ms, led_priority in frame:
+            led.color(color, fade_ms=fade_ms, priority=led_priority + priority,
+                      key=full_context)
+            instance_dict[led.name] = led
+
     def clear_context(self, context):
         """Remove all colors which were set in context."""
         full_context = self._get_full_context(context)
@@ -20,31 +20,35 @@ class LightPlayer(ConfigPlayer):
         if 'lights' in settings:
             settings = settings['lights']
 
+        # settings are shared between plays and must not be modified
         for light, s in settings.items():
-            try:
-                s['priority'] += priority
-            except KeyError:
-                s['priority'] = priority
+            light_priority = s.get('priority', 0) + priority
 
             try:
-                light.on(key=full_context, **s)
+                light.on(brightness=s['brightness'], fade_ms=s.get('fade_ms'),
+                         priority=light_priority, key=full_context)
                 instance_dict[light.name] = light
 
             except AttributeError:
                 try:
-                    self._light_on(light, instance_dict, full_context, **s)
+                    self._light_on(light, instance_dict, full_context, s,
+                                   light_priority)
                 except KeyError:
                     light_list = Util.string_to_list(light)
                     if len(light_list) > 1:
                         for light1 in light_list:
-                            self._light_on(light1, instance_dict, full_context, **s)
+                            self._light_on(light1, instance_dict,
+                                           full_context, s, light_priority)
                     else:
                         for light1 in self.machine.lights.sitems_tagged(light):
-                            self._light_on(light1, instance_dict, full_context, **s)
+                            self._light_on(light1, instance_dict,
+                                           full_context, s, light_priority)
 
-    def _light_on(self, light_name, instance_dict, full_context, **s):
+    # pylint: disable-msg=too-many-arguments
+    def _light_on(self, light_name, instance_dict, full_context, s, priority):
         light = self.machine.lights[light_name]
-        light.on(key=full_context, **s)
+        light.on(brightness=s['brightness'], fade_ms=s.get('fade_ms'),
+                 priority=priority, key=full_context)
         instance_dict[light.name] = light
 
     def clear_context(self, context):
@@ -1,6 +1,5 @@
 """Random event config player."""
 import random
-import copy
 from mpf.core.config_player import ConfigPlayer
 from mpf.core.utility_functions import Util
 
@@ -20,10 +19,8 @@ class RandomEventPlayer(ConfigPlayer):
         # else:
         #     play_kwargs.update(kwargs)
 
-        these_settings = copy.deepcopy(settings)
-        # these_settings.update(play_kwargs)
-        event_list = these_settings.pop('event_list')
-        self.machine.events.post(random.choice(event_list), **kwargs)
+        self.machine.events.post(random.choice(settings['event_list']),
+                                 **kwargs)
 
     def get_express_config(self, value):
         """Parse express config."""
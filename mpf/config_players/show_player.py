@@ -1,6 +1,4 @@
 """Show config player."""
-from copy import deepcopy
-
 from mpf.core.config_player import ConfigPlayer
 
 
@@ -17,23 +15,18 @@ class ShowPlayer(ConfigPlayer):
         if 'shows' in settings:
             settings = settings['shows']
 
-        settings = deepcopy(settings)
-
         # show_tokens = kwargs.get('show_tokens', None)
 
+        # settings are shared between plays and must not be modified
         for show, s in settings.items():
             if 'hold' in s and s['hold'] is not None:
                 raise AssertionError("Setting 'hold' is no longer supported for shows. Use duration -1 in your show.")
-            try:
-                s['priority'] += priority
-            except KeyError:
-                s['priority'] = priority
 
             # todo need to add this key back to the config player
 
-            self._update_show(show, s, context)
+            self._update_show(show, s, context, s.get('priority', 0) + priority)
 
-    def _update_show(self, show, s, context):
+    def _update_show(self, show, s, context, priority):
         instance_dict = self._get_instance_dict(context)
         if s['action'].lower() == 'play':
             if show in instance_dict:
@@ -41,7 +34,7 @@ class ShowPlayer(ConfigPlayer):
             try:
                 show_instance = self.machine.shows[show].play(
                     show_tokens=s['show_tokens'],
-                    priority=s['priority'],
+                    priority=priority,
                     speed=s['speed'],
                     start_step=s['start_step'],
                     loops=s['loops'],
@@ -75,7 +68,7 @@ class ShowPlayer(ConfigPlayer):
             if show in instance_dict:
                 instance_dict[show].update(
                     show_tokens=s['show_tokens'],
-                    priority=s['priority'])
+                    priority=priority)
 
     def clear_context(self, context):
         """Stop running shows from context."""
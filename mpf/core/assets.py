@@ -12,6 +12,7 @@ from queue import PriorityQueue, Queue, Empty
 
 
 from mpf.core.case_insensitive_dict import CaseInsensitiveDict
+from mpf.core.mode import LazyMode
 from mpf.core.utility_functions import Util
 
 
@@ -191,18 +192,20 @@ class AssetManager(object):
         self._create_assets_from_disk(config=self.machine.machine_config)
         self._create_asset_groups(config=self.machine.machine_config)
 
-        # Create the mode assets
+        # Create the mode assets. Lazy modes create them once they are loaded
         for mode in self.machine.modes.values():
-            self._create_assets_from_disk(config=mode.config, mode=mode)
-            self._create_asset_groups(config=mode.config, mode=mode)
+            if not isinstance(mode, LazyMode):
+                self._create_assets_from_disk(config=mode.config, mode=mode)
+                self._create_asset_groups(config=mode.config, mode=mode)
 
         # load the assets marked for preload:
         preload_assets = list()
 
         for ac in self._asset_classes:
-            preload_assets.extend(
-                [x for x in getattr(self.machine, ac['attribute']).values() if
-                 x.config['load'] == 'preload'])
+            class_assets = [x for x in getattr(self.machine, ac['attribute']).values() if
+                            x.config['load'] == 'preload']
+            ac['cls'].preload_files(self.machine, class_assets)
+            preload_assets.extend(class_assets)
 
         for asset in preload_assets:
             asset.load()
@@ -210,6 +213,32 @@ class AssetManager(object):
         if not preload_assets:
             self.machine.clear_boot_hold('assets')
 
+    def create_mode_assets(self, mode):
+        """Creates the assets of a mode which has been loaded after boot and
+        loads the ones which are set to preload.
+
+        Args:
+            mode: The Mode object.
+
+        """
+        asset_names = dict()
+        for ac in self._asset_classes:
+            asset_names[ac['attribute']] = set(
+                getattr(self.machine, ac['attribute']).keys())
+
+        self._create_assets_from_disk(config=mode.config, mode=mode)
+        self._create_asset_groups(config=mode.config, mode=mode)
+
+        for ac in self._asset_classes:
+            collection = getattr(self.machine, ac['attribute'])
+            new_assets = [collection[x] for x in collection.keys()
+                          if x not in asset_names[ac['attribute']] and
+                          collection[x].config['load'] == 'preload']
+            ac['cls'].preload_files(self.machine, new_assets)
+
+            for asset in new_assets:
+                asset.load()
+
     def _create_assets_from_disk(self, config, mode=None):
         """Walks a folder (and subfolders) and finds all the assets. Checks to
         see if those assets have config entries in the passed config file, and
@@ -365,7 +394,7 @@ class AssetManager(object):
         root_path = os.path.join(path, asset_class['path_string'])
         self.log.debug("Processing assets from base folder: %s", root_path)
 
-        for path, _, files in os.walk(root_path, followlinks=True):
+        for path, _, files in self._walk_folder(root_path):
             valid_files = [f for f in files if f.endswith(
                            asset_class['extensions'])]
             for file_name in valid_files:
@@ -417,6 +446,14 @@ class AssetManager(object):
                                default_string, built_up_config)
         return config
 
+    def _walk_folder(self, path):
+        # a config bundle knows the asset folders without walking them
+        config_cache = getattr(self.machine, 'config_cache', None)
+        if config_cache:
+            return config_cache.walk(path)
+
+        return os.walk(path, followlinks=True)
+
     def _create_asset_groups(self, config, mode=None):
         # creates named groups of assets and adds them to to the mc's asset
         # dicts
@@ -801,6 +838,15 @@ class Asset(object):
             priority=cls.class_priority,
             pool_config_section=cls.pool_config_section)
 
+    @classmethod
+    def preload_files(cls, mc, assets):
+        """Called once on boot with all assets of this class which will be
+        preloaded. Asset classes can use it to read their files up front.
+
+        """
+        del mc
+        del assets
+
     def __init__(self, mc, name, file, config):
         self.machine = mc
         self.name = name
@@ -10,8 +10,9 @@ import urllib.request
 import urllib.parse
 import urllib.error
 from queue import Queue
-import copy
 import json
+import re
+from functools import partial
 
 import select
 
@@ -123,6 +124,131 @@ def encode_command_string(bcp_command, **kwargs):
                                         kwarg_string, '')))
 
 
+def encode_command_json(bcp_command, **kwargs):
+    """Encodes a BCP command and kwargs into a compact JSON BCP message.
+
+    This is the 'json' encoding which can be negotiated in the hello
+    exchange. The message is a JSON array of the command and a dict of its
+    parameters on a single line. Values keep their JSON types, so no type
+    prefixes and no URL quoting are needed. Values which cannot be stored
+    in JSON are sent as strings.
+
+    Example:
+        Input: encode_command_json('switch', name='s_start', state=1)
+        Output: ["switch",{"name":"s_start","state":1}]
+
+    The & character is escaped so a JSON message can never be mistaken for
+    a message with an &bytes= payload.
+
+    """
+    return json.dumps([bcp_command.lower(), kwargs], separators=(',', ':'),
+                      default=str).replace('&', '\\u0026')
+
+
+def decode_command_json(bcp_string):
+    """Decodes a JSON BCP message into command and kwargs.
+
+    json.loads() only accepts bytes since Python 3.6 so bytes have to be
+    decoded first.
+
+    Returns:
+        A tuple of the lowercase command string and a dict of parameters.
+
+    """
+    if isinstance(bcp_string, bytes):
+        bcp_string = bcp_string.decode()
+
+    bcp_command, kwargs = json.loads(bcp_string)
+    return bcp_command.lower(), kwargs
+
+
+def decode_message(bcp_string):
+    """Decodes a BCP message in any encoding into command and kwargs.
+
+    JSON messages start with [ which is never the first character of a
+    URL encoded BCP command, so both encodings can be mixed on one
+    connection.
+
+    Args:
+        bcp_string: The message as str or UTF-8 encoded bytes.
+
+    Returns:
+        A tuple of the command string and a dictionary of kwarg pairs.
+
+    """
+    if isinstance(bcp_string, bytes):
+        bcp_string = bcp_string.decode()
+
+    if bcp_string[:1] == '[':
+        return decode_command_json(bcp_string)
+
+    return decode_command_string(bcp_string)
+
+
+class BcpParamTemplate(object):
+    """A parameter of a BCP event_map entry which contains variables.
+
+    The string is compiled once into a format string and the list of
+    variables it uses. %name% is replaced with the player variable name of
+    the current player (or with the event kwarg name if there is no such
+    player variable) and %name with the event kwarg name. Variables which
+    have no value are kept as they are.
+
+    Args:
+        value: The parameter string from the config.
+
+    """
+
+    __slots__ = ('format_string', 'variables')
+
+    VARIABLE = re.compile(r'%(\w+)(%?)')
+
+    def __init__(self, value):
+        """Initialise BCP param template."""
+        parts = list()
+        self.variables = list()
+        position = 0
+
+        for match in self.VARIABLE.finditer(value):
+            parts.append(_escape_format(value[position:match.start()]))
+            parts.append('{}')
+            self.variables.append((match.group(1), bool(match.group(2)),
+                                   match.group(0)))
+            position = match.end()
+
+        parts.append(_escape_format(value[position:]))
+        self.format_string = ''.join(parts)
+
+    def expand(self, player_vars, kwargs):
+        """Returns the string with all variables replaced.
+
+        Args:
+            player_vars: Dict of the variables of the current player.
+            kwargs: Dict of the kwargs of the event.
+        """
+        values = list()
+
+        for name, is_player_var, text in self.variables:
+            if is_player_var and name in player_vars:
+                values.append(player_vars[name])
+            elif name in kwargs:
+                values.append(kwargs[name])
+            else:
+                values.append(text)
+
+        return self.format_string.format(*values)
+
+
+def _escape_format(text):
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+ENCODERS = dict(bcp=encode_command_string,
+                json=encode_command_json)
+"""Functions to encode BCP messages by name of the encoding. 'bcp' is the
+URL encoded format which every BCP host supports."""
+
+
 class BCP(object):
     """The parent class for the BCP client.
 
@@ -137,7 +263,7 @@ class BCP(object):
         error
         get
         goodbye
-        hello?version=xxx&controller_name=xxx&controller_version=xxx
+        hello?version=xxx&controller_name=xxx&controller_version=xxx&encodings=xxx
         mode_start?name=xxx&priority=xxx
         mode_stop?name=xxx
         player_added?player_num=x
@@ -146,9 +272,15 @@ class BCP(object):
         player_variable?name=x&value=x&prev_value=x&change=x&player_num=x
         set
         shot?name=x
+        subscribe?topic=xxx&names=xxx&tags=xxx&max_rate=x
         switch?name=x&state=x
         timer
         trigger?name=xxx
+        unsubscribe?topic=xxx&names=xxx
+
+    Messages are URL encoded (e.g. switch?name=s_start&state=int:1) unless
+    a more compact encoding (see ENCODERS) was negotiated in the hello
+    exchange with a host.
 
     """
 
@@ -170,6 +302,7 @@ class BCP(object):
         self.bcp_events = dict()
         self.connection_config = self.config['connections']
         self.bcp_clients = list()
+        self.server = None
 
         self.bcp_receive_commands = dict(
             error=self.bcp_receive_error,
@@ -183,7 +316,9 @@ class BCP(object):
             external_show_stop=self.external_show_stop,
             external_show_frame=self.external_show_frame,
             dmd_frame=self.bcp_receive_dmd_frame,
-            rgb_dmd_frame=self.bcp_receive_rgb_dmd_frame)
+            rgb_dmd_frame=self.bcp_receive_rgb_dmd_frame,
+            subscribe=self.bcp_receive_subscribe,
+            unsubscribe=self.bcp_receive_unsubscribe)
 
         self.physical_dmd_update_callback = None
         self.physical_rgb_dmd_update_callback = None
@@ -193,10 +328,13 @@ class BCP(object):
         self.send_machine_vars = False
         self.track_volumes = dict()
         self.volume_control_enabled = False
+        self.priority_commands = set()
 
         self.connection_callbacks = list()
 
         self.registered_trigger_events = CaseInsensitiveDict()
+        self._subscribed_events = set()
+        self._switch_monitor_added = False
 
         # Add the following to the set of events that already have mpf mc
         # triggers since these are all posted on the mc side already
@@ -224,7 +362,14 @@ class BCP(object):
 
         self.machine.events.add_handler('init_done',
                                         self._setup_bcp_connections)
+
+        if self.config.get('server'):
+            self.machine.events.add_handler('init_done', self._start_server)
         self.machine.clock.schedule_interval(self.get_bcp_messages, 0)
+        # after all other callbacks of the frame so everything sent in this
+        # frame goes out in one write
+        self.machine.clock.schedule_interval(self._flush_clients, 0,
+                                             priority=-1000)
         self.machine.events.add_handler('player_add_success',
                                         self.bcp_player_added)
         self.machine.events.add_handler('machine_reset_phase_1',
@@ -344,6 +489,12 @@ class BCP(object):
             if '__all__' in self.config['machine_variables']:
                 self.filter_machine_vars = False
 
+        if ('priority_commands' in self.config and
+                self.config['priority_commands']):
+            self.priority_commands = set(
+                Util.string_to_lowercase_list(
+                    self.config['priority_commands']))
+
     def _setup_bcp_connections(self):
         if not self.machine.options['bcp']:
             return
@@ -361,12 +512,49 @@ class BCP(object):
         for callback in self.machine.bcp.connection_callbacks:
             callback()
 
-    def _send_machine_vars(self):
+    def _start_server(self):
+        if not self.machine.options['bcp']:
+            return
+
+        # imported here since most machines only connect to a media
+        # controller
+        from mpf.core.bcp_server import BcpServer
+
+        self.server = BcpServer(
+            self.machine, self,
+            self.machine.config_validator.validate_config(
+                'bcp:server', self.config['server'], 'bcp:server'))
+        self.server.start()
+        self.machine.events.add_handler('shutdown', self.server.stop)
+
+    def _send_machine_vars(self, clients=None):
+        if clients is None:
+            clients = self.bcp_clients
+
         for var_name, settings in self.machine.machine_vars.items():
+            self._send_to_clients(clients, 'machine_variable',
+                                  dict(name=var_name,
+                                       value=settings['value']))
+
+    def add_bcp_connection(self, bcp_client):
+        """Adds a connection to a BCP host which connected after MPF started
+        and sends it the state which the other hosts got when they
+        connected.
+
+        Args:
+            bcp_client: The client to add (e.g. a BcpServerClient).
+
+        """
+        self.bcp_clients.append(bcp_client)
+        self._send_machine_vars([bcp_client])
+
+        if self.physical_dmd_update_callback:
+            self._send_to_clients([bcp_client], 'dmd_start',
+                                  dict(fps=self.machine.clock.max_fps))
 
-            self.send(bcp_command='machine_variable',
-                      name=var_name,
-                      value=settings['value'])
+        if self.physical_rgb_dmd_update_callback:
+            self._send_to_clients([bcp_client], 'rgb_dmd_start',
+                                  dict(fps=self.machine.clock.max_fps))
 
     def remove_bcp_connection(self, bcp_client):
         """Removes a BCP connection to a remote BCP host.
@@ -380,6 +568,9 @@ class BCP(object):
             self.bcp_clients.remove(bcp_client)
         except ValueError:
             pass
+        else:
+            if bcp_client.subscriptions:
+                self._update_subscription_handlers()
 
     def _setup_player_monitor(self):
         Player.monitor_enabled = True
@@ -409,68 +600,247 @@ class BCP(object):
     # pylint: disable-msg=too-many-arguments
     def _player_var_change(self, name, value, prev_value, change, player_num):
         if name == 'score':
-            self.send('player_score', value=value, prev_value=prev_value,
-                      change=change, player_num=player_num)
-
-        elif self.send_player_vars and (
-                not self.filter_player_events or
-                name in self.config['player_variables']):
-            self.send(bcp_command='player_variable',
-                      name=name,
-                      value=value,
-                      prev_value=prev_value,
-                      change=change,
-                      player_num=player_num)
+            self._send_subscribed(
+                'player_variable', name, True, 'player_score',
+                dict(value=value, prev_value=prev_value, change=change,
+                     player_num=player_num))
+
+        else:
+            self._send_subscribed(
+                'player_variable', name,
+                self.send_player_vars and (
+                    not self.filter_player_events or
+                    name in self.config['player_variables']),
+                'player_variable',
+                dict(name=name, value=value, prev_value=prev_value,
+                     change=change, player_num=player_num))
 
     def _machine_var_change(self, name, value, prev_value, change):
-        if self.send_machine_vars and (
+        self._send_subscribed(
+            'machine_variable', name,
+            self.send_machine_vars and (
                 not self.filter_machine_vars or
-                name in self.config['machine_variables']):
-            self.send(bcp_command='machine_variable',
-                      name=name,
-                      value=value,
-                      prev_value=prev_value,
-                      change=change)
+                name in self.config['machine_variables']),
+            'machine_variable',
+            dict(name=name, value=value, prev_value=prev_value,
+                 change=change))
+
+    def _switch_change(self, name, state):
+        self._send_subscribed('switch', name, False, 'switch',
+                              dict(name=name, state=state))
+
+    def _subscribed_event(self, event_name, **kwargs):
+        kwargs['name'] = event_name
+        self._send_subscribed('event', event_name, False, 'trigger', kwargs)
+
+    # pylint: disable-msg=too-many-arguments
+    def _send_subscribed(self, topic, name, broadcast, bcp_command, kwargs):
+        """Sends a message to all clients which subscribed to name in topic.
+
+        Clients without subscriptions get the message if broadcast is True,
+        which is decided by the static filters in the bcp config.
+        """
+        clients = list()
+
+        for client in self.bcp_clients:
+            if client.subscriptions is None:
+                if broadcast:
+                    clients.append(client)
+                continue
+
+            try:
+                names = client.subscriptions[topic]
+            except KeyError:
+                continue
+
+            if name in names:
+                min_interval = names[name]
+            elif '__all__' in names:
+                min_interval = names['__all__']
+            else:
+                continue
+
+            if min_interval and not self._check_rate_limit(
+                    client, (topic, name), min_interval, bcp_command, kwargs):
+                continue
+
+            clients.append(client)
+
+        if clients:
+            self._send_to_clients(clients, bcp_command, kwargs)
+
+    # pylint: disable-msg=too-many-arguments
+    def _check_rate_limit(self, client, key, min_interval, bcp_command,
+                          kwargs):
+        # returns True if the message can be sent now. otherwise it replaces
+        # the pending message for key, which is sent when the interval passed
+        now = self.machine.clock.get_time()
+        rate_limit = client.rate_limits.get(key)
+
+        if rate_limit is None or (rate_limit['pending'] is None and
+                                  now >= rate_limit['next_time']):
+            client.rate_limits[key] = dict(next_time=now + min_interval,
+                                           pending=None)
+            return True
+
+        if rate_limit['pending'] is None:
+            self.machine.clock.schedule_once(
+                partial(self._send_rate_limited, client, key, min_interval),
+                rate_limit['next_time'] - now)
+
+        rate_limit['pending'] = (bcp_command, kwargs)
+        return False
+
+    def _send_rate_limited(self, client, key, min_interval, dt):
+        del dt
+        rate_limit = client.rate_limits.get(key)
+
+        if (not rate_limit or not rate_limit['pending'] or
+                client not in self.bcp_clients):
+            return
+
+        bcp_command, kwargs = rate_limit['pending']
+        rate_limit['pending'] = None
+        rate_limit['next_time'] = (self.machine.clock.get_time() +
+                                   min_interval)
+        self._send_to_clients([client], bcp_command, kwargs)
+
+    def bcp_receive_subscribe(self, bcp_client, topic, names=None, tags=None,
+                              max_rate=None, rawbytes=None, **kwargs):
+        """Subscribes a client to variables, events or switches.
+
+        Once a client subscribed to anything, it only gets player variables,
+        machine variables, events and switches it subscribed to.
+
+        Args:
+            bcp_client: The BCPClientSocket which sent the command.
+            topic: 'player_variable', 'machine_variable', 'event' or
+                'switch'.
+            names: List or comma separated names of variables, events or
+                switches. __all__ subscribes to all of them.
+            tags: Optional list of tags of switches to subscribe to.
+            max_rate: Optional maximum number of updates per second per name.
+                If values change faster, only the latest one is sent.
+        """
+        del rawbytes
+        del kwargs
+
+        if topic not in ('player_variable', 'machine_variable', 'event',
+                         'switch'):
+            self.log.warning("Cannot subscribe to unknown topic %s", topic)
+            return
+
+        names = Util.string_to_list(names)
+
+        if topic == 'switch':
+            for tag in Util.string_to_lowercase_list(tags):
+                names.extend(x.name for x in
+                             self.machine.switches.items_tagged(tag))
+
+        if bcp_client.subscriptions is None:
+            bcp_client.subscriptions = dict()
+
+        min_interval = 1 / float(max_rate) if max_rate else 0
+        topic_names = bcp_client.subscriptions.setdefault(topic, dict())
+        for name in names:
+            topic_names[name] = min_interval
+
+        self._update_subscription_handlers()
+
+    def bcp_receive_unsubscribe(self, bcp_client, topic=None, names=None,
+                                rawbytes=None, **kwargs):
+        """Removes subscriptions of a client.
+
+        Without names, all subscriptions of topic are removed. Without topic,
+        all subscriptions are removed.
+        """
+        del rawbytes
+        del kwargs
+
+        if not bcp_client.subscriptions:
+            return
+
+        if not topic:
+            bcp_client.subscriptions.clear()
+        elif not names:
+            bcp_client.subscriptions.pop(topic, None)
+        else:
+            for name in Util.string_to_list(names):
+                bcp_client.subscriptions.get(topic, dict()).pop(name, None)
+
+        self._update_subscription_handlers()
+
+    def _update_subscription_handlers(self):
+        # only listen to events and switches as long as someone subscribed
+        events = set()
+        switch_subscription = False
+
+        for client in self.bcp_clients:
+            if client.subscriptions:
+                events.update(client.subscriptions.get('event', ()))
+                switch_subscription |= bool(
+                    client.subscriptions.get('switch'))
+
+        for event in events - self._subscribed_events:
+            self.machine.events.add_handler(event, self._subscribed_event,
+                                            event_name=event)
+
+        for event in self._subscribed_events - events:
+            self.machine.events.remove_handler_by_event(
+                event, self._subscribed_event)
+
+        self._subscribed_events = events
+
+        if switch_subscription and not self._switch_monitor_added:
+            self.machine.switch_controller.add_monitor(self._switch_change)
+        elif not switch_subscription and self._switch_monitor_added:
+            self.machine.switch_controller.remove_monitor(self._switch_change)
+
+        self._switch_monitor_added = switch_subscription
 
     def process_bcp_events(self):
-        """Processes the BCP Events from the config."""
+        """Processes the BCP Events from the config.
+
+        Params with variables are compiled into BcpParamTemplates here, so
+        sending a mapped event does not need to scan the params.
+        """
         # config is localized to BCPEvents
         for event, settings in self.bcp_events.items():
             if 'params' in settings:
-                self.machine.events.add_handler(event,
-                                                self._bcp_event_callback,
-                                                command=settings['command'],
-                                                params=settings['params'])
+                params = dict()
+                param_templates = list()
+
+                for name, value in settings['params'].items():
+                    if isinstance(value, str) and '%' in value:
+                        param_templates.append(
+                            (name, BcpParamTemplate(value)))
+                    else:
+                        params[name] = value
+
+                self.machine.events.add_handler(
+                    event, self._bcp_event_callback,
+                    command=settings['command'], params=params,
+                    param_templates=param_templates)
 
             else:
                 self.machine.events.add_handler(event,
                                                 self._bcp_event_callback,
                                                 command=settings['command'])
 
-    def _replace_variables(self, value, kwargs):
-        # Are there any text variables to replace on the fly?
-        # todo should this go here?
-        if '%' in value:
-            # first check for player vars (%var_name%)
-            if self.machine.game and self.machine.game.player:
-                for name, val in self.machine.game.player:
-                    if '%' + name + '%' in value:
-                        value = value.replace('%' + name + '%',
-                                              str(val))
+    def _bcp_event_callback(self, command, params=None, param_templates=None,
+                            **kwargs):
+        if param_templates:
+            params = dict(params)
 
-            # now check for single % which means event kwargs
-            for name, val in kwargs.items():
-                if '%' + name in value:
-                    value = value.replace('%' + name, str(val))
+            if self.machine.game and self.machine.game.player:
+                player_vars = self.machine.game.player.vars
+            else:
+                player_vars = dict()
 
-        return value
+            for name, template in param_templates:
+                params[name] = template.expand(player_vars, kwargs)
 
-    def _bcp_event_callback(self, command, params=None, **kwargs):
         if params:
-            params = copy.deepcopy(params)
-            for param, value in params.items():
-                params[param] = self._replace_variables(value, kwargs)
-
             self.send(command, **params)
 
         else:
@@ -493,17 +863,40 @@ class BCP(object):
             The BCP command that will be sent will be this:
                 trigger?ball=1&string=hello
 
+        Messages are buffered and sent to each host in one write at the end
+        of the frame, except for commands in bcp:priority_commands which
+        are sent right away (together with everything buffered before).
+
         """
         if not self.configured:
             return
-        bcp_string = encode_command_string(bcp_command, **kwargs)
 
-        for client in self.bcp_clients:
-            client.send(bcp_string)
+        self._send_to_clients(self.bcp_clients, bcp_command, kwargs)
 
         if callback:
             callback()
 
+    def _send_to_clients(self, clients, bcp_command, kwargs):
+        # every client gets the message in its negotiated encoding. each
+        # encoding is only used once
+        messages = dict()
+        priority = bcp_command in self.priority_commands
+
+        for client in clients:
+            try:
+                message = messages[client.encoding]
+            except KeyError:
+                message = messages[client.encoding] = (
+                    ENCODERS[client.encoding](bcp_command, **kwargs))
+
+            client.send(message, priority)
+
+    def _flush_clients(self, dt):
+        del dt
+
+        for client in self.bcp_clients:
+            client.flush()
+
     def get_bcp_messages(self, dt):
         """Retrieves and processes new BCP messages from the receiving queue.
 
@@ -635,16 +1028,21 @@ class BCP(object):
     def bcp_receive_dmd_frame(self, rawbytes, **kwargs):
         """Called when the BCP client receives a new DMD frame from the remote
         BCP host. This method forwards the frame to the physical DMD.
+
+        The frame is passed as a memoryview of the buffer it was received
+        into. The platform owns it and does not need to copy it.
         """
         del kwargs
-        self.physical_dmd_update_callback(rawbytes)
+        self.physical_dmd_update_callback(memoryview(rawbytes))
 
     def bcp_receive_rgb_dmd_frame(self, rawbytes, **kwargs):
         """Called when the BCP client receives a new RGB DMD frame from the
         remote BCP host. This method forwards the frame to the physical DMD.
+
+        The frame is passed as a memoryview like in bcp_receive_dmd_frame.
         """
         del kwargs
-        self.physical_rgb_dmd_update_callback(rawbytes)
+        self.physical_rgb_dmd_update_callback(memoryview(rawbytes))
 
     def bcp_receive_register_trigger(self, event, rawbytes, **kwargs):
         del rawbytes
@@ -849,6 +1247,146 @@ class BCP(object):
             name, **kwargs)
 
 
+class BcpReceiveBuffer(object):
+    """Splits a stream of bytes into BCP messages.
+
+    Data is read into a growable bytearray with a read and a write cursor,
+    so every byte is only copied once when it is received and once when a
+    message is taken out. Consumed data is only moved to the front of the
+    buffer when at least half of the buffer is consumed, which keeps reading
+    linear.
+
+    The payload of a &bytes= message (e.g. a DMD frame) gets its own
+    bytearray which is allocated as soon as the header was parsed. The rest
+    of the payload is read from the socket directly into it, so large
+    payloads are not copied at all and are handed on as they are.
+
+    Args:
+        size: Initial size of the buffer in bytes.
+        min_read: Minimum free space in bytes for every read.
+
+    """
+
+    def __init__(self, size=65536, min_read=8192):
+        self.buffer = bytearray(size)
+        self.min_read = min_read
+        self._start = 0
+        self._end = 0
+        self._search_start = 0
+        self._message = None
+        self._payload = None
+        self._payload_received = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _reserve(self, num_bytes):
+        # makes sure there are num_bytes of free space after the write cursor
+        if len(self.buffer) - self._end >= num_bytes:
+            return
+
+        # only move data to the front if at least as many bytes were consumed
+        # or if this avoids growing the buffer
+        used = self._end - self._start
+        if self._start and (self._start >= used or
+                            len(self.buffer) - used >= num_bytes):
+            self.buffer[:used] = self.buffer[self._start:self._end]
+            self._search_start -= self._start
+            self._start = 0
+            self._end = used
+
+        if len(self.buffer) - self._end < num_bytes:
+            self.buffer.extend(bytes(max(len(self.buffer),
+                                         self._end + num_bytes -
+                                         len(self.buffer))))
+
+    def recv_into(self, sock):
+        """Reads from a socket into the buffer or into the pending payload.
+
+        Returns:
+            The number of bytes read. 0 if the socket was closed.
+        """
+        if self._payload is not None and not len(self):
+            with memoryview(self._payload) as view:
+                num_bytes = sock.recv_into(view[self._payload_received:])
+
+            self._payload_received += num_bytes
+            return num_bytes
+
+        self._reserve(self.min_read)
+
+        with memoryview(self.buffer) as view:
+            num_bytes = sock.recv_into(view[self._end:])
+
+        self._end += num_bytes
+        return num_bytes
+
+    def feed(self, data):
+        """Adds data to the buffer."""
+        self._reserve(len(data))
+        self.buffer[self._end:self._end + len(data)] = data
+        self._end += len(data)
+
+    def _fill_payload(self):
+        # moves the bytes which were read together with the header from the
+        # buffer into the payload
+        num_bytes = min(len(self), len(self._payload) - self._payload_received)
+        end = self._start + num_bytes
+
+        with memoryview(self.buffer) as view:
+            self._payload[self._payload_received:
+                          self._payload_received + num_bytes] = \
+                view[self._start:end]
+
+        self._payload_received += num_bytes
+        self._start = self._search_start = end
+
+    def get_messages(self):
+        """Returns a list of all complete messages in the buffer.
+
+        Every entry is a tuple of the message (bytes without the trailing
+        newline and without the &bytes= parameter) and its payload (a
+        bytearray which is owned by the receiver or None if the message has
+        no payload).
+        """
+        messages = list()
+
+        while True:
+            if self._payload is not None:
+                if len(self):
+                    self._fill_payload()
+
+                if self._payload_received < len(self._payload):
+                    break
+
+                messages.append((self._message, self._payload))
+                self._message = self._payload = None
+                continue
+
+            newline = self.buffer.find(b'\n', self._search_start, self._end)
+            if newline < 0:
+                # do not search the same bytes again on the next read
+                self._search_start = self._end
+                break
+
+            with memoryview(self.buffer) as view:
+                message = bytes(view[self._start:newline])
+
+            self._start = self._search_start = newline + 1
+
+            if message[:1] != b'[' and b'&bytes=' in message:
+                self._message, bytes_needed = message.split(b'&bytes=')
+                self._payload = bytearray(int(bytes_needed))
+                self._payload_received = 0
+            else:
+                messages.append((message, None))
+
+        if self._start == self._end:
+            self._start = self._end = self._search_start = 0
+
+        return messages
+
+
 class BCPClientSocket(object):
     """Parent class for a BCP client socket. (There can be multiple of these to
     connect to multiple BCP media controllers simultaneously.)
@@ -874,7 +1412,20 @@ class BCPClientSocket(object):
         self.config = self.machine.config_validator.validate_config(
             'bcp:connections', config, 'bcp:connections')
 
+        self.encoding = 'bcp'
+        """Name of the encoding used to send messages to this host. Changed
+        when the host picks one of the offered encodings in its hello."""
+
+        self.subscriptions = None
+        """Dict of topic to dict of name to the minimum interval in seconds
+        between updates (0 for no limit). None if the host never subscribed
+        to anything, which means it gets everything in the bcp config."""
+
+        self.rate_limits = dict()
+
         self.sending_queue = Queue()
+        self._send_buffer = list()
+        self._send_buffer_size = 0
         self.receive_thread = None
         self.sending_thread = None
         self.socket = None
@@ -884,6 +1435,9 @@ class BCPClientSocket(object):
         self.bcp_client_socket_commands = {'hello': self.receive_hello,
                                            'goodbye': self.receive_goodbye}
 
+        # commands which are processed by BCP but need to know the client
+        self.per_client_commands = ('subscribe', 'unsubscribe')
+
         self.setup_client_socket()
 
     def setup_client_socket(self):
@@ -901,6 +1455,10 @@ class BCPClientSocket(object):
                     socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
                 # self.socket.settimeout(0.5)
                 self.socket.connect((self.config['host'], self.config['port']))
+                # messages are batched per frame so there is no need to
+                # delay small writes
+                self.socket.setsockopt(
+                    socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
                 self.log.debug("Connected to remote BCP host %s:%s",
                                self.config['host'], self.config['port'])
 
@@ -952,68 +1510,57 @@ class BCPClientSocket(object):
             BCP.active_connections -= 1
             self.socket = None  # Socket threads will exit on this
 
-    def send(self, message):
+    def send(self, message, priority=False):
         """Sends a message to the BCP host.
 
+        The message is buffered until flush() is called at the end of the
+        frame or until the buffer exceeds send_buffer_size.
+
         Args:
             message: String of the message to send.
+            priority: If True, the buffer is flushed right away.
 
         """
 
         if not self.socket and self.attempt_socket_connection:
             self.setup_client_socket()
 
-        self.sending_queue.put(message)
-
-    # Disable warning. This needs refactoring anyway when we get rid of the thread
-    # pylint: disable-msg=too-many-nested-blocks
-    def receive_loop(self):
-        socket_bytes = b''
-
-        try:
-            while self.socket and not self.machine.thread_stopper.is_set():
-                try:
-                    socket_bytes += self.get_from_socket()
-                except TypeError:
-                    pass
-
-                # All this code exists to build complete messages since what we
-                # get from the socket could be partial messages and/or could
-                # include multiple messages.
-
-                if socket_bytes:
-                    message, nl, leftovers = socket_bytes.partition(b'\n')
+        self._send_buffer.append(message)
+        self._send_buffer_size += len(message) + 1
 
-                    if not nl:  # \n not found, so we go back for more
-                        continue
+        if priority or self._send_buffer_size >= self.config[
+                'send_buffer_size']:
+            self.flush()
 
-                    if b'&bytes=' in message:
-                        message, bytes_needed = message.split(b'&bytes=')
-                        bytes_needed = int(bytes_needed)
+    def flush(self):
+        """Hands all buffered messages to the sending thread as one write."""
+        if not self._send_buffer:
+            return
 
-                        rawbytes = leftovers
-                        next_message = b''
+        # messages appended by another thread while we swap the buffer end
+        # up in one of both lists and are sent either way
+        messages = self._send_buffer
+        self._send_buffer = list()
+        self._send_buffer_size = 0
 
-                        if len(rawbytes) >= bytes_needed:
-                            rawbytes, next_message = (
-                                rawbytes[0:bytes_needed],
-                                rawbytes[bytes_needed:])
+        self.sending_queue.put(
+            ('\n'.join(messages) + '\n').encode('utf-8'))
 
-                        else:
-                            while len(rawbytes) < bytes_needed:
-                                rawbytes += self.get_from_socket()
+    def receive_loop(self):
+        """Receive loop which reads data from the remote socket and processes
+        all complete messages after every read.
 
-                                if len(rawbytes) >= bytes_needed:
-                                    rawbytes, next_message = (
-                                        rawbytes[0:bytes_needed],
-                                        rawbytes[bytes_needed:])
+        This method is run as a thread.
+        """
+        receive_buffer = BcpReceiveBuffer()
 
-                        self._process_command(message, rawbytes)
-                        socket_bytes = next_message
+        try:
+            while self.socket and not self.machine.thread_stopper.is_set():
+                if not self.read_from_socket(receive_buffer):
+                    continue
 
-                    else:  # no bytes in the message
-                        socket_bytes = leftovers
-                        self._process_command(message)
+                for message, rawbytes in receive_buffer.get_messages():
+                    self._process_command(message, rawbytes)
 
         # pylint: disable-msg=broad-except
         except Exception:
@@ -1027,38 +1574,47 @@ class BCPClientSocket(object):
     def _process_command(self, message, rawbytes=None):
         self.log.debug('Received "%s"', message)
 
-        cmd, kwargs = decode_command_string(message.decode())
+        cmd, kwargs = decode_message(message)
 
         if cmd in self.bcp_client_socket_commands:
             self.bcp_client_socket_commands[cmd](**kwargs)
         else:
+            if cmd in self.per_client_commands:
+                kwargs['bcp_client'] = self
+
             self.receive_queue.put((cmd, kwargs, rawbytes))
 
-    def get_from_socket(self, num_bytes=8192):
-        """Reads whatever data is sitting in the receiving socket, converts it
-        to a string via UTF-8 decoding, and returns it.
+    def read_from_socket(self, receive_buffer):
+        """Reads whatever data is sitting in the receiving socket into
+        receive_buffer.
 
         Args:
-            num_bytes: Int of the max number of bytes to read.
+            receive_buffer: The BcpReceiveBuffer to read into.
 
         Returns:
-            The data in raw string format.
+            The number of bytes read. 0 if there was no data within one second
+            or if the socket was closed.
 
         """
         try:
             ready = select.select([self.socket], [], [], 1)
-            if ready[0]:
-                b = self.socket.recv(num_bytes)
-                if b:
-                    return b
-                else:
-                    self.receive_goodbye()
-            else:
-                return b''
+            if not ready[0]:
+                return 0
+
+            num_bytes = receive_buffer.recv_into(self.socket)
+            if not num_bytes:
+                self.receive_goodbye()
+
+            return num_bytes
+
+        except (TypeError, AttributeError, ValueError):
+            # the socket was closed by stop()
+            return 0
+
         except socket.error:
             self.log.info("Media Controller disconnected. Shutting down...")
             self.receive_goodbye()
-            return b''
+            return 0
 
     def sending_loop(self):
         """Sending loop which transmits data from the sending queue to the
@@ -1068,11 +1624,11 @@ class BCPClientSocket(object):
         """
         try:
             while self.socket and not self.machine.thread_stopper.is_set():
-                message = self.sending_queue.get()
+                data = self.sending_queue.get()
 
                 try:
-                    self.log.debug('Sending "%s"', message)
-                    self.socket.sendall((message + '\n').encode('utf-8'))
+                    self.log.debug('Sending "%s"', data)
+                    self.socket.sendall(data)
 
                 except (IOError, AttributeError):
                     self.receive_goodbye()
@@ -1085,10 +1641,19 @@ class BCPClientSocket(object):
             self.machine.crash_queue.put(msg)
             self.receive_goodbye()
 
-    def receive_hello(self, **kwargs):
-        """Processes incoming BCP 'hello' command."""
+    def receive_hello(self, encoding='bcp', **kwargs):
+        """Processes incoming BCP 'hello' command.
+
+        If the host picked one of the encodings which we offered in our
+        hello, all further messages are sent in that encoding. Hosts which
+        do not know about encodings keep getting URL encoded messages.
+        """
         self.log.debug('Received BCP Hello from host with kwargs: %s', kwargs)
 
+        if encoding in self.config['encodings'] and encoding in ENCODERS:
+            self.log.debug('Using %s encoding', encoding)
+            self.encoding = encoding
+
     def receive_goodbye(self):
         """Processes incoming BCP 'goodbye' command."""
         self._send_goodbye = False
@@ -1100,11 +1665,15 @@ class BCPClientSocket(object):
 
     def send_hello(self):
         """Sends BCP 'hello' command."""
-        self.send(encode_command_string('hello',
-                                        version=__bcp_version__,
-                                        controller_name='Mission Pinball Framework',
-                                        controller_version=__version__))
+        kwargs = dict(version=__bcp_version__,
+                      controller_name='Mission Pinball Framework',
+                      controller_version=__version__)
+
+        if self.config['encodings']:
+            kwargs['encodings'] = ','.join(self.config['encodings'])
+
+        self.send(encode_command_string('hello', **kwargs))
 
     def send_goodbye(self):
         """Sends BCP 'goodbye' command."""
-        self.send('goodbye')
+        self.send('goodbye', priority=True)
@@ -0,0 +1,280 @@
+"""Contains the BcpServer which lets BCP hosts connect to MPF."""
+import asyncio
+import logging
+import threading
+from queue import Queue
+
+from mpf.core.bcp import BcpReceiveBuffer, ENCODERS, decode_message, \
+    encode_command_string
+from mpf.core.utility_functions import Util
+from mpf._version import __version__, __bcp_version__
+
+
+class BcpServer(object):
+
+    """Accepts connections of any number of BCP hosts.
+
+    MPF usually connects to its media controller as a client
+    (BCPClientSocket), which blocks while it connects and needs two threads
+    per connection. The server runs a single asyncio event loop in one
+    thread for all its connections, so displays, dashboards or additional
+    media controllers can connect and disconnect at any time without
+    blocking the game loop.
+
+    Connected hosts are added to BCP.bcp_clients in the main thread, so they
+    get messages and can subscribe like every other client. Like the media
+    controller at boot, a new host first gets the machine variables and the
+    DMD start commands (see BCP.add_bcp_connection). Every host has
+    its own send buffer. A host which does not read fast enough to keep its
+    buffer below max_send_buffer is disconnected without affecting the
+    others.
+
+    Args:
+        machine: The main MachineController object.
+        bcp: The BCP object which owns this server.
+        config: Validated bcp:server config.
+
+    """
+
+    def __init__(self, machine, bcp, config):
+        """Initialise BCP server."""
+        self.machine = machine
+        self.bcp = bcp
+        self.config = config
+        self.log = logging.getLogger('BcpServer')
+
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.port = None
+        """Port the server listens on. Useful if port 0 was configured to
+        let the OS pick one."""
+
+        self.clients = set()
+        self._connection_changes = Queue()
+
+    def start(self):
+        """Starts listening and the thread which runs the event loop."""
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(self.loop.create_server(
+            lambda: BcpServerClient(self), self.config['ip'],
+            self.config['port']))
+        self.port = self.server.sockets[0].getsockname()[1]
+
+        self.thread = threading.Thread(target=self._run_loop,
+                                       name='BcpServer')
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.machine.clock.schedule_interval(self._update_clients, 0)
+        self.log.info("Listening for BCP hosts on %s:%s", self.config['ip'],
+                      self.port)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def stop(self, **kwargs):
+        """Disconnects all hosts and stops the server."""
+        del kwargs
+
+        if not self.thread:
+            return
+
+        self.machine.clock.unschedule(self._update_clients)
+        self.loop.call_soon_threadsafe(self._stop_loop)
+        self.thread.join(1)
+        self.thread = None
+
+        self._update_clients()
+
+        # hosts which were still connected when the loop stopped
+        for client in self.clients:
+            self.bcp.remove_bcp_connection(client)
+
+        self.clients.clear()
+
+    def _stop_loop(self):
+        # runs in the event loop
+        self.server.close()
+
+        for client in self.clients:
+            # hosts which were stopped by BCP already got their goodbye
+            if not client.stopped:
+                client.transport.write(b'goodbye\n')
+            client.transport.close()
+
+        # after the connections were closed
+        self.loop.call_soon(self.loop.stop)
+
+    def client_connected(self, client):
+        """Called in the event loop when a host connected."""
+        self.clients.add(client)
+        self._connection_changes.put((True, client))
+
+    def client_disconnected(self, client):
+        """Called in the event loop when a host disconnected."""
+        self.clients.discard(client)
+        self._connection_changes.put((False, client))
+
+    def _update_clients(self, dt=None):
+        # adds and removes hosts in the main thread
+        del dt
+
+        while not self._connection_changes.empty():
+            connected, client = self._connection_changes.get(False)
+
+            if connected:
+                self.log.info("BCP host %s connected", client.name)
+                self.bcp.add_bcp_connection(client)
+            else:
+                self.log.info("BCP host %s disconnected", client.name)
+                self.bcp.remove_bcp_connection(client)
+
+
+class BcpServerClient(asyncio.Protocol):
+
+    """A BCP host which connected to the BcpServer.
+
+    Incoming messages are processed in the event loop and put on the receive
+    queue of BCP. All other methods are called from the main thread and hand
+    their data to the event loop.
+
+    Args:
+        server: The BcpServer which accepted the connection.
+
+    """
+
+    def __init__(self, server):
+        """Initialise BCP server client."""
+        self.server = server
+        self.log = server.log
+        self.name = None
+        self.transport = None
+
+        self.encoding = 'bcp'
+        self.subscriptions = None
+        self.rate_limits = dict()
+
+        self.per_client_commands = ('subscribe', 'unsubscribe')
+
+        self._receive_buffer = BcpReceiveBuffer()
+        self._send_buffer = list()
+        self._send_buffer_size = 0
+        self._closed = False
+
+        self.stopped = False
+        """True once stop() was called."""
+
+    def connection_made(self, transport):
+        """Called in the event loop when the connection is established."""
+        self.transport = transport
+        self.name = '{}:{}'.format(*transport.get_extra_info('peername')[:2])
+        self.server.client_connected(self)
+
+    def connection_lost(self, exc):
+        """Called in the event loop when the connection is closed."""
+        self._closed = True
+        self.server.client_disconnected(self)
+
+    def data_received(self, data):
+        """Called in the event loop with data from the host."""
+        self._receive_buffer.feed(data)
+
+        try:
+            for message, rawbytes in self._receive_buffer.get_messages():
+                self._process_command(message, rawbytes)
+
+        # a broken host must not crash MPF
+        except (ValueError, TypeError, UnicodeDecodeError):
+            self.log.warning("Received invalid message from BCP host %s. "
+                             "Disconnecting", self.name)
+            self.transport.abort()
+
+    def _process_command(self, message, rawbytes=None):
+        self.log.debug('Received "%s" from %s', message, self.name)
+
+        cmd, kwargs = decode_message(message)
+
+        if cmd == 'hello':
+            self._receive_hello(**kwargs)
+        elif cmd == 'goodbye':
+            self.transport.close()
+        else:
+            if cmd in self.per_client_commands:
+                kwargs['bcp_client'] = self
+
+            self.server.bcp.receive_queue.put((cmd, kwargs, rawbytes))
+
+    def _receive_hello(self, encodings=None, **kwargs):
+        # answers with our hello and picks the first offered encoding we know
+        self.log.debug('Received BCP Hello from host %s with kwargs: %s',
+                       self.name, kwargs)
+
+        reply = dict(version=__bcp_version__,
+                     controller_name='Mission Pinball Framework',
+                     controller_version=__version__)
+
+        for encoding in Util.string_to_list(encodings):
+            if (encoding in self.server.config['encodings'] and
+                    encoding in ENCODERS):
+                reply['encoding'] = encoding
+                break
+
+        self.transport.write(
+            (encode_command_string('hello', **reply) + '\n').encode('utf-8'))
+        self.encoding = reply.get('encoding', 'bcp')
+
+    def send(self, message, priority=False):
+        """Sends a message to the host.
+
+        The message is buffered until flush() is called at the end of the
+        frame or until the buffer exceeds send_buffer_size.
+
+        Args:
+            message: String of the message to send.
+            priority: If True, the buffer is flushed right away.
+
+        """
+        self._send_buffer.append(message)
+        self._send_buffer_size += len(message) + 1
+
+        if priority or self._send_buffer_size >= self.server.config[
+                'send_buffer_size']:
+            self.flush()
+
+    def flush(self):
+        """Hands all buffered messages to the event loop as one write."""
+        if not self._send_buffer or self._closed or not self.server.thread:
+            return
+
+        data = ('\n'.join(self._send_buffer) + '\n').encode('utf-8')
+        self._send_buffer = list()
+        self._send_buffer_size = 0
+
+        self.server.loop.call_soon_threadsafe(self._write, data)
+
+    def _write(self, data):
+        # runs in the event loop. the transport buffers everything the host
+        # did not read yet
+        if self._closed:
+            return
+
+        if (self.transport.get_write_buffer_size() + len(data) >
+                self.server.config['max_send_buffer']):
+            self.log.warning("BCP host %s does not read fast enough. "
+                             "Disconnecting", self.name)
+            self._closed = True
+            self.transport.abort()
+            return
+
+        self.transport.write(data)
+
+    def stop(self):
+        """Says goodbye to the host and closes the connection."""
+        self.stopped = True
+        self.send('goodbye', priority=True)
+
+        if not self._closed and self.server.thread:
+            self.server.loop.call_soon_threadsafe(self.transport.close)
@@ -0,0 +1,185 @@
+"""Contains the ConfigBundle class."""
+import os
+import pickle
+
+from mpf.core.config_cache import ConfigCache
+
+
+class ConfigBundle(ConfigCache):
+
+    """Prebuilt config bundle for production machines.
+
+    A bundle is built once on the build machine with "mpf bundle". It holds
+    the merged machine config, the parsed config spec, all parsed machine and
+    mode config files, all parsed shows and the contents of the asset and
+    mode folders. A machine which is started with a bundle (-B) reads this
+    single file instead of parsing YAML files and walking folders.
+
+    Unlike the ConfigCache, a bundle is a read-only artifact. Files are not
+    checked for changes (so a bundle has to be rebuilt when the config
+    changes) and paths are stored relative to the machine and the MPF folder,
+    so a bundle can be copied to another machine. A bundle which was built by
+    a different version of MPF or for a different config version is refused.
+
+    Args:
+        file_name: Path of the bundle file.
+        machine_path: Machine folder the bundle is built for.
+        mpf_path: MPF package folder.
+        build: If True, an empty bundle is created which records everything
+            which is loaded during boot. Otherwise, the bundle file is
+            loaded and ValueError is raised if it cannot be used.
+    """
+
+    bundle_format = 1
+
+    def __init__(self, file_name, machine_path, mpf_path, build=False):
+        """Initialise config bundle."""
+        self.machine_path = os.path.abspath(machine_path)
+        self.mpf_path = os.path.abspath(mpf_path)
+        self.build = build
+
+        self.machine_config = None
+        """Pickled merged machine config before validation."""
+
+        self.config_spec = None
+        """Parsed config spec of the ConfigValidator."""
+
+        self.folders = dict()
+        """Dict of (method, relative folder path) -> result of walk() or
+        list_folders() with paths relative to the folder."""
+
+        super().__init__(file_name, load=not build)
+
+    def _get_version(self):
+        return super()._get_version() + (self.bundle_format, )
+
+    def _get_key(self, path):
+        # paths are stored relative to the machine or the mpf folder
+        path = os.path.abspath(path)
+
+        for name, root in (('machine', self.machine_path),
+                           ('mpf', self.mpf_path)):
+            if path == root or path.startswith(root + os.sep):
+                return name, os.path.relpath(path, root).replace(os.sep, '/')
+
+        return None, path
+
+    def _load(self):
+        try:
+            with open(self.file_name, 'rb') as f:
+                data = pickle.load(f)
+
+        except FileNotFoundError:
+            raise ValueError("Config bundle {} does not exist".format(
+                self.file_name))
+
+        # pylint: disable-msg=broad-except
+        except Exception as e:
+            raise ValueError("Could not load config bundle {}: {}".format(
+                self.file_name, e))
+
+        if not isinstance(data, dict) or not data.get('bundle'):
+            raise ValueError("{} is not a config bundle".format(
+                self.file_name))
+
+        if data.get('version') != self._get_version():
+            raise ValueError(
+                "Config bundle {} was built for MPF version, config version, "
+                "show version and bundle format {} but this MPF needs {}. "
+                "Rebuild the bundle with 'mpf bundle'.".format(
+                    self.file_name, data.get('version'), self._get_version()))
+
+        self.entries = data['entries']
+        self.machine_config = data['machine_config']
+        self.config_spec = data['config_spec']
+        self.folders = data['folders']
+        self.log.info("Loaded config bundle %s with %s entries",
+                      self.file_name, len(self.entries))
+
+    def save(self):
+        """Write the bundle to disk. Does nothing if it was loaded."""
+        if not self.build:
+            return
+
+        data = dict(bundle=True,
+                    version=self._get_version(),
+                    entries=dict(self.entries),
+                    machine_config=self.machine_config,
+                    config_spec=self.config_spec,
+                    folders=dict(self.folders))
+
+        bundle_dir = os.path.dirname(self.file_name)
+        if bundle_dir:
+            os.makedirs(bundle_dir, exist_ok=True)
+
+        temp_file = self.file_name + '.tmp'
+        with open(temp_file, 'wb') as f:
+            pickle.dump(data, f, protocol=4)
+
+        os.replace(temp_file, self.file_name)
+        self.log.info('Config bundle saved: %s (%s entries)', self.file_name,
+                      len(self.entries))
+
+    def get(self, path, section='config'):
+        """Return the data for a file from the bundle or None."""
+        data = self.entries.get((section, self._get_key(path)))
+
+        if data is None:
+            if not self.build:
+                self.log.warning("%s (%s) is not in the config bundle. "
+                                 "Loading it from disk.", path, section)
+            return None
+
+        return pickle.loads(data)
+
+    def has_entry(self, path, section='config'):
+        """Return True if the bundle has data for a file."""
+        return (section, self._get_key(path)) in self.entries
+
+    def put(self, path, data, section='config'):
+        """Add data for a file.
+
+        Only bundles which are built are saved. Loaded bundles keep the data
+        in memory for the rest of the run.
+        """
+        self.entries[(section, self._get_key(path))] = pickle.dumps(
+            data, protocol=4)
+        self.dirty = True
+
+    def set_machine_config(self, config):
+        """Store the merged machine config before it is validated."""
+        self.machine_config = pickle.dumps(config, protocol=4)
+
+    def get_machine_config(self):
+        """Return a copy of the merged machine config."""
+        return pickle.loads(self.machine_config)
+
+    def _get_folder(self, method, path, record_method):
+        key = (method, self._get_key(path))
+
+        if key not in self.folders:
+            if not self.build:
+                self.log.warning("Folder %s is not in the config bundle",
+                                 path)
+            self.folders[key] = record_method(path)
+
+        return self.folders[key]
+
+    def walk(self, path):
+        """Return the folders and files below a path from the bundle.
+
+        Folders which are not in the bundle are walked on disk (and recorded
+        when the bundle is built).
+        """
+        def record_walk(path):
+            return [(os.path.relpath(folder, path), dirs, files) for
+                    folder, dirs, files in ConfigCache.walk(path)]
+
+        return [(os.path.normpath(os.path.join(path, folder)), list(dirs),
+                 list(files)) for folder, dirs, files in
+                self._get_folder('walk', path, record_walk)]
+
+    def list_folders(self, path):
+        """Return the names of all folders in a path from the bundle."""
+        return list(self._get_folder('list_folders', path,
+                                     ConfigCache.list_folders))
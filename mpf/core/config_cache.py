@@ -0,0 +1,243 @@
+"""Contains the ConfigCache class."""
+import hashlib
+import importlib.util
+import logging
+import os
+import pickle
+import threading
+
+from mpf.core.utility_functions import Util
+from mpf._version import __version__, __config_version__, __show_version__
+
+
+class ConfigCache(object):
+
+    """Disk cache for parsed config and show files.
+
+    The cache keeps a manifest with the size, mtime and content hash of every
+    file it holds entries for. An entry is used as long as its file did not
+    change. If only the size or mtime of a file differs, its content hash is
+    compared before the entries are discarded. Entries are invalidated per
+    file, so a changed mode config or show does not force all other files to
+    be parsed again, and no folders need to be walked at boot.
+
+    Entries are stored per section (e.g. 'config' for parsed config files or
+    'shows' for parsed show files) and are pickled, so every get() returns a
+    fresh copy which the caller is free to modify.
+
+    Args:
+        file_name: Path of the cache file.
+        load: If False, an existing cache file is ignored (but still
+            overwritten when the cache is saved).
+    """
+
+    def __init__(self, file_name, load=True):
+        """Initialise config cache."""
+        self.log = logging.getLogger('ConfigCache')
+        self.file_name = file_name
+
+        self.manifest = dict()
+        """Dict of path -> (size, mtime, hash) of all files with entries."""
+
+        self.entries = dict()
+        """Dict of (section, path) -> pickled data."""
+
+        self.dirty = False
+        self._lock = threading.Lock()
+
+        if load:
+            self._load()
+
+    @staticmethod
+    def _get_version():
+        return __version__, __config_version__, __show_version__
+
+    def _load(self):
+        try:
+            with open(self.file_name, 'rb') as f:
+                data = pickle.load(f)
+
+        except FileNotFoundError:
+            return
+
+        # unfortunately pickle can raise all kinds of exceptions and we dont want to crash on corrupted cache
+        # pylint: disable-msg=broad-except
+        except Exception:
+            self.log.warning("Could not load config cache %s", self.file_name)
+            return
+
+        if data.get('version') != self._get_version():
+            self.log.info("Config cache %s was created by a different version "
+                          "of MPF. Ignoring it.", self.file_name)
+            return
+
+        self.manifest = data['manifest']
+        self.entries = data['entries']
+        self.log.info("Loaded config cache %s with %s entries", self.file_name,
+                      len(self.entries))
+
+    def save(self):
+        """Write the cache to disk if it has changed."""
+        with self._lock:
+            if not self.dirty:
+                return
+
+            data = dict(version=self._get_version(),
+                        manifest=dict(self.manifest),
+                        entries=dict(self.entries))
+            self.dirty = False
+
+        cache_dir = os.path.dirname(self.file_name)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # write to a temp file first so a crash never leaves a partial cache
+        temp_file = self.file_name + '.tmp'
+        with open(temp_file, 'wb') as f:
+            pickle.dump(data, f, protocol=4)
+
+        os.replace(temp_file, self.file_name)
+        self.log.info('Config cache saved: %s', self.file_name)
+
+    @staticmethod
+    def _hash_file(path):
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def _invalidate(self, path):
+        # removes the manifest entry and all entries of all sections of a file
+        if self.manifest.pop(path, None):
+            self.log.debug("File %s changed. Invalidating cache entries", path)
+
+        for key in [x for x in self.entries if x[1] == path]:
+            del self.entries[key]
+
+        self.dirty = True
+
+    def _is_unchanged(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._invalidate(path)
+            return False
+
+        try:
+            size, mtime, file_hash = self.manifest[path]
+        except KeyError:
+            return False
+
+        if stat.st_size == size and stat.st_mtime == mtime:
+            return True
+
+        if stat.st_size != size or self._hash_file(path) != file_hash:
+            self._invalidate(path)
+            return False
+
+        # only touched. keep entries but remember the new mtime
+        self.manifest[path] = (size, stat.st_mtime, file_hash)
+        self.dirty = True
+        return True
+
+    def get(self, path, section='config'):
+        """Return the cached data for a file.
+
+        Args:
+            path: Path of the file.
+            section: Kind of data which has been cached for this file.
+
+        Returns:
+            A copy of the cached data or None if there is no entry or the file
+            has changed since the entry was created.
+        """
+        path = os.path.abspath(path)
+
+        with self._lock:
+            data = self.entries.get((section, path))
+            if data is None or not self._is_unchanged(path):
+                return None
+
+        return pickle.loads(data)
+
+    def has_entry(self, path, section='config'):
+        """Return True if there is a valid entry for a file."""
+        path = os.path.abspath(path)
+
+        with self._lock:
+            return ((section, path) in self.entries and
+                    self._is_unchanged(path))
+
+    def put(self, path, data, section='config'):
+        """Add or replace the entry for a file.
+
+        Args:
+            path: Path of the file the data has been created from.
+            data: Picklable data.
+            section: Kind of data which is cached for this file.
+        """
+        path = os.path.abspath(path)
+        pickled_data = pickle.dumps(data, protocol=4)
+
+        with self._lock:
+            if path not in self.manifest:
+                stat = os.stat(path)
+                self.manifest[path] = (stat.st_size, stat.st_mtime,
+                                       self._hash_file(path))
+
+            self.entries[(section, path)] = pickled_data
+            self.dirty = True
+
+    @staticmethod
+    def walk(path):
+        """Return the folders and files below a path.
+
+        Same as list(os.walk(path, followlinks=True)). Asset folders are
+        walked through this method, so a ConfigBundle can answer it without
+        touching the disk.
+        """
+        return list(os.walk(path, followlinks=True))
+
+    @staticmethod
+    def list_folders(path):
+        """Return the names of all folders in a path.
+
+        Returns an empty list if the path does not exist.
+        """
+        try:
+            return sorted(x for x in os.listdir(path)
+                          if os.path.isdir(os.path.join(path, x)))
+        except FileNotFoundError:
+            return list()
+
+    def get_class_info(self, class_string, info_method):
+        """Return information about a class without importing it if possible.
+
+        The class is imported and info_method is called with it only if
+        there is no cached result for this class and info_method or if the
+        file of the module of the class has changed since. The result is
+        cached for the module file, so the import can be skipped on the next
+        boot.
+
+        Args:
+            class_string: Full class path, e.g. 'mpf.devices.switch.Switch'.
+            info_method: Module-level function which is called with the class
+                and returns picklable data.
+        """
+        module_name, class_name = class_string.rsplit('.', 1)
+        section = 'class_info:{}:{}'.format(class_name,
+                                            info_method.__qualname__)
+
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except ImportError:
+            spec = None
+
+        if not spec or not spec.has_location:
+            return info_method(Util.string_to_class(class_string))
+
+        info = self.get(spec.origin, section)
+
+        if info is None:
+            info = info_method(Util.string_to_class(class_string))
+            self.put(spec.origin, info, section)
+
+        return info
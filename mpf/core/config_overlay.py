@@ -0,0 +1,142 @@
+"""Contains the ConfigOverlay class."""
+from collections.abc import Mapping
+
+
+class ConfigOverlay(Mapping):
+
+    """Layered read-only view of several config dicts.
+
+    Works like a ChainMap which merges the same way as Util.dict_merge():
+    Layers are stacked from bottom to top. A key in a higher layer overrides
+    the same key in the layers below, except when both values are dicts
+    (which are merged recursively) or both values are lists and
+    combine_lists is set (which are combined). Like in dict_merge(),
+    combine_lists only applies to the top level and lists in nested dicts
+    are always combined.
+
+    Adding a layer is O(1) and nothing is copied when layers are added or
+    looked up, so a config can be built from many files without copying the
+    already merged part again for every file. Lookups of dict values return
+    another ConfigOverlay. Call flatten() once to get a plain and
+    independent dict.
+
+    The layers are neither copied nor changed. They must not be changed as
+    long as the overlay is used.
+    """
+
+    def __init__(self, *layers, combine_lists=True):
+        """Initialise config overlay."""
+        self.layers = [layer for layer in layers if layer is not None]
+        """List of dicts from bottom to top."""
+
+        self.combine_lists = combine_lists
+
+    def add_layer(self, layer):
+        """Add a dict on top of all other layers."""
+        if layer is not None:
+            self.layers.append(layer)
+
+    def __getitem__(self, key):
+        values = [layer[key] for layer in self.layers if key in layer]
+
+        if not values:
+            raise KeyError(key)
+
+        return _merge_values(values, self.combine_lists, flatten=False)
+
+    def __contains__(self, key):
+        return any(key in layer for layer in self.layers)
+
+    def __iter__(self):
+        return iter(self._get_keys())
+
+    def __len__(self):
+        return len(self._get_keys())
+
+    def __repr__(self):
+        return '<ConfigOverlay {}>'.format(self.flatten())
+
+    def _get_keys(self):
+        # the bottom layer decides how keys are compared (e.g. a
+        # CaseInsensitiveDict) and keys are ordered by first appearance
+        keys = _empty_copy(self.layers[0]) if self.layers else dict()
+        for layer in self.layers:
+            for key in layer:
+                if key not in keys:
+                    keys[key] = None
+        return keys
+
+    def flatten(self):
+        """Return all layers merged into a new dict.
+
+        The result has the type of the bottom layer. All dicts and lists in
+        it are new objects, so it can be changed without changing any layer.
+        Other values are shared with the layers.
+        """
+        if not self.layers:
+            return dict()
+
+        return _flatten_dicts(self.layers, self.combine_lists)
+
+
+def _empty_copy(source):
+    # new empty dict of the same type (e.g. CaseInsensitiveDict)
+    return type(source)()
+
+
+def _flatten_dicts(layers, combine_lists):
+    values_by_key = _empty_copy(layers[0])
+
+    for layer in layers:
+        for key, value in layer.items():
+            if key in values_by_key:
+                values_by_key[key].append(value)
+            else:
+                values_by_key[key] = [value]
+
+    result = _empty_copy(layers[0])
+    for key, values in values_by_key.items():
+        result[key] = _merge_values(values, combine_lists)
+
+    return result
+
+
+def _merge_values(values, combine_lists, flatten=True):
+    # merges the values of one key from bottom to top. only the values
+    # after the last override are looked at and every container is copied
+    # exactly once
+    merged = [values[0]]
+
+    for value in values[1:]:
+        if isinstance(merged[0], dict) and isinstance(value, dict):
+            merged.append(value)
+        elif (isinstance(merged[0], list) and isinstance(value, list) and
+                combine_lists):
+            merged.append(value)
+        else:
+            merged = [value]
+
+    if isinstance(merged[0], dict):
+        # nested lists are always combined (same as in dict_merge)
+        if flatten:
+            return _flatten_dicts(merged, True)
+        return ConfigOverlay(*merged)
+
+    if isinstance(merged[0], list):
+        result = list()
+        for value in merged:
+            if flatten:
+                result.extend(_copy_value(x) for x in value)
+            else:
+                result.extend(value)
+        return result
+
+    return merged[0]
+
+
+def _copy_value(value):
+    if isinstance(value, dict):
+        return _flatten_dicts([value], True)
+    if isinstance(value, list):
+        return [_copy_value(x) for x in value]
+    return value
@@ -154,6 +154,13 @@ class ConfigPlayer(object):
     def _get_instance_dict(self, context):
         return self.instances[context][self.config_file_section]
 
+    def _init_instance_dict(self, context):
+        if context not in self.instances:
+            self.instances[context] = dict()
+
+        if self.config_file_section not in self.instances[context]:
+            self.instances[context][self.config_file_section] = dict()
+
     def _reset_instance_dict(self, context):
         self.instances[context][self.config_file_section] = dict()
 
@@ -259,11 +266,7 @@ class ConfigPlayer(object):
     def show_play_callback(self, settings, priority, show_tokens, context):
         """Callback if used in a show."""
         # called from a show step
-        if context not in self.instances:
-            self.instances[context] = dict()
-
-        if self.config_file_section not in self.instances[context]:
-            self.instances[context][self.config_file_section] = dict()
+        self._init_instance_dict(context)
 
         self.play(settings=settings, priority=priority,
                   show_tokens=show_tokens, context=context)
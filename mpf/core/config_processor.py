@@ -1,16 +1,40 @@
 """Contains the Config and CaseInsensitiveDict base classes"""
 
 import logging
+import multiprocessing
 import os
 
+from mpf.core.config_overlay import ConfigOverlay
 from mpf.core.file_manager import FileManager
 from mpf.core.utility_functions import Util
 from mpf.core.config_validator import ConfigValidator
 
 
+def _load_config_file(filename):
+    return FileManager.load(filename, True, True)
+
+
+def _load_file_in_worker(args):
+    # runs in a worker process. returns (data, None) or (None, error). files
+    # with errors are loaded again in the main process which then raises the
+    # usual error
+    load_method, filename = args
+    try:
+        return load_method(filename), None
+    except Exception as e:   # pylint: disable-msg=broad-except
+        return None, '{}: {}'.format(type(e).__name__, e)
+
+
 class ConfigProcessor(object):
     config_spec = None
 
+    PARALLEL_MIN_FILES = 50
+    """Files are only parsed in worker processes if at least this many are
+    not cached. Starting the pool takes about 0.4s since every worker
+    imports MPF. With two workers, that is paid back after about 65 small
+    show files (5 steps) or 8 large ones (50 steps), so test-sized configs
+    are parsed serially (see mpf.benchmarks.config_loading)."""
+
     def __init__(self, machine):
         self.machine = machine
         self.log = logging.getLogger('ConfigProcessor')
@@ -49,12 +73,93 @@ class ConfigProcessor(object):
         """
         self.machine_sections[section](config)
 
+    @staticmethod
+    def preload_files(filenames, config_cache, processes, section='config',
+                      load_method=_load_config_file, min_files=None):
+        """Parse files in a pool of worker processes and add them to the cache.
+
+        Files are only parsed here. They are still loaded (and validated) one
+        by one afterwards but will be taken from the config cache then. Files
+        which are already cached or which fail to load in a worker are
+        skipped and will be loaded by the main process later.
+
+        Args:
+            filenames: List of files to load.
+            config_cache: ConfigCache instance to store the results in.
+            processes: Number of worker processes. 0 will use one process per
+                CPU core. With 1 nothing is done here.
+            section: Section of the cache to store the results in.
+            load_method: Module-level function which is called with a file
+                name in the worker processes and returns its data.
+            min_files: Nothing is done if fewer files are not cached.
+                Defaults to PARALLEL_MIN_FILES.
+
+        Returns:
+            Number of files which were parsed in worker processes.
+        """
+        if not processes:
+            processes = os.cpu_count() or 1
+
+        if min_files is None:
+            min_files = ConfigProcessor.PARALLEL_MIN_FILES
+
+        # sorted to keep the order (and the resulting cache) deterministic
+        filenames = [x for x in sorted(set(filenames))
+                     if not config_cache.has_entry(x, section)]
+
+        processes = min(processes, len(filenames))
+        if processes < 2 or len(filenames) < min_files:
+            return 0
+
+        log = logging.getLogger('ConfigProcessor')
+        log.debug("Parsing %s files in %s processes", len(filenames),
+                  processes)
+
+        # forking is not safe since MPF already runs threads at this point
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+        else:
+            context = multiprocessing.get_context('spawn')
+
+        try:
+            with context.Pool(processes) as pool:
+                results = pool.map(
+                    _load_file_in_worker,
+                    [(load_method, filename) for filename in filenames],
+                    chunksize=max(1, len(filenames) // (processes * 4)))
+        except OSError:
+            log.warning("Could not start worker processes. Loading files "
+                        "serially.")
+            return 0
+
+        # results are in the order of filenames
+        num_parsed = 0
+        for filename, (data, error) in zip(filenames, results):
+            if error:
+                log.warning("Could not parse %s in a worker process (%s). "
+                            "Loading it again.", filename, error)
+            elif data:
+                config_cache.put(filename, data, section)
+                num_parsed += 1
+
+        return num_parsed
+
     @staticmethod
     def load_config_file(filename, config_type, verify_version=True,
-                         halt_on_error=True):
+                         halt_on_error=True, config_cache=None):
         # config_type is str 'machine' or 'mode', which specifies whether this
         # file being loaded is a machine config or a mode config file
-        config = FileManager.load(filename, verify_version, halt_on_error)
+        # config_cache is an optional ConfigCache which is used to skip
+        # parsing of files which did not change since the last run
+        config = None
+        if config_cache:
+            config = config_cache.get(filename)
+
+        if config is None:
+            config = FileManager.load(filename, verify_version, halt_on_error)
+
+            if config_cache and config:
+                config_cache.put(filename, config)
 
         if not ConfigValidator.config_spec:
             ConfigValidator.load_config_spec()
@@ -74,12 +179,14 @@ class ConfigProcessor(object):
         try:
             if 'config' in config:
                 path = os.path.split(filename)[0]
+                merged_config = ConfigOverlay(config)
 
                 for file in Util.string_to_list(config['config']):
                     full_file = os.path.join(path, file)
-                    config = Util.dict_merge(config,
-                                             ConfigProcessor.load_config_file(
-                                                 full_file, config_type))
+                    merged_config.add_layer(ConfigProcessor.load_config_file(
+                        full_file, config_type, config_cache=config_cache))
+
+                config = merged_config.flatten()
             return config
         except TypeError:
             return dict()
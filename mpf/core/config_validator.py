@@ -2,7 +2,6 @@
 # pylint: disable-msg=too-many-lines
 import logging
 import re
-from copy import deepcopy
 
 from mpf._version import __version__
 from mpf.core.rgb_color import named_rgb_colors, RGBColor
@@ -78,6 +77,7 @@ auditor:
     events: list|str|None
     player: list|str|None
     num_player_top_records: single|int|1
+    save_interval: single|secs|3s
 autofire_coils:
     __valid_in__: machine
     coil: single|machine(coils)|
@@ -182,6 +182,14 @@ bcp:
     connections:
         host: single|str|None
         port: single|int|5050
+        encodings: list|str|json
+        send_buffer_size: single|int|65536
+    server:
+        ip: single|str|127.0.0.1
+        port: single|int|5051
+        encodings: list|str|json
+        send_buffer_size: single|int|65536
+        max_send_buffer: single|int|1048576
 coils:
     __valid_in__: machine
     number: single|str|
@@ -343,6 +351,8 @@ fast:
     default_normal_debounce_open: single|ms|
     default_normal_debounce_close: single|ms|
     hardware_led_fade_time: single|ms|0
+    connection_timeout: single|secs|10s
+    reply_timeout: single|secs|1s
     debug: single|bool|False
 file_shows:
     __valid_in__: machine, mode                      # todo add to validator
@@ -558,6 +568,14 @@ mpf:
     switch_tag_event: single|str|sw_%
     allow_invalid_config_sections: single|bool|false
     save_machine_vars_to_disk: single|bool|true
+    machine_vars_save_interval: single|secs|1s
+    data_storage: single|enum(yaml,journal,sqlite)|yaml
+    data_journal_max_records: single|int|1000
+    audit_history_days: single|int|365
+    prerender_led_shows: single|bool|false
+    config_loader_processes: single|int|1
+    lazy_mode_loading: single|bool|false
+    prewarm_modes_in_attract: single|bool|false
     hz: single|float|30.0
 mpf-mc:
     __valid_in__: machine                           # todo add to validator
@@ -1163,6 +1181,15 @@ window:
 class ConfigValidator(object):
     config_spec = None
 
+    _compiled_specs = dict()
+    """Cache of compiled specs per (config_spec, base_spec) pair."""
+
+    _parsed_item_specs = dict()
+    """Cache of parsed "type|validation|default" spec strings."""
+
+    _parsed_validators = dict()
+    """Cache of parsed validator strings like "int" or "enum(a,b)"."""
+
     def __init__(self, machine):
         self.machine = machine
         self.log = logging.getLogger('ConfigProcessor')
@@ -1199,6 +1226,13 @@ class ConfigValidator(object):
             config_spec = mpf_config_spec
 
         cls.config_spec = YamlInterface.process(config_spec)
+        cls._compiled_specs = dict()
+
+    @classmethod
+    def set_config_spec(cls, config_spec):
+        """Use an already parsed config spec (e.g. from a config bundle)."""
+        cls.config_spec = config_spec
+        cls._compiled_specs = dict()
 
     @classmethod
     def unload_config_spec(cls):
@@ -1208,11 +1242,8 @@ class ConfigValidator(object):
         # todo I had the idea that we could unload the config spec to save
         # memory, but doing so will take more thought about timing
 
-    def _build_spec(self, config_spec, base_spec):
-        if not self.config_spec:
-            self.load_config_spec()
-
-        # build up the actual config spec we're going to use
+    @staticmethod
+    def _get_spec_list(config_spec, base_spec):
         spec_list = [config_spec]
 
         if base_spec:
@@ -1221,19 +1252,52 @@ class ConfigValidator(object):
             else:
                 spec_list.append(base_spec)
 
-        this_spec = dict()
+        return spec_list
+
+    def _get_spec_sources(self, spec_list):
+        # returns the (uncopied) spec dicts for every element in spec_list
+        sources = list()
         for spec_element in spec_list:
             this_base_spec = self.config_spec
-            spec_element = spec_element.split(':')
-            for spec in spec_element:
-                # need to deepcopy so the orig base spec doesn't get polluted
-                # with this widget's spec
-                this_base_spec = deepcopy(this_base_spec[spec])
+            for spec in spec_element.split(':'):
+                this_base_spec = this_base_spec[spec]
+
+            sources.append(this_base_spec)
+
+        return sources
+
+    def _build_spec(self, config_spec, base_spec):
+        """Return the compiled spec for a config_spec and its base specs.
 
-            this_base_spec.update(this_spec)
-            this_spec = this_base_spec
+        Compiled specs are cached per (config_spec, base_spec) pair. A cached
+        entry is reused as long as the underlying spec dicts have not been
+        replaced. The returned spec is shared and must not be modified.
+        """
+        if not self.config_spec:
+            self.load_config_spec()
+
+        spec_list = self._get_spec_list(config_spec, base_spec)
+        cache_key = tuple(spec_list)
+        sources = self._get_spec_sources(spec_list)
+
+        try:
+            cached_sources, compiled_spec = self._compiled_specs[cache_key]
+        except KeyError:
+            pass
+        else:
+            if all(a is b for a, b in zip(cached_sources, sources)):
+                return compiled_spec
 
-        return this_spec
+        # later elements in the spec list are base specs, so earlier ones
+        # win for duplicate keys
+        this_spec = dict()
+        for source in reversed(sources):
+            this_spec.update(source)
+
+        compiled_spec = CompiledSpec(this_spec)
+        self._compiled_specs[cache_key] = (sources, compiled_spec)
+
+        return compiled_spec
 
     # pylint: disable-msg=too-many-arguments
     def validate_config(self, config_spec, source, section_name=None,
@@ -1252,50 +1316,55 @@ class ConfigValidator(object):
 
         this_spec = self._build_spec(config_spec, base_spec)
 
-        if '__allow_others__' not in this_spec:
-            self.check_for_invalid_sections(this_spec, source,
+        if not this_spec.allow_others:
+            self.check_for_invalid_sections(this_spec.spec, source,
                                             validation_failure_info)
 
         processed_config = source
 
-        for k in list(this_spec.keys()):
-            if this_spec[k] == 'ignore' or k[0] == '_':
-                continue
-
-            elif k in source:  # validate the entry that exists
+        for k, is_sub_spec, item_spec in this_spec.items:
+            if k in source:  # validate the entry that exists
 
-                if isinstance(this_spec[k], dict):
+                if is_sub_spec:
                     # This means we're looking for a list of dicts
 
                     final_list = list()
-                    if k in source:
-                        for i in source[k]:  # individual step
-                            final_list.append(self.validate_config(
-                                config_spec + ':' + k, source=i,
-                                section_name=k))
+                    for i in source[k]:  # individual step
+                        final_list.append(self.validate_config(
+                            config_spec + ':' + k, source=i,
+                            section_name=k))
 
                     processed_config[k] = final_list
 
                 else:
-                    processed_config[k] = self.validate_config_item(
-                        this_spec[k], item=source[k],
+                    processed_config[k] = self._validate_parsed_config_item(
+                        item_spec, item=source[k],
                         validation_failure_info=(validation_failure_info, k))
 
             elif add_missing_keys:  # create the default entry
 
-                if isinstance(this_spec[k], dict):
+                if is_sub_spec:
                     processed_config[k] = list()
 
                 else:
-                    processed_config[k] = self.validate_config_item(
-                        this_spec[k],
+                    processed_config[k] = self._validate_parsed_config_item(
+                        item_spec,
                         validation_failure_info=(
                             validation_failure_info, k))
 
         return processed_config
 
-    def validate_config_item(self, spec, validation_failure_info,
-                             item='item not in config!@#', ):
+    @classmethod
+    def parse_item_spec(cls, spec, validation_failure_info=None):
+        """Parse a "type|validation|default" spec string.
+
+        Returns a tuple (spec, item_type, validation, default). Results are
+        cached since the same spec strings are used over and over again.
+        """
+        try:
+            return cls._parsed_item_specs[spec]
+        except (KeyError, TypeError):
+            pass
 
         try:
             item_type, validation, default = spec.split('|')
@@ -1308,6 +1377,22 @@ class ConfigValidator(object):
         elif not default:
             default = 'default required!@#'
 
+        parsed = (spec, item_type, validation, default)
+        cls._parsed_item_specs[spec] = parsed
+        return parsed
+
+    def validate_config_item(self, spec, validation_failure_info,
+                             item='item not in config!@#', ):
+
+        return self._validate_parsed_config_item(
+            self.parse_item_spec(spec, validation_failure_info),
+            validation_failure_info, item)
+
+    def _validate_parsed_config_item(self, parsed_spec,
+                                     validation_failure_info,
+                                     item='item not in config!@#'):
+        spec, item_type, validation, default = parsed_spec
+
         if item == 'item not in config!@#':
             if default == 'default required!@#':
                 raise ValueError('Required setting missing from config file. '
@@ -1603,29 +1688,29 @@ class ConfigValidator(object):
         except AttributeError:
             pass
 
-        if ':' in validator:
-            validator = validator.split(':')
+        try:
+            validator_type, name, param = self._parsed_validators[validator]
+        except KeyError:
+            validator_type, name, param = self._parse_validator(validator)
+
+        if validator_type == 'dict':
             # item could be str, list, or list of dicts
             item = Util.event_config_to_dict(item)
 
             return_dict = dict()
 
             for k, v in item.items():
-                return_dict[self.validate_item(k, validator[0],
+                return_dict[self.validate_item(k, name,
                                                validation_failure_info)] = (
-                    self.validate_item(v, validator[1],
-                                       validation_failure_info)
+                    self.validate_item(v, param, validation_failure_info)
                 )
 
             return return_dict
 
-        elif '(' in validator and ')' in validator[-1:] == ')':
-            validator_parts = validator.split('(')
-            validator = validator_parts[0]
-            param = validator_parts[1][:-1]
-            return self.validator_list[validator](item, validation_failure_info=validation_failure_info, param=param)
-        elif validator in self.validator_list:
-            return self.validator_list[validator](item, validation_failure_info=validation_failure_info)
+        elif validator_type == 'param':
+            return self.validator_list[name](item, validation_failure_info=validation_failure_info, param=param)
+        elif name in self.validator_list:
+            return self.validator_list[name](item, validation_failure_info=validation_failure_info)
 
         else:
             raise AssertionError("Invalid Validator '{}' in config spec {}:{}".format(
@@ -1633,6 +1718,22 @@ class ConfigValidator(object):
                                  validation_failure_info[0][0],
                                  validation_failure_info[1]))
 
+    @classmethod
+    def _parse_validator(cls, validator):
+        # returns (type, name, param). For "key:value" validators name and
+        # param are the key and value validators.
+        if ':' in validator:
+            validator_parts = validator.split(':')
+            parsed = ('dict', validator_parts[0], validator_parts[1])
+        elif '(' in validator and validator[-1:] == ')':
+            validator_parts = validator.split('(')
+            parsed = ('param', validator_parts[0], validator_parts[1][:-1])
+        else:
+            parsed = ('simple', validator, None)
+
+        cls._parsed_validators[validator] = parsed
+        return parsed
+
     @classmethod
     def validation_error(cls, item, validation_failure_info, msg=""):
         raise AssertionError("Config validation error: Entry {}:{}:{}:{} is not valid. {}".format(
@@ -1640,3 +1741,35 @@ class ConfigValidator(object):
             validation_failure_info[0][1],
             validation_failure_info[1],
             item, msg))
+
+
+class CompiledSpec(object):
+
+    """A merged config spec with all item specs parsed.
+
+    Args:
+        spec: Dict of the merged spec of a config_spec and its base specs.
+
+    Attributes:
+        spec: The merged spec dict.
+        allow_others: True if the spec contains __allow_others__.
+        items: List of (key, is_sub_spec, parsed item spec) tuples for every
+            key which needs to be validated. is_sub_spec is True for keys
+            which contain a list of dicts with their own spec.
+    """
+
+    __slots__ = ["spec", "allow_others", "items"]
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.allow_others = '__allow_others__' in spec
+        self.items = list()
+
+        for k, v in spec.items():
+            if v == 'ignore' or k[0] == '_':
+                continue
+            elif isinstance(v, dict):
+                self.items.append((k, True, None))
+            else:
+                self.items.append((k, False, ConfigValidator.parse_item_spec(
+                    v, (k, v))))
@@ -0,0 +1,193 @@
+"""Contains the DataJournal class."""
+import hashlib
+import json
+import logging
+import os
+
+
+class DataJournal(object):
+
+    """Append-only journal for the data of a DataManager.
+
+    Instead of rewriting the whole data file on every save, only the changes
+    since the last write are appended to a journal file next to it (e.g.
+    data/audits.yaml.journal). Every change is one JSON line which either
+    sets the value at a path of keys or deletes it. After max_records
+    records, the journal is compacted: the data file is rewritten and the
+    journal is emptied.
+
+    At boot, the journal is replayed on top of the data file. The first line
+    of the journal holds a hash of the data file it was started for. If the
+    data file changed since (e.g. MPF stopped after a compaction replaced
+    the file but before the journal was removed), the journal is stale and
+    it is not replayed since it would put keys back to older values. A
+    partly written last line (e.g. after a power loss) is ignored. In both
+    cases the journal is compacted on the next write.
+
+    Args:
+        filename: Path of the data file.
+        max_records: Number of records after which the journal is compacted.
+    """
+
+    def __init__(self, filename, max_records=1000):
+        """Initialise data journal."""
+        self.data_filename = filename
+        self.filename = filename + '.journal'
+        self.max_records = max_records
+        self.log = logging.getLogger('DataJournal')
+
+        self.num_records = 0
+        """Number of records in the journal file."""
+
+        self._broken = False
+        self._base_hash = None
+
+    def replay(self, data):
+        """Apply all records of the journal to data and return it."""
+        try:
+            with open(self.filename, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return data
+
+        if not isinstance(data, dict):
+            data = dict()
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # new records must not be appended to a broken line
+                self.log.warning("Ignoring broken record in %s",
+                                 self.filename)
+                self._broken = True
+                continue
+
+            if 'b' in record:
+                self._base_hash = record['b']
+                if self._base_hash != _hash_file(self.data_filename):
+                    self.log.warning("Ignoring %s since it was written for "
+                                     "an older %s", self.filename,
+                                     self.data_filename)
+                    self._broken = True
+                    return data
+                continue
+
+            _apply_record(data, record)
+            self.num_records += 1
+
+        self.log.debug("Replayed %s records from %s", self.num_records,
+                       self.filename)
+        return data
+
+    def append(self, old_data, new_data):
+        """Append the changes between old_data and new_data.
+
+        Returns:
+            False if the journal needs to be compacted instead because it is
+            full or because the changes cannot be stored as JSON without
+            changing them (e.g. tuples or non-string dict keys).
+        """
+        records = list()
+        _diff(old_data if isinstance(old_data, dict) else dict(),
+              new_data if isinstance(new_data, dict) else dict(),
+              list(), records)
+
+        if not records:
+            return True
+
+        if (self._broken or
+                self.num_records + len(records) > self.max_records):
+            return False
+
+        lines = list()
+        for record in records:
+            try:
+                line = json.dumps(record, separators=(',', ':'))
+            except (TypeError, ValueError):
+                return False
+
+            if json.loads(line) != record:
+                return False
+
+            lines.append(line + '\n')
+
+        if not os.path.isfile(self.filename):
+            # a new journal remembers which data file it belongs to
+            self._base_hash = _hash_file(self.data_filename)
+            lines.insert(0, json.dumps(dict(b=self._base_hash)) + '\n')
+
+        with open(self.filename, 'a') as f:
+            f.write(''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.num_records += len(records)
+        return True
+
+    def compact(self, temp_file):
+        """Replace the data file with temp_file and empty the journal.
+
+        temp_file has to contain all data. If it is the same as the data file
+        the journal was started for, a journal which is left behind would
+        not be detected as stale. In that case the data file is already up
+        to date, so the journal is removed first.
+        """
+        if (self._base_hash is not None and
+                _hash_file(temp_file) == self._base_hash):
+            self.clear()
+            os.replace(temp_file, self.data_filename)
+        else:
+            os.replace(temp_file, self.data_filename)
+            self.clear()
+
+    def clear(self):
+        """Empty the journal after the data file has been rewritten."""
+        try:
+            os.remove(self.filename)
+        except FileNotFoundError:
+            pass
+
+        self.num_records = 0
+        self._broken = False
+        self._base_hash = None
+
+
+def _hash_file(filename):
+    # None if there is no file
+    try:
+        with open(filename, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _diff(old, new, path, records):
+    # adds set and delete records for all changes from old to new. dicts are
+    # compared per key, everything else is set as a whole
+    for key in old:
+        if key not in new:
+            records.append(dict(d=path + [key]))
+
+    for key, value in new.items():
+        if key not in old:
+            records.append(dict(p=path + [key], v=value))
+        elif isinstance(old[key], dict) and isinstance(value, dict):
+            _diff(old[key], value, path + [key], records)
+        elif old[key] != value or type(old[key]) is not type(value):
+            records.append(dict(p=path + [key], v=value))
+
+
+def _apply_record(data, record):
+    path = record['d'] if 'd' in record else record['p']
+
+    target = data
+    for key in path[:-1]:
+        if not isinstance(target.get(key), dict):
+            target[key] = dict()
+        target = target[key]
+
+    if 'd' in record:
+        target.pop(path[-1], None)
+    else:
+        target[path[-1]] = record['v']
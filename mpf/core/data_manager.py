@@ -4,8 +4,10 @@ import copy
 import logging
 import os
 import errno
-import _thread
+import threading
 
+from mpf.core.data_journal import DataJournal
+from mpf.core.data_sqlite import SqliteDataStore
 from mpf.core.file_manager import FileManager
 
 
@@ -23,6 +25,12 @@ class DataManager(object):
                 in the machine config in the mpf:paths:<name> location. That's
                 how you specify the file name this DataManager will use.
 
+        If mpf:data_storage is set to "journal", only the changes are
+        appended to a journal file when data is saved and the file itself is
+        only rewritten once the journal is full (see DataJournal).
+        If it is set to "sqlite", the data is stored in a SQLite database
+        instead (see SqliteDataStore).
+
         """
         self.machine = machine
         self.name = name
@@ -33,11 +41,41 @@ class DataManager(object):
 
         self.data = dict()
 
+        self._scheduled_snapshot = None
+        self._pending_data = None
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._write_event = threading.Event()
+        self._writer_thread = None
+
+        self._journal = None
+        self._written_data = dict()
+
+        self.database = None
+        """SqliteDataStore if mpf:data_storage is "sqlite". Can be used to
+        query the audit history."""
+
+        if self.machine.config['mpf']['data_storage'] == 'journal':
+            self._journal = DataJournal(
+                self.filename,
+                self.machine.config['mpf']['data_journal_max_records'])
+
         self._setup_file()
 
+        self.machine.events.add_handler('shutdown', self.flush)
+
     def _setup_file(self):
         self._make_sure_path_exists(os.path.dirname(self.filename))
 
+        if self.machine.config['mpf']['data_storage'] == 'sqlite':
+            database_file = os.path.join(
+                self.machine.machine_path,
+                self.machine.config['mpf']['paths']['database'])
+            self._make_sure_path_exists(os.path.dirname(database_file))
+            self.database = SqliteDataStore(
+                database_file, self.name,
+                self.machine.config['mpf']['audit_history_days'])
+
         self._load()
 
     @classmethod
@@ -49,6 +87,16 @@ class DataManager(object):
                 raise
 
     def _load(self):
+        if self.database:
+            data = self.database.load()
+            if data is not None:
+                self.data = data
+                self._written_data = copy.deepcopy(data)
+                return
+
+            # nothing in the database yet. import the file (if it exists)
+            # which will be written to the database on the next save
+
         self.log.debug("Loading %s from %s", self.name, self.filename)
         if os.path.isfile(self.filename):
             self.data = FileManager.load(self.filename, halt_on_error=False)
@@ -57,6 +105,10 @@ class DataManager(object):
             self.log.debug("Didn't find the %s file. No prob. We'll create "
                            "it when we save.", self.name)
 
+        if self._journal:
+            self.data = self._journal.replay(self.data)
+            self._written_data = copy.deepcopy(self.data)
+
     def get_data(self, section=None):
         """Returns the value of this DataManager's data.
 
@@ -83,6 +135,12 @@ class DataManager(object):
     def save_all(self, data=None, delay_secs=0):
         """Writes this DataManager's data to the disk.
 
+        Writes are coalesced. The data is copied once when the next frame
+        starts (or after delay_secs) and handed to a single writer thread,
+        so any number of saves in between results in only one write with
+        the latest data. If the writer is still busy with a previous write,
+        only the latest pending data is written afterwards.
+
         Args:
             data: An optional dict() of the data you want to write. If None
                 then it will write the data as it exists in its own data
@@ -90,24 +148,51 @@ class DataManager(object):
             delay_secs: Optional integer value of the amount of time you want
                 to wait before the disk write occurs. Useful for writes that
                 occur when MPF is busy, so you can delay them by a few seconds
-                so they don't slow down MPF. Default is 0.
+                so they don't slow down MPF. Default is 0. A write which is
+                already scheduled is not moved.
 
         """
+        if data:
+            self.data = data
+
+        if self._scheduled_snapshot:
+            return
+
         self.log.debug("Will write %s to disk in %s sec(s)", self.name,
                        delay_secs)
 
-        if data:
-            self.data = data
+        self._scheduled_snapshot = self.machine.clock.schedule_once(
+            self._queue_write, delay_secs)
 
-        if delay_secs:
-            self.machine.delay.add(callback=self._delayed_save_callback,
-                                   data=copy.deepcopy(self.data),
-                                   ms=delay_secs * 1000)
-        else:
-            _thread.start_new_thread(self._writing_thread, (copy.deepcopy(self.data), ))
+    def flush(self, **kwargs):
+        """Writes all pending changes to disk and waits until they are written.
+
+        Called on shutdown.
+        """
+        del kwargs
 
-    def _delayed_save_callback(self, data):
-        _thread.start_new_thread(self._writing_thread, (data, ))
+        if self._scheduled_snapshot:
+            self._scheduled_snapshot.cancel()
+            self._queue_write()
+
+        self._write_pending_data()
+
+    def _queue_write(self, dt=None):
+        # runs in the main thread, so the data cannot change while it is copied
+        del dt
+        self._scheduled_snapshot = None
+
+        with self._pending_lock:
+            self._pending_data = copy.deepcopy(self.data)
+
+        if not self._writer_thread:
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop,
+                name='DataManager {}'.format(self.name))
+            self._writer_thread.daemon = True
+            self._writer_thread.start()
+
+        self._write_event.set()
 
     def save_key(self, key, value, delay_secs=0):
         """Updates an individual key and then writes the entire dictionary to
@@ -130,6 +215,26 @@ class DataManager(object):
 
         self.save_all(delay_secs=delay_secs)
 
+    def save_keys(self, values, delay_secs=0):
+        """Updates several keys and then writes the entire dictionary to
+        disk once.
+
+        Args:
+            values: Dict of keys and values to add/update.
+            delay_secs: Optional number of seconds to wait before writing the
+                data to disk. Default is 0.
+
+        """
+        if not values:
+            return
+
+        if not isinstance(self.data, dict):
+            self.log.warning('In-memory copy of %s is invalid. Re-creating', self.filename)
+            self.data = dict()
+
+        self.data.update(values)
+        self.save_all(delay_secs=delay_secs)
+
     def remove_key(self, key):
         try:
             del self.data[key]
@@ -137,6 +242,52 @@ class DataManager(object):
         except KeyError:
             pass
 
-    def _writing_thread(self, data):
+    def _writer_loop(self):
+        while True:
+            self._write_event.wait()
+            self._write_event.clear()
+            self._write_pending_data()
+
+    def _write_pending_data(self):
+        # the write lock makes sure that an older snapshot can never
+        # overwrite a newer one
+        with self._write_lock:
+            with self._pending_lock:
+                data = self._pending_data
+                self._pending_data = None
+
+            if data is None:
+                return
+
+            if self._journal:
+                self._write_journal(data)
+            elif self.database:
+                self.database.write(self._written_data, data)
+                self._written_data = data
+            else:
+                self._write_file(data)
+
+    def _write_journal(self, data):
+        # appends only the changes. the file is rewritten (compacted) when
+        # the journal is full
+        if not self._journal.append(self._written_data, data):
+            self._journal.compact(self._write_temp_file(data))
+
+        self._written_data = data
+
+    def _write_file(self, data):
+        os.replace(self._write_temp_file(data), self.filename)
+
+    def _write_temp_file(self, data):
         self.log.debug("Writing %s to: %s", self.name, self.filename)
-        FileManager.save(self.filename, data)
+
+        # write to a temp file first so a crash or power loss never leaves
+        # a partial file
+        root, ext = os.path.splitext(self.filename)
+        temp_file = root + '.tmp' + ext
+        FileManager.save(temp_file, data)
+
+        with open(temp_file, 'r+b') as f:
+            os.fsync(f.fileno())
+
+        return temp_file
@@ -0,0 +1,276 @@
+"""Contains the SqliteDataStore class."""
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS data (
+    manager TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB,
+    PRIMARY KEY (manager, key));
+CREATE TABLE IF NOT EXISTS machine_vars (
+    name TEXT PRIMARY KEY,
+    value,
+    expire REAL);
+CREATE TABLE IF NOT EXISTS audits (
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value NUMERIC,
+    PRIMARY KEY (category, name));
+CREATE TABLE IF NOT EXISTS audit_history (
+    time REAL NOT NULL,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value NUMERIC);
+CREATE INDEX IF NOT EXISTS audit_history_name
+    ON audit_history (category, name, time);
+CREATE INDEX IF NOT EXISTS audit_history_time ON audit_history (time);
+CREATE TABLE IF NOT EXISTS player_audits (
+    item TEXT PRIMARY KEY,
+    average NUMERIC,
+    total INTEGER);
+CREATE TABLE IF NOT EXISTS player_top_list (
+    item TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    value NUMERIC,
+    PRIMARY KEY (item, rank));
+'''
+
+
+class SqliteDataStore(object):
+
+    """Stores the data of DataManagers in a SQLite database.
+
+    All DataManagers share one database file (mpf:paths:database) which is
+    opened in WAL mode. Machine vars, audits and player audits are stored in
+    indexed tables so they can be queried without loading them. Every change
+    of an audit counter is also added to the audit_history table with a
+    timestamp, which allows queries over months of play. Entries which are
+    older than history_days are removed when the database is opened. All
+    other data (e.g. earnings and high scores) is stored per top-level key.
+
+    Values which SQLite cannot store without changing their type (e.g.
+    bools, lists or dicts) and keys which are no strings are pickled.
+
+    Writes are done by the writer thread of the DataManager. All changes of
+    one snapshot are written in a single transaction.
+
+    Args:
+        filename: Path of the database file.
+        manager: Name of the DataManager (e.g. 'audits' or 'machine_vars').
+        history_days: Number of days the audit history is kept. It is kept
+            forever if this is 0 or None.
+    """
+
+    def __init__(self, filename, manager, history_days=None):
+        """Initialise SQLite data store."""
+        self.filename = filename
+        self.manager = manager
+        self.log = logging.getLogger('SqliteDataStore')
+        self._lock = threading.Lock()
+
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(_SCHEMA)
+
+        if manager == 'machine_vars':
+            self._get_rows = self._get_machine_var_rows
+            self._load_rows = self._load_machine_vars
+        elif manager == 'audits':
+            self._get_rows = self._get_audit_rows
+            self._load_rows = self._load_audits
+            if history_days:
+                self.prune_audit_history(time.time() - history_days * 86400)
+        else:
+            self._get_rows = self._get_data_rows
+            self._load_rows = self._load_data
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self.connection.close()
+
+    def load(self):
+        """Return the data of this manager or None if there is none."""
+        with self._lock:
+            data = self._load_rows()
+
+        return data or None
+
+    def write(self, old_data, new_data):
+        """Write all changes between old_data and new_data in a transaction."""
+        old_rows = self._get_rows(old_data if isinstance(old_data, dict)
+                                  else dict())
+        new_rows = self._get_rows(new_data if isinstance(new_data, dict)
+                                  else dict())
+        now = time.time()
+
+        with self._lock, self.connection:
+            for table, rows in new_rows.items():
+                old_table_rows = old_rows.get(table, dict())
+
+                changed = [key + value for key, value in rows.items()
+                           if old_table_rows.get(key) != value]
+                removed = [key for key in old_table_rows if key not in rows]
+
+                if changed:
+                    self.connection.executemany(
+                        'INSERT OR REPLACE INTO {} VALUES ({})'.format(
+                            table, ', '.join('?' * len(changed[0]))),
+                        changed)
+
+                if removed:
+                    self._delete_rows(table, removed)
+
+                if table == 'audits' and changed:
+                    self.connection.executemany(
+                        'INSERT INTO audit_history VALUES (?, ?, ?, ?)',
+                        [(now, ) + x for x in changed])
+
+    def _delete_rows(self, table, keys):
+        key_columns = dict(data='manager = ? AND key = ?',
+                           machine_vars='name = ?',
+                           audits='category = ? AND name = ?',
+                           player_audits='item = ?',
+                           player_top_list='item = ? AND rank = ?')
+
+        self.connection.executemany(
+            'DELETE FROM {} WHERE {}'.format(table, key_columns[table]), keys)
+
+    def get_audit_history(self, category, name, since=None, until=None):
+        """Return the history of an audit counter.
+
+        Args:
+            category: Audit category, e.g. 'switches', 'events' or 'shots'.
+            name: Name of the switch, event or shot.
+            since: Optional timestamp of the first entry to return.
+            until: Optional timestamp of the last entry to return.
+
+        Returns:
+            List of (timestamp, value) tuples, oldest first.
+        """
+        with self._lock:
+            return self.connection.execute(
+                'SELECT time, value FROM audit_history '
+                'WHERE category = ? AND name = ? AND time >= ? AND time <= ? '
+                'ORDER BY time',
+                (category, name, since or 0,
+                 until if until is not None else float('inf'))).fetchall()
+
+    def prune_audit_history(self, until):
+        """Remove all entries of the audit history before timestamp until."""
+        with self._lock, self.connection:
+            self.connection.execute(
+                'DELETE FROM audit_history WHERE time < ?', (until, ))
+
+    @staticmethod
+    def _to_column(value):
+        # sqlite stores numbers, strings and None natively. bools would be
+        # loaded as ints
+        if value is None or type(value) in (int, float, str):
+            return value
+        return pickle.dumps(value, protocol=4)
+
+    @staticmethod
+    def _key_to_column(key):
+        # the key columns are text. other keys would be loaded as strings
+        if isinstance(key, str):
+            return key
+        return pickle.dumps(key, protocol=4)
+
+    @staticmethod
+    def _from_column(value):
+        if isinstance(value, bytes):
+            return pickle.loads(value)
+        return value
+
+    def _get_data_rows(self, data):
+        return dict(data={(self.manager, self._key_to_column(key)):
+                          (self._to_column(value), )
+                          for key, value in data.items()})
+
+    def _load_data(self):
+        return {self._from_column(key): self._from_column(value)
+                for key, value in
+                self.connection.execute(
+                    'SELECT key, value FROM data WHERE manager = ?',
+                    (self.manager, ))}
+
+    def _get_machine_var_rows(self, data):
+        rows = dict()
+        for name, settings in data.items():
+            rows[(self._key_to_column(name), )] = (
+                self._to_column(settings.get('value')),
+                              settings.get('expire'))
+
+        return dict(machine_vars=rows)
+
+    def _load_machine_vars(self):
+        data = dict()
+        for name, value, expire in self.connection.execute(
+                'SELECT name, value, expire FROM machine_vars'):
+            name = self._from_column(name)
+            data[name] = dict(value=self._from_column(value))
+            if expire is not None:
+                data[name]['expire'] = expire
+
+        return data
+
+    @staticmethod
+    def _is_counter_category(category, values):
+        # only categories which fit into the audits table without changing
+        # types go there
+        return (isinstance(category, str) and isinstance(values, dict) and
+                all(isinstance(x, str) for x in values) and
+                all(type(x) in (int, float) for x in values.values()))
+
+    def _get_audit_rows(self, data):
+        # counters go to the audits table, player audits to their own tables
+        # and everything else to the generic data table
+        audits = dict()
+        player_audits = dict()
+        top_lists = dict()
+        other = dict()
+
+        for category, values in data.items():
+            if category == 'player' and isinstance(values, dict):
+                for item, stats in values.items():
+                    player_audits[(item, )] = (stats.get('average'),
+                                               stats.get('total'))
+                    for rank, value in enumerate(stats.get('top', list())):
+                        top_lists[(item, rank)] = (value, )
+
+            elif self._is_counter_category(category, values):
+                for name, value in values.items():
+                    audits[(category, name)] = (value, )
+
+            else:
+                other[category] = values
+
+        rows = self._get_data_rows(other)
+        rows.update(audits=audits, player_audits=player_audits,
+                    player_top_list=top_lists)
+        return rows
+
+    def _load_audits(self):
+        data = self._load_data()
+
+        for category, name, value in self.connection.execute(
+                'SELECT category, name, value FROM audits'):
+            data.setdefault(category, dict())[name] = value
+
+        for item, average, total in self.connection.execute(
+                'SELECT item, average, total FROM player_audits'):
+            data.setdefault('player', dict())[item] = dict(
+                top=list(), average=average, total=total)
+
+        for item, _, value in self.connection.execute(
+                'SELECT item, rank, value FROM player_top_list '
+                'ORDER BY item, rank'):
+            data['player'][item]['top'].append(value)
+
+        return data
@@ -7,6 +7,10 @@ from mpf.core.utility_functions import Util
 from mpf.core.case_insensitive_dict import CaseInsensitiveDict
 
 
+def _get_device_config_info(device_cls):
+    return device_cls.get_config_info()
+
+
 class DeviceManager(object):
     def __init__(self, machine):
         self.machine = machine
@@ -14,6 +18,8 @@ class DeviceManager(object):
 
         self.collections = OrderedDict()
         self.device_classes = OrderedDict()  # collection_name: device_class
+        self._device_types = dict()  # collection_name: device module string
+        self._loaded_device_classes = dict()
 
         self.machine.events.add_handler('init_phase_1',
                                         self._load_device_modules)
@@ -25,26 +31,34 @@ class DeviceManager(object):
                                         self.create_collection_control_events)
 
     def _load_device_modules(self):
+        # Creates the collections of all device types. Device classes are
+        # only imported if a config uses their config section. This is done
+        # for the machine config here and for mode configs when the mode
+        # loads (see load_device_classes()).
         self.log.debug("Loading devices...")
         self.machine.config['mpf']['device_modules'] = (
             self.machine.config['mpf']['device_modules'].split(' '))
         for device_type in self.machine.config['mpf']['device_modules']:
 
-            device_cls = Util.string_to_class("mpf.devices." + device_type)
-
-            collection_name, config = device_cls.get_config_info()
+            collection_name, config_section = (
+                self.machine.config_cache.get_class_info(
+                    "mpf.devices." + device_type, _get_device_config_info))
 
-            self.device_classes[collection_name] = device_cls
+            self._device_types[collection_name] = device_type
 
             # create the collection
             collection = DeviceCollection(self.machine, collection_name,
-                                          device_cls.config_section)
+                                          config_section)
 
             self.collections[collection_name] = collection
             setattr(self.machine, collection_name, collection)
 
+        self.load_device_classes(self.machine.config)
+
+        for collection_name, device_cls in self.device_classes.items():
+
             # Get the config section for these devices
-            config = self.machine.config.get(config, None)
+            config = self.machine.config.get(device_cls.config_section, None)
 
             # create the devices
             if config:
@@ -52,13 +66,41 @@ class DeviceManager(object):
 
             # create the default control events
             try:
-                self._create_default_control_events(collection)
+                self._create_default_control_events(
+                    self.collections[collection_name])
             except KeyError:
                 pass
 
         self.load_devices_config(validate=True)
         self.initialize_devices()
 
+    def load_device_classes(self, config):
+        """Imports the device classes of all device sections in a config.
+
+        Args:
+            config: A machine or mode config dict.
+
+        """
+        new_classes = False
+
+        for collection_name, collection in self.collections.items():
+            if (collection_name not in self.device_classes and
+                    collection.config_section in config):
+
+                self.log.debug("Importing device class for %s",
+                               collection_name)
+
+                self._loaded_device_classes[collection_name] = (
+                    Util.string_to_class(
+                        "mpf.devices." + self._device_types[collection_name]))
+                new_classes = True
+
+        if new_classes:
+            # keep the order of the device_modules list
+            self.device_classes = OrderedDict(
+                (x, self._loaded_device_classes[x]) for x in self.collections
+                if x in self._loaded_device_classes)
+
     def create_devices(self, collection_name, config):
         cls = self.device_classes[collection_name]
 
@@ -85,9 +127,7 @@ class DeviceManager(object):
     def load_devices_config(self, validate=True):
 
         if validate:
-            for device_type in self.machine.config['mpf']['device_modules']:
-
-                device_cls = Util.string_to_class("mpf.devices." + device_type)
+            for device_cls in self.device_classes.values():
 
                 collection_name, config_name = device_cls.get_config_info()
 
@@ -103,9 +143,7 @@ class DeviceManager(object):
                     config[device_name] = collection[device_name].prepare_config(config[device_name], False)
                     config[device_name] = collection[device_name].validate_and_parse_config(config[device_name], False)
 
-        for device_type in self.machine.config['mpf']['device_modules']:
-
-            device_cls = Util.string_to_class("mpf.devices." + device_type)
+        for device_cls in self.device_classes.values():
 
             collection_name, config_name = device_cls.get_config_info()
 
@@ -121,9 +159,7 @@ class DeviceManager(object):
                 collection[device_name].load_config(config[device_name])
 
     def initialize_devices(self):
-        for device_type in self.machine.config['mpf']['device_modules']:
-
-            device_cls = Util.string_to_class("mpf.devices." + device_type)
+        for device_cls in self.device_classes.values():
 
             collection_name, config_name = device_cls.get_config_info()
 
@@ -160,6 +160,9 @@ class FileManager(object):
 
     @staticmethod
     def save(filename, data, **kwargs):
+        if not FileManager.initialized:
+            FileManager.init()
+
         ext = os.path.splitext(filename)[1]
 
         try:
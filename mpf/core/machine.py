@@ -1,11 +1,7 @@
 """Contains the MachineController base class."""
-import errno
-import hashlib
 import importlib
 import logging
 import os
-import pickle
-import tempfile
 
 import queue
 import sys
@@ -16,16 +12,24 @@ from mpf._version import __version__
 from mpf.core.bcp import BCP
 from mpf.core.case_insensitive_dict import CaseInsensitiveDict
 from mpf.core.clock import ClockBase
+from mpf.core.config_bundle import ConfigBundle
+from mpf.core.config_cache import ConfigCache
+from mpf.core.config_overlay import ConfigOverlay
 from mpf.core.config_processor import ConfigProcessor
 from mpf.core.config_validator import ConfigValidator
 from mpf.core.data_manager import DataManager
 from mpf.core.delays import DelayManager, DelayManagerRegistry
 from mpf.core.device_manager import DeviceCollection
 from mpf.core.events import EventManager
+from mpf.core.startup_profiler import StartupProfiler
 from mpf.core.utility_functions import Util
 from mpf.modes.game.code.game import Game
 
 
+def _get_plugin_config_section(plugin_cls):
+    return getattr(plugin_cls, 'config_section', None)
+
+
 # pylint: disable-msg=too-many-instance-attributes
 class MachineController(object):
 
@@ -69,6 +73,10 @@ class MachineController(object):
         self.log.debug("Command line arguments: %s", self.options)
         self.verify_system_info()
 
+        self.startup_profiler = StartupProfiler()
+        if self.options.get('profile_startup'):
+            self.startup_profiler.start()
+
         self._boot_holds = set()
         self.register_boot_hold('init')
 
@@ -82,6 +90,8 @@ class MachineController(object):
         self.machine_vars = CaseInsensitiveDict()
         self.machine_var_monitor = False
         self.machine_var_data_manager = None
+        self._pending_machine_var_saves = dict()
+        self._machine_var_save_event = None
         self.thread_stopper = threading.Event()
 
         self.delayRegistry = DelayManagerRegistry(self)
@@ -91,13 +101,17 @@ class MachineController(object):
 
         self.is_init_done = False
         self.config = None
+        self.config_cache = None
         self.events = None
         self.machine_config = None
         self._set_machine_path()
 
-        self.config_validator = ConfigValidator(self)
+        with self.startup_profiler.measure('phases', 'load_config'):
+            self._load_config()
 
-        self._load_config()
+        # created after loading the config since a config bundle brings its
+        # own config spec
+        self.config_validator = ConfigValidator(self)
 
         self.clock = ClockBase(self.config['mpf']['hz'])
         self.log.info("Starting clock at %sHz", self.clock.max_fps)
@@ -107,26 +121,38 @@ class MachineController(object):
         self.hardware_platforms = dict()
         self.default_platform = None
 
-        self._load_hardware_platforms()
+        with self.startup_profiler.measure('phases',
+                                           'load_hardware_platforms'):
+            self._load_hardware_platforms()
 
         self._initialize_credit_string()
 
-        self._load_core_modules()
+        with self.startup_profiler.measure('phases', 'load_core_modules'):
+            self._load_core_modules()
         # order is specified in mpfconfig.yaml
 
         # This is called so hw platforms have a chance to register for events,
         # and/or anything else they need to do with core modules since
         # they're not set up yet when the hw platforms are constructed.
-        self._initialize_platforms()
+        with self.startup_profiler.measure('phases', 'initialize_platforms'):
+            self._initialize_platforms()
+
+        with self.startup_profiler.measure('phases', 'validate_config'):
+            self._validate_config()
 
-        self._validate_config()
+        with self.startup_profiler.measure('phases',
+                                           'register_config_players'):
+            self._register_config_players()
 
-        self._register_config_players()
         self._register_system_events()
-        self._load_machine_vars()
+
+        with self.startup_profiler.measure('phases', 'load_machine_vars'):
+            self._load_machine_vars()
+
         self._run_init_phases()
 
         ConfigValidator.unload_config_spec()
+        self._save_config_cache()
 
         self.clear_boot_hold('init')
 
@@ -135,39 +161,49 @@ class MachineController(object):
         return BCP.active_connections > 0
 
     def _run_init_phases(self):
-        self.events.post("init_phase_1")
+        self._post_init_phase("init_phase_1")
         '''event: init_phase_1
 
         desc: Posted during the initial boot up of MPF.
         '''
 
-        self.events.process_event_queue()
-        self.events.post("init_phase_2")
+        self._post_init_phase("init_phase_2")
         '''event: init_phase_2
 
         desc: Posted during the initial boot up of MPF.
         '''
-        self.events.process_event_queue()
-        self._load_plugins()
-        self.events.post("init_phase_3")
+
+        with self.startup_profiler.measure('phases', 'load_plugins'):
+            self._load_plugins()
+
+        self._post_init_phase("init_phase_3")
         '''event: init_phase_3
 
         desc: Posted during the initial boot up of MPF.
         '''
-        self.events.process_event_queue()
-        self._load_scriptlets()
-        self.events.post("init_phase_4")
+
+        with self.startup_profiler.measure('phases', 'load_scriptlets'):
+            self._load_scriptlets()
+
+        self._post_init_phase("init_phase_4")
         '''event: init_phase_4
 
         desc: Posted during the initial boot up of MPF.
         '''
-        self.events.process_event_queue()
-        self.events.post("init_phase_5")
+
+        self._post_init_phase("init_phase_5")
         '''event: init_phase_5
 
         desc: Posted during the initial boot up of MPF.
         '''
-        self.events.process_event_queue()
+
+    def _post_init_phase(self, event):
+        # posts an init phase event and processes all handlers and events
+        # which are posted by them
+        with self.startup_profiler.measure('phases', event):
+            self.startup_profiler.wrap_event_handlers(self.events, event)
+            self.events.post(event)
+            self.events.process_event_queue()
 
     def _initialize_platforms(self):
         for platform in list(self.hardware_platforms.values()):
@@ -199,6 +235,9 @@ class MachineController(object):
             section, self.config[section], section)
 
     def _register_system_events(self):
+        self.events.add_handler('asset_loading_complete',
+                                self._save_config_cache)
+        self.events.add_handler('shutdown', self._save_config_cache)
         self.events.add_handler('shutdown', self.power_off)
         self.events.add_handler(self.config['mpf']['switch_tag_event'].
                                 replace('%', 'shutdown'), self.power_off)
@@ -256,101 +295,76 @@ class MachineController(object):
         sys.path.insert(0, self.machine_path)
 
     def _get_mpfcache_file_name(self):
-        cache_dir = tempfile.gettempdir()
-        path_hash = hashlib.md5(bytes(self.machine_path, 'UTF-8')).hexdigest()
-        path_hash += '-'.join(self.options['configfile'])
-        result = os.path.join(cache_dir, path_hash)
-        return result
+        return os.path.join(self.machine_path, 'cache', 'config.mpfcache')
 
     def _load_config(self):
-        if self.options['no_load_cache']:
-            load_from_cache = False
+        if self.options.get('config_bundle'):
+            self._load_config_from_bundle()
+            return
+
+        if self.options.get('build_config_bundle'):
+            self.config_cache = ConfigBundle(
+                self.options['build_config_bundle'], self.machine_path,
+                self.mpf_path, build=True)
         else:
-            try:
-                if self._get_latest_config_mod_time() > os.path.getmtime(self._get_mpfcache_file_name()):
-                    load_from_cache = False  # config is newer
-                else:
-                    load_from_cache = True  # cache is newer
+            self.config_cache = ConfigCache(
+                self._get_mpfcache_file_name(),
+                load=not self.options['no_load_cache'])
 
-            except OSError as exception:
-                if exception.errno != errno.ENOENT:
-                    raise  # some unknown error?
-                else:
-                    load_from_cache = False  # cache file doesn't exist
+        self._load_config_from_files()
 
-        config_loaded = False
-        if load_from_cache:
-            config_loaded = self._load_config_from_cache()
+        if self.options.get('build_config_bundle'):
+            if not ConfigValidator.config_spec:
+                ConfigValidator.load_config_spec()
 
-        if not config_loaded:
-            self._load_config_from_files()
+            self.config_cache.set_machine_config(self.config)
+            self.config_cache.config_spec = ConfigValidator.config_spec
+
+    def _load_config_from_bundle(self):
+        self.log.info("Loading config from bundle %s",
+                      self.options['config_bundle'])
+
+        # raises ValueError if the bundle was built by another MPF version
+        self.config_cache = ConfigBundle(self.options['config_bundle'],
+                                         self.machine_path, self.mpf_path)
+
+        ConfigValidator.set_config_spec(self.config_cache.config_spec)
+        self.config = self.config_cache.get_machine_config()
+        self.machine_config = self.config
+
+    def _save_config_cache(self, **kwargs):
+        del kwargs
+        # bundles are saved by the bundle command and never changed at boot
+        if (self.options['create_config_cache'] and
+                not isinstance(self.config_cache, ConfigBundle)):
+            self.config_cache.save()
 
     def _load_config_from_files(self):
         self.log.info("Loading config from original files")
 
-        self.config = self._get_mpf_config()
+        # all files are stacked and merged only once at the end
+        config = ConfigOverlay(self._get_mpf_config())
 
         for num, config_file in enumerate(self.options['configfile']):
 
             if not (config_file.startswith('/') or
                     config_file.startswith('\\')):
 
-                config_file = os.path.join(self.machine_path, self.config['mpf']['paths']['config'], config_file)
+                config_file = os.path.join(self.machine_path, config['mpf']['paths']['config'], config_file)
 
             self.log.info("Machine config file #%s: %s", num + 1, config_file)
 
-            self.config = Util.dict_merge(self.config,
-                                          ConfigProcessor.load_config_file(
-                                              config_file,
-                                              config_type='machine'))
-            self.machine_config = self.config
+            config.add_layer(ConfigProcessor.load_config_file(
+                config_file, config_type='machine',
+                config_cache=self.config_cache))
 
-        if self.options['create_config_cache']:
-            self._cache_config()
+        self.config = config.flatten()
+        self.machine_config = self.config
 
     def _get_mpf_config(self):
         return ConfigProcessor.load_config_file(self.options['mpfconfigfile'],
-                                                config_type='machine')
-
-    def _load_config_from_cache(self):
-        self.log.info("Loading cached config: %s", self._get_mpfcache_file_name())
-
-        with open(self._get_mpfcache_file_name(), 'rb') as f:
-
-            try:
-                self.config = pickle.load(f)
-                self.machine_config = self.config
-
-            # unfortunately pickle can raise all kinds of exceptions and we dont want to crash on corrupted cache
-            # pylint: disable-msg=broad-except
-            except Exception:
-                self.log.warning("Could not load config from cache")
-                return False
-
-            return True
-
-    def _get_latest_config_mod_time(self):
-
-        latest_time = os.path.getmtime(self.options['mpfconfigfile'])
-
-        for root, dirs, files in os.walk(
-                os.path.join(self.machine_path, 'config')):
-            for name in files:
-                if not name.startswith('.'):
-                    if os.path.getmtime(os.path.join(root, name)) > latest_time:
-                        latest_time = os.path.getmtime(os.path.join(root, name))
-
-            for name in dirs:
-                if not name.startswith('.'):
-                    if os.path.getmtime(os.path.join(root, name)) > latest_time:
-                        latest_time = os.path.getmtime(os.path.join(root, name))
-
-        return latest_time
-
-    def _cache_config(self):
-        with open(self._get_mpfcache_file_name(), 'wb') as f:
-            pickle.dump(self.config, f, protocol=4)
-            self.log.info('Config file cache created: %s', self._get_mpfcache_file_name())
+                                                config_type='machine',
+                                                config_cache=self.config_cache)
 
     def verify_system_info(self):
         """Dumps information about the Python installation to the log.
@@ -401,6 +415,15 @@ class MachineController(object):
         for plugin in Util.string_to_list(
                 self.config['mpf']['plugins']):
 
+            # plugins with a config_section are only imported if it is used
+            config_section = self.config_cache.get_class_info(
+                plugin, _get_plugin_config_section)
+
+            if config_section and config_section not in self.config:
+                self.log.debug("Skipping '%s' plugin since there is no '%s:' "
+                               "section in the config", plugin, config_section)
+                continue
+
             self.log.debug("Loading '%s' plugin", plugin)
 
             plugin_obj = Util.string_to_class(plugin)(self)
@@ -549,6 +572,7 @@ class MachineController(object):
 
         '''
         self.events.process_event_queue()
+        self.startup_profiler.stop()
         self.thread_stopper.set()
         self._platform_stop()
         # todo change this to look for the shutdown event
@@ -587,12 +611,60 @@ class MachineController(object):
         for platform in list(self.hardware_platforms.values()):
             platform.stop()
 
-    def power_off(self):
+    def power_off(self, **kwargs):
         """Attempts to perform a power down of the pinball machine and ends MPF.
 
-        This method is not yet implemented.
+        Pending changes of persisted machine vars are written to disk. The
+        power down itself is not yet implemented.
         """
-        pass
+        del kwargs
+        self._save_machine_vars()
+
+        if self.machine_var_data_manager:
+            self.machine_var_data_manager.flush()
+
+    def _queue_machine_var_save(self, name):
+        # changes are collected and saved together every
+        # machine_vars_save_interval. expire is based on the time of the
+        # change
+        if self.machine_vars[name]['expire_secs']:
+            expire = (self.clock.get_time() +
+                      self.machine_vars[name]['expire_secs'])
+        else:
+            expire = None
+
+        self._pending_machine_var_saves[name] = expire
+
+        if not self._machine_var_save_event:
+            self._machine_var_save_event = self.clock.schedule_once(
+                self._save_machine_vars, Util.string_to_secs(
+                    self.config['mpf']['machine_vars_save_interval']))
+
+    def _save_machine_vars(self, dt=None):
+        del dt
+
+        if self._machine_var_save_event:
+            self._machine_var_save_event.cancel()
+            self._machine_var_save_event = None
+
+        if not self._pending_machine_var_saves:
+            return
+
+        disk_vars = dict()
+        for name, expire in self._pending_machine_var_saves.items():
+            if name not in self.machine_vars:
+                continue
+
+            disk_var = CaseInsensitiveDict()
+            disk_var['value'] = self.machine_vars[name]['value']
+
+            if expire:
+                disk_var['expire'] = expire
+
+            disk_vars[name] = disk_var
+
+        self._pending_machine_var_saves = dict()
+        self.machine_var_data_manager.save_keys(disk_vars)
 
     def log_loop_rate(self):
         self.log.info("Actual MPF loop rate: %s Hz",
@@ -641,13 +713,7 @@ class MachineController(object):
         if change or force_events:
 
             if self.machine_vars[name]['persist'] and self.config['mpf']['save_machine_vars_to_disk']:
-                disk_var = CaseInsensitiveDict()
-                disk_var['value'] = value
-
-                if self.machine_vars[name]['expire_secs']:
-                    disk_var['expire'] = self.clock.get_time() + self.machine_vars[name]['expire_secs']
-
-                self.machine_var_data_manager.save_key(name, disk_var)
+                self._queue_machine_var_save(name)
 
             self.log.debug("Setting machine_var '%s' to: %s, (prior: %s, "
                            "change: %s)", name, value, prev_value,
@@ -738,6 +804,7 @@ class MachineController(object):
         """
         try:
             del self.machine_vars[name]
+            self._pending_machine_var_saves.pop(name, None)
             self.machine_var_data_manager.remove_key(name)
         except KeyError:
             pass
@@ -756,6 +823,7 @@ class MachineController(object):
         for var in list(self.machine_vars.keys()):
             if var.startswith(startswith) and var.endswith(endswith):
                 del self.machine_vars[var]
+                self._pending_machine_var_saves.pop(var, None)
                 self.machine_var_data_manager.remove_key(var)
 
     def get_platform_sections(self, platform_section, overwrite):
@@ -795,4 +863,23 @@ class MachineController(object):
         self.events.process_event_queue()
 
         ConfigValidator.unload_config_spec()
-        self.reset()
+
+        with self.startup_profiler.measure('phases', 'reset'):
+            self.reset()
+
+        self._report_startup_profile()
+
+    def _report_startup_profile(self):
+        if not self.startup_profiler.running:
+            return
+
+        self.startup_profiler.stop()
+
+        for line in self.startup_profiler.get_table().split('\n'):
+            self.log.info(line)
+
+        if isinstance(self.options['profile_startup'], str):
+            filename = os.path.join(self.machine_path,
+                                    self.options['profile_startup'])
+            self.startup_profiler.save_json(filename)
+            self.log.info("Startup profile saved to %s", filename)
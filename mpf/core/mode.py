@@ -1,16 +1,15 @@
 """ Contains the Mode and ModeTimers parent classes"""
 
-import copy
 import logging
 
 from mpf.core.case_insensitive_dict import CaseInsensitiveDict
+from mpf.core.config_overlay import ConfigOverlay
 from mpf.core.delays import DelayManager
 
 # todo
 # override player var
 # override event strings
 from mpf.core.mode_timer import ModeTimer
-from mpf.core.utility_functions import Util
 
 
 # pylint: disable-msg=too-many-instance-attributes
@@ -120,17 +119,10 @@ class Mode(object):
         # Returns a dict_merged dict of a config section from the machine-wide
         # config with the mode-specific config merged in.
 
-        if section_name in self.machine.config:
-            return_dict = copy.deepcopy(self.machine.config[section_name])
-        else:
-            return_dict = CaseInsensitiveDict()
-
-        if section_name in self.config:
-            return_dict = Util.dict_merge(return_dict,
-                                          self.config[section_name],
-                                          combine_lists=False)
-
-        return return_dict
+        return ConfigOverlay(
+            self.machine.config.get(section_name, CaseInsensitiveDict()),
+            self.config.get(section_name),
+            combine_lists=False).flatten()
 
     def start(self, priority=None, callback=None, **kwargs):
         """Starts this mode.
@@ -538,3 +530,51 @@ class Mode(object):
         stops (i.e. whenever it becomes inactive).
         """
         pass
+
+
+class LazyMode(object):
+    """Placeholder for a mode which has not been loaded yet.
+
+    Used with the mpf: lazy_mode_loading setting. Only the mode: section of
+    the mode config is validated at boot and only the start_events of the
+    mode are registered. The mode config, devices, shows, code and config
+    players are loaded when the mode is started for the first time (or
+    when it is prewarmed during attract). The placeholder is then replaced
+    with the actual Mode object in machine.modes.
+
+    Args:
+        machine: The main MachineController instance.
+        config: The validated mode: section of the mode config.
+        name: Name of the mode.
+        path: Path of the mode folder.
+    """
+
+    def __init__(self, machine, config, name, path):
+        self.machine = machine
+        self.config = dict(mode=config)
+        self.name = name.lower()
+        self.path = path
+        self.priority = 0
+        self.active = False
+        self.player = None
+
+        for event in config['start_events']:
+            self.machine.events.add_handler(event=event, handler=self.start,
+                                            priority=config['priority'] +
+                                            config['start_priority'])
+
+    def __repr__(self):
+        return '<LazyMode.{}>'.format(self.name)
+
+    def load(self):
+        """Loads this mode and returns the actual Mode object."""
+        return self.machine.mode_controller.load_lazy_mode(self)
+
+    def start(self, priority=None, callback=None, **kwargs):
+        """Loads this mode and starts it."""
+        self.load().start(priority=priority, callback=callback, **kwargs)
+
+    def stop(self, callback=None, **kwargs):
+        """Does nothing since a mode which is not loaded cannot be running."""
+        del kwargs
+        del callback
@@ -3,9 +3,10 @@ import importlib
 import logging
 import os
 from collections import namedtuple
-from mpf.core.mode import Mode
+from mpf.core.mode import Mode, LazyMode
+from mpf.core.config_overlay import ConfigOverlay
 from mpf.core.config_processor import ConfigProcessor
-from mpf.core.utility_functions import Util
+from mpf.file_interfaces.yaml_interface import YamlInterface
 
 RemoteMethod = namedtuple('RemoteMethod',
                           'method config_section kwargs priority',
@@ -54,6 +55,11 @@ class ModeController(object):
             self.machine.events.add_handler('init_phase_2',
                                             self._load_modes)
 
+        if (self.machine.config['mpf']['lazy_mode_loading'] and
+                self.machine.config['mpf']['prewarm_modes_in_attract']):
+            self.machine.events.add_handler('mode_attract_started',
+                                            self._prewarm_lazy_modes)
+
         self.machine.events.add_handler('ball_ending', self._ball_ending,
                                         priority=0)
 
@@ -81,10 +87,17 @@ class ModeController(object):
 
         self._build_mode_folder_dicts()
 
+        if self.machine.config['mpf']['lazy_mode_loading']:
+            load_method = self._load_lazy_mode_placeholder
+        else:
+            self._preload_mode_configs(
+                set(mode.lower() for mode in self.machine.config['modes']))
+            load_method = self._load_mode
+
         for mode in set(self.machine.config['modes']):
 
             if mode not in self.machine.modes:
-                self.machine.modes[mode] = self._load_mode(mode.lower())
+                self.machine.modes[mode] = load_method(mode.lower())
             else:
                 raise ValueError('Mode {} already exists. Cannot load again.'.
                                  format(mode))
@@ -103,10 +116,13 @@ class ModeController(object):
                              "folder in your machine's 'modes' folder?"
                              .format(mode_string))
 
-    def _load_mode_config(self, mode_string):
-        config = dict()
-        # Is there an MPF default config for this mode? If so, load it first
-        try:
+    def _get_mode_config_files(self, mode_string):
+        # Returns the MPF default config file and the machine-specific config
+        # file of a mode. Either one is None if it does not exist.
+        mpf_mode_config = None
+        mode_config_file = None
+
+        if mode_string in self._mpf_mode_folders:
             mpf_mode_config = os.path.join(
                 self.machine.mpf_path,
                 self.machine.config['mpf']['paths']['modes'],
@@ -114,19 +130,10 @@ class ModeController(object):
                 'config',
                 self._mpf_mode_folders[mode_string] + '.yaml')
 
-            if os.path.isfile(mpf_mode_config):
-                config = ConfigProcessor.load_config_file(mpf_mode_config,
-                                                          config_type='mode')
-
-                if self.debug:
-                    self.log.debug("Loading config from %s", mpf_mode_config)
+            if not os.path.isfile(mpf_mode_config):
+                mpf_mode_config = None
 
-        except KeyError:
-            pass
-
-        # Now figure out if there's a machine-specific config for this mode,
-        # and if so, merge it into the config
-        try:
+        if mode_string in self._machine_mode_folders:
             mode_config_file = os.path.join(
                 self.machine.machine_path,
                 self.machine.config['mpf']['paths']['modes'],
@@ -134,16 +141,47 @@ class ModeController(object):
                 'config',
                 self._machine_mode_folders[mode_string] + '.yaml')
 
-            if os.path.isfile(mode_config_file):
-                config = Util.dict_merge(config,
-                                         ConfigProcessor.load_config_file(
-                                             mode_config_file, 'mode'))
+            if not os.path.isfile(mode_config_file):
+                mode_config_file = None
 
-                if self.debug:
-                    self.log.debug("Loading config from %s", mode_config_file)
+        return mpf_mode_config, mode_config_file
+
+    def _preload_mode_configs(self, modes):
+        # parses the config files of all modes in worker processes (if
+        # enabled) so _load_mode_config() will find them in the cache
+        filenames = list()
+        for mode_string in modes:
+            filenames.extend(x for x in self._get_mode_config_files(mode_string)
+                             if x)
 
-        except KeyError:
-            pass
+        ConfigProcessor.preload_files(
+            filenames, self.machine.config_cache,
+            self.machine.config['mpf']['config_loader_processes'])
+
+    def _load_mode_config(self, mode_string):
+        config = dict()
+        mpf_mode_config, mode_config_file = self._get_mode_config_files(
+            mode_string)
+
+        # Is there an MPF default config for this mode? If so, load it first
+        if mpf_mode_config:
+            config = ConfigProcessor.load_config_file(
+                mpf_mode_config, config_type='mode',
+                config_cache=self.machine.config_cache)
+
+            if self.debug:
+                self.log.debug("Loading config from %s", mpf_mode_config)
+
+        # Now figure out if there's a machine-specific config for this mode,
+        # and if so, merge it into the config
+        if mode_config_file:
+            config = ConfigOverlay(
+                config, ConfigProcessor.load_config_file(
+                    mode_config_file, 'mode',
+                    config_cache=self.machine.config_cache)).flatten()
+
+            if self.debug:
+                self.log.debug("Loading config from %s", mode_config_file)
 
         # validate config
         if 'mode' not in config:
@@ -151,6 +189,95 @@ class ModeController(object):
 
         return config
 
+    def _load_mode_section(self, mode_string):
+        # Only parses the mode: section of the config files of a mode (unless
+        # they are cached). The full config is parsed once by
+        # load_lazy_mode() when the mode starts for the first time.
+        config = dict()
+
+        for filename in self._get_mode_config_files(mode_string):
+            if not filename:
+                continue
+
+            cached = None
+            if self.machine.config_cache:
+                cached = self.machine.config_cache.get(filename)
+
+            if cached is not None:
+                section = cached.get('mode')
+            else:
+                try:
+                    section = YamlInterface.load_section(filename, 'mode')
+                except ValueError:
+                    return self._load_mode_config(mode_string)['mode']
+
+            if section:
+                config = ConfigOverlay(config, section).flatten()
+
+        return config
+
+    def _load_lazy_mode_placeholder(self, mode_string):
+        # Only reads the mode: section of a mode config. Everything else is
+        # loaded by load_lazy_mode() when the mode starts for the first time.
+        mode_string = mode_string.lower()
+
+        if self.debug:
+            self.log.debug('Processing lazy mode: %s', mode_string)
+
+        mode_path = self._find_mode_path(mode_string)
+
+        return LazyMode(self.machine,
+                        self.machine.config_validator.validate_config(
+                            "mode", self._load_mode_section(mode_string)),
+                        mode_string, mode_path)
+
+    def load_lazy_mode(self, lazy_mode):
+        """Fully loads a mode which was not loaded at boot because the
+        lazy_mode_loading setting is enabled.
+
+        The mode object, its devices and its assets are created and the
+        LazyMode placeholder in machine.modes is replaced with the mode.
+
+        Args:
+            lazy_mode: The LazyMode placeholder of the mode.
+
+        Returns:
+            The loaded Mode object.
+
+        """
+        if self.machine.modes[lazy_mode.name] is not lazy_mode:
+            # already loaded
+            return self.machine.modes[lazy_mode.name]
+
+        self.log.debug("Loading lazy mode %s", lazy_mode.name)
+
+        self.machine.events.remove_handler(lazy_mode.start)
+
+        mode = self._load_mode(lazy_mode.name)
+        mode.player = lazy_mode.player
+        self.machine.modes[lazy_mode.name] = mode
+
+        self.machine.asset_manager.create_mode_assets(mode)
+
+        return mode
+
+    def _prewarm_lazy_modes(self, **kwargs):
+        del kwargs
+        self.machine.clock.schedule_once(self._prewarm_next_lazy_mode)
+
+    def _prewarm_next_lazy_mode(self, dt=None):
+        # loads one lazy mode per clock tick as long as attract is running
+        del dt
+
+        if not self.is_active('attract'):
+            return
+
+        for mode in sorted(self.machine.modes, key=lambda x: x.name):
+            if isinstance(mode, LazyMode):
+                mode.load()
+                self.machine.clock.schedule_once(self._prewarm_next_lazy_mode)
+                return
+
     def _load_mode(self, mode_string):
         """Loads a mode, reads in its config, and creates the Mode object.
 
@@ -174,6 +301,8 @@ class ModeController(object):
 
         self.machine.config_validator.validate_config("mode", config['mode'])
 
+        self.machine.device_manager.load_device_classes(config)
+
         # Figure out where the code is for this mode.
         if config['mode']['code']:
             try:  # First check the machine folder
@@ -225,22 +354,15 @@ class ModeController(object):
                        self._machine_mode_folders)
 
     def _get_mode_folder(self, base_folder):
-        try:
-            mode_folders = os.listdir(os.path.join(
-                base_folder, self.machine.config['mpf']['paths']['modes']))
-        except FileNotFoundError:
-            return dict()
+        # the folders are listed through the config cache, so a config bundle
+        # can answer this without touching the disk
+        mode_folders = self.machine.config_cache.list_folders(os.path.join(
+            base_folder, self.machine.config['mpf']['paths']['modes']))
 
         final_mode_folders = dict()
 
         for folder in mode_folders:
-
-            this_mode_folder = os.path.join(
-                base_folder,
-                self.machine.config['mpf']['paths']['modes'],
-                folder)
-
-            if os.path.isdir(this_mode_folder) and not folder.startswith('_'):
+            if not folder.startswith('_'):
                 final_mode_folders[folder.lower()] = folder
 
         return final_mode_folders
@@ -316,6 +316,20 @@ class SwitchPlatform(BasePlatform, metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    def request_hw_switch_states(self, callback):
+        """Request all hardware switch states without blocking.
+
+        callback is called with the dict which get_hw_switch_states() would
+        return. Platforms which have to wait for their hardware to answer
+        should overwrite this and call callback once the states arrived. The
+        default calls get_hw_switch_states() right away.
+
+        Args:
+            callback: Callable which gets the dict of hardware states.
+
+        """
+        callback(self.get_hw_switch_states())
+
 
 class DriverPlatform(BasePlatform, metaclass=abc.ABCMeta):
 
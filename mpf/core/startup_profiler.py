@@ -0,0 +1,175 @@
+"""Contains the StartupProfiler class."""
+import builtins
+import importlib
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+from mpf.core.file_manager import FileManager
+from mpf._version import __version__
+
+
+class StartupProfiler(object):
+
+    """Measures where the time goes while MPF boots.
+
+    Wall time is recorded per boot phase (e.g. _load_config or
+    _load_hardware_platforms), per init_phase_N event handler, per imported
+    module and per parsed file. Module imports and file loads are recorded
+    by temporarily wrapping __import__, importlib.import_module and
+    FileManager.load between start() and stop(). Import and file times are
+    inclusive, so a module which imports other modules includes their time.
+
+    The result can be formatted as a table with get_table() or written as
+    JSON with save_json().
+    """
+
+    categories = ('phases', 'handlers', 'imports', 'files')
+
+    def __init__(self):
+        """Initialise startup profiler."""
+        self.timings = dict()
+        """Dict of category -> list of (name, seconds) in recording order."""
+
+        for category in self.categories:
+            self.timings[category] = list()
+
+        self.total = None
+        self._start_time = None
+        self._original_import = None
+        self._original_import_module = None
+        self._original_file_load = None
+
+    @property
+    def running(self):
+        """True if the profiler has been started and not stopped yet."""
+        return self._start_time is not None
+
+    def start(self):
+        """Start measuring and install the import and file load hooks."""
+        self._start_time = time.perf_counter()
+
+        self._original_import = builtins.__import__
+        self._original_import_module = importlib.import_module
+        self._original_file_load = FileManager.load
+
+        builtins.__import__ = self._timed_import
+        importlib.import_module = self._timed_import_module
+        FileManager.load = staticmethod(self._timed_file_load)
+
+    def stop(self):
+        """Stop measuring and remove all hooks."""
+        if not self.running:
+            return
+
+        builtins.__import__ = self._original_import
+        importlib.import_module = self._original_import_module
+        FileManager.load = staticmethod(self._original_file_load)
+
+        self.total = time.perf_counter() - self._start_time
+        self._start_time = None
+
+    @contextmanager
+    def measure(self, category, name):
+        """Context manager which records the time spent in its block.
+
+        Measuring is cheap, so this is also used when the profiler is not
+        running. The timings are just never reported then.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[category].append((name, time.perf_counter() - start))
+
+    def wrap_event_handlers(self, events, event):
+        """Replace all handlers of an event with timed versions.
+
+        Used for the init_phase_N events which are only posted once. Does
+        nothing if the profiler is not running.
+        """
+        if not self.running:
+            return
+
+        handlers = events.registered_handlers.get(event, list())
+
+        for index, (handler, priority, kwargs, key) in enumerate(handlers):
+            handlers[index] = (self._timed_handler(event, handler), priority,
+                               kwargs, key)
+
+    def _timed_handler(self, event, handler):
+        name = '{}: {}'.format(event, getattr(handler, '__qualname__',
+                                              str(handler)))
+
+        def timed_handler(**kwargs):
+            with self.measure('handlers', name):
+                return handler(**kwargs)
+
+        return timed_handler
+
+    # pylint: disable-msg=redefined-builtin
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(),
+                      level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist,
+                                         level)
+
+        with self.measure('imports', name):
+            return self._original_import(name, globals, locals, fromlist,
+                                         level)
+
+    def _timed_import_module(self, name, package=None):
+        if name in sys.modules:
+            return self._original_import_module(name, package)
+
+        with self.measure('imports', name):
+            return self._original_import_module(name, package)
+
+    def _timed_file_load(self, filename, *args, **kwargs):
+        with self.measure('files', filename):
+            return self._original_file_load(filename, *args, **kwargs)
+
+    def get_report(self):
+        """Return all timings as a dict which can be dumped to JSON."""
+        report = dict(mpf_version=__version__, total=self.total)
+
+        for category in self.categories:
+            report[category] = [dict(name=name, seconds=seconds) for
+                                name, seconds in self.timings[category]]
+
+        return report
+
+    def get_table(self, limit=15):
+        """Return the timings as text table.
+
+        Phases are listed in the order in which they ran. Handlers, imports
+        and files are sorted by time and limited to the slowest ones.
+        """
+        lines = ['Startup profile (total: {:.3f}s)'.format(self.total or 0)]
+
+        for category in self.categories:
+            entries = self.timings[category]
+            if not entries:
+                continue
+
+            if category != 'phases':
+                entries = sorted(entries, key=lambda x: x[1],
+                                 reverse=True)[:limit]
+
+            lines.append('')
+            lines.append('{:<64} {:>9}'.format(category.capitalize(),
+                                               'seconds'))
+            lines.append('-' * 74)
+
+            for name, seconds in entries:
+                if len(name) > 64:
+                    name = '...' + name[-61:]
+                lines.append('{:<64} {:>9.3f}'.format(name, seconds))
+
+        return '\n'.join(lines)
+
+    def save_json(self, filename):
+        """Write the report to a JSON file."""
+        with open(filename, 'w') as f:
+            json.dump(self.get_report(), f, indent=2)
@@ -5,6 +5,7 @@ states and posting events to the framework.
 
 import logging
 from collections import defaultdict
+from functools import partial
 
 from mpf.core.case_insensitive_dict import CaseInsensitiveDict
 from mpf.core.utility_functions import Util
@@ -120,28 +121,41 @@ class SwitchController(object):
         changed state.
 
         """
-        # create a list of hw switch numbers, platforms, and switch objects
+        for platform in self._get_switch_platforms():
+            self._set_switch_states(platform, platform.get_hw_switch_states())
+
+    def _get_switch_platforms(self):
         platforms = set()
-        switches = set()  # (switch_object, number)
 
         for switch in self.machine.switches:
             platforms.add(switch.platform)
-            switches.add((switch, switch.hw_switch.number))
-
-        for platform in platforms:
-            switch_states = platform.get_hw_switch_states()
-
-            for switch, number in switches:
-                # if two platforms have the same number choose the right switch
-                if switch.platform != platform:
-                    continue
-                try:
-                    switch.state = switch_states[number] ^ switch.invert
-                    switch.time = self.machine.clock.get_time()
-                except (IndexError, KeyError):
-                    self.log.warning("Received a status update from hardware "
-                                     "switch %s, but that switch is not in "
-                                     "your config. Just FYI.", number)
+
+        return platforms
+
+    def _set_switch_states(self, platform, switch_states, verify=False):
+        # sets the states of all switches of platform from the hw states. if
+        # verify is True a warning is logged for every switch which changed
+        for switch in self.machine.switches:
+            # if two platforms have the same number choose the right switch
+            if switch.platform != platform:
+                continue
+
+            number = switch.hw_switch.number
+            try:
+                state = switch_states[number] ^ switch.invert
+            except (IndexError, KeyError):
+                self.log.warning("Received a status update from hardware "
+                                 "switch %s, but that switch is not in "
+                                 "your config. Just FYI.", number)
+                continue
+
+            if verify and state != switch.state:
+                self.log.warning("Switch State Error! Switch: %s, HW State: "
+                                 "%s, MPF State: %s", switch.name, state,
+                                 switch.state)
+
+            switch.state = state
+            switch.time = self.machine.clock.get_time()
 
     def verify_switches(self):
         """Loops through all the switches and queries their hardware states via
@@ -150,22 +164,13 @@ class SwitchController(object):
 
         Throws logging warnings if anything doesn't match.
 
-        This method is notification only. It doesn't fix anything.
+        This method is notification only. It doesn't fix anything. It does not
+        block. The states are compared when the platforms answered.
 
         """
-        current_states = dict()
-
-        for switch in self.machine.switches:
-            current_states[switch] = switch.state
-
-        self.update_switches_from_hw()
-
-        for switch in self.machine.switches:
-            if switch.state ^ switch.invert != current_states[switch]:
-                self.log.warning("Switch State Error! Switch: %s, HW State: "
-                                 "%s, MPF State: %s", switch.name,
-                                 current_states[switch],
-                                 switch.state ^ switch.invert)
+        for platform in self._get_switch_platforms():
+            platform.request_hw_switch_states(
+                partial(self._set_switch_states, platform, verify=True))
 
     def is_state(self, switch_name, state, ms=0):
         """Queries whether a switch is in a given state and (optionally)
@@ -405,6 +410,10 @@ class SwitchController(object):
         if monitor not in self.monitors:
             self.monitors.append(monitor)
 
+    def remove_monitor(self, monitor):
+        if monitor in self.monitors:
+            self.monitors.remove(monitor)
+
     # pylint: disable-msg=too-many-arguments
     def add_switch_handler(self, switch_name, callback, state=1, ms=0,
                            return_info=False, callback_kwargs=None):
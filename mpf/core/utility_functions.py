@@ -1,9 +1,12 @@
 """Contains the Util class which includes many utility functions"""
-from copy import deepcopy
+import os
 import re
+import select
 from functools import reduce
 from ruamel.yaml.compat import ordereddict
 
+from mpf.core.config_overlay import ConfigOverlay
+
 
 class Util(object):
     hex_matcher = re.compile("(?:[a-fA-F0-9]{6,8})")
@@ -156,23 +159,18 @@ class Util(object):
                 overwritten. Default is `True` which combines them.
 
         Returns:
-            The merged dictionaries.
+            The merged dictionaries. All dicts and lists in it are new
+            objects, so neither `a` nor `b` will be changed when the result
+            is changed.
+
+        When merging more than two dicts, use a ConfigOverlay and flatten()
+        it once instead of calling this method repeatedly. This avoids
+        copying the already merged dicts again for every merge.
 
         """
-        # log.info("Dict Merge incoming A %s", a)
-        # log.info("Dict Merge incoming B %s", b)
         if not isinstance(b, dict):
             return b
-        result = deepcopy(a)
-        for k, v in b.items():
-            if k in result and isinstance(result[k], dict):
-                result[k] = Util.dict_merge(result[k], v)
-            elif k in result and isinstance(result[k], list) and combine_lists:
-                result[k].extend(v)
-            else:
-                result[k] = deepcopy(v)
-        # log.info("Dict Merge result: %s", result)
-        return result
+        return ConfigOverlay(a, b, combine_lists=combine_lists).flatten()
 
     @staticmethod
     def hex_string_to_list(input_string, output_length=3):
@@ -620,3 +618,44 @@ class Util(object):
             return min(max(float(gain_string), 0.0), 1.0)
         except (TypeError, ValueError):
             return 1.0
+
+    @staticmethod
+    def write_buffers(port, buffers):
+        """Writes a list of bytes-like objects (e.g. a header and a
+        memoryview of a frame) to a serial port or file without joining them.
+
+        If the port has a file descriptor and the OS supports it, all buffers
+        are written with os.writev() (scatter I/O). Otherwise they are joined
+        and written with port.write().
+
+        Args:
+            port: A serial port or binary file object.
+            buffers: List of bytes-like objects.
+
+        """
+        try:
+            fd = port.fileno()
+        except (AttributeError, TypeError, ValueError, OSError):
+            fd = None
+
+        if not isinstance(fd, int) or not hasattr(os, 'writev'):
+            port.write(b''.join(buffers))
+            return
+
+        views = [memoryview(x).cast('B') for x in buffers]
+        first = 0
+        while first < len(views):
+            try:
+                # at most IOV_MAX buffers per call
+                written = os.writev(fd, views[first:first + 1024])
+            except BlockingIOError:
+                # serial ports are opened non-blocking
+                select.select([], [fd], [])
+                continue
+
+            while first < len(views) and written >= len(views[first]):
+                written -= len(views[first])
+                first += 1
+
+            if written:
+                views[first] = views[first][written:]
@@ -333,6 +333,56 @@ class YamlInterface(FileInterface):
         else:
             return Util.keys_to_lower(yaml.load(data_string, Loader=MpfLoader))
 
+    @staticmethod
+    def load_section(filename, section):
+        """Loads only one top-level section of a YAML file.
+
+        The lines of the section are cut out of the file before they are
+        parsed, so the size of the other sections does not matter. The
+        config_version is not checked.
+
+        Args:
+            filename: The file to load.
+            section: Lower case name of the top-level section.
+
+        Returns:
+            The data of the section or None if the file has no such section.
+
+        Raises:
+            ValueError if the section cannot be parsed on its own (e.g. since
+            it refers to an anchor in another section).
+
+        """
+        if YamlInterface.cache and filename in YamlInterface.file_cache:
+            return copy.deepcopy(
+                YamlInterface.file_cache[filename].get(section))
+
+        lines = list()
+        with open(filename) as f:
+            for line in f:
+                if lines:
+                    # the section ends with the next top-level line
+                    if line.strip() and line[0] not in ' \t#':
+                        break
+                    lines.append(line)
+                elif line.lower().startswith(section + ':'):
+                    lines.append(line)
+
+        if not lines:
+            return None
+
+        try:
+            data = YamlInterface.process(''.join(lines))
+        except yaml.YAMLError:
+            raise ValueError("Cannot load section {} of {} on its own".format(
+                section, filename))
+
+        if not isinstance(data, dict):
+            raise ValueError("Cannot load section {} of {} on its own".format(
+                section, filename))
+
+        return data.get(section)
+
     def save(self, filename, data, **kwargs):
 
         try:
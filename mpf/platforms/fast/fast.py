@@ -4,14 +4,12 @@ boards.
 """
 
 import logging
-import time
-import sys
 import threading
+import time
 import queue
-import traceback
-import io
 from distutils.version import StrictVersion
 from copy import deepcopy
+from functools import partial
 
 try:
     import serial
@@ -21,6 +19,7 @@ except ImportError:
     serial = None
 
 from mpf.platforms.fast import fast_defines
+from mpf.platforms.serial_transport import SerialTransport, CrFraming
 from mpf.platforms.fast.fast_driver import FASTDriver
 from mpf.platforms.fast.fast_gi import FASTGIString
 from mpf.platforms.fast.fast_led import FASTDirectLED
@@ -74,6 +73,8 @@ class HardwarePlatform(ServoPlatform, MatrixLightsPlatform, GiPlatform,
         self.config = None
         self.machine_type = None
         self.hw_switch_data = None
+        self._switch_state_callbacks = list()
+        self._switch_state_timeout = None
 
         # todo verify this list
         self.fast_commands = {'ID': self.receive_id,  # processor ID
@@ -145,15 +146,39 @@ class HardwarePlatform(ServoPlatform, MatrixLightsPlatform, GiPlatform,
                              "development)", msg)
 
     def _connect_to_hardware(self):
-        # Connect to each port from the config. This process will cause the
-        # connection threads to figure out which processor they've connected to
-        # and to register themselves.
+        # Connect to all ports from the config at the same time. This process
+        # will cause the connection threads to figure out which processor
+        # they've connected to and to register themselves. Every connection
+        # gives up after connection_timeout, so this does not wait forever.
+        errors = list()
+        threads = list()
+
         for port in self.config['ports']:
+            thread = threading.Thread(target=self._connect_to_port,
+                                      args=(port, errors),
+                                      name='FAST {}'.format(port))
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+
+    def _connect_to_port(self, port, errors):
+        # runs in a thread per port. exceptions are raised again in the main
+        # thread by _connect_to_hardware
+        try:
             self.connection_threads.add(SerialCommunicator(
                 machine=self.machine, platform=self, port=port,
                 baud=self.config['baud'], send_queue=queue.Queue(),
                 receive_queue=self.receive_queue))
 
+        # pylint: disable-msg=broad-except
+        except Exception as exception:
+            errors.append(exception)
+
     def register_processor_connection(self, name, communicator):
         """Once a communication link has been established with one of the
         processors on the FAST board, this method lets the communicator let MPF
@@ -188,16 +213,46 @@ class HardwarePlatform(ServoPlatform, MatrixLightsPlatform, GiPlatform,
         self.rgb_connection.send(msg)
 
     def get_hw_switch_states(self):
+        # blocks until the states arrived. only used during init. use
+        # request_hw_switch_states() once the game loop runs
         self.hw_switch_data = None
         self.net_connection.send('SA:')
+        self.net_connection.flush()
+
+        end_time = time.time() + self.config['reply_timeout']
+        while self.hw_switch_data is None:
+            try:
+                msg = self.receive_queue.get(
+                    timeout=max(0, end_time - time.time()))
+            except queue.Empty:
+                raise AssertionError('FAST did not send the switch states '
+                                     'within {}s'.format(
+                                         self.config['reply_timeout']))
 
-        self.tick(0.01)
-        while not self.hw_switch_data:
-            time.sleep(.01)
-            self.tick(0.01)
+            self.process_received_message(msg)
 
         return self.hw_switch_data
 
+    def request_hw_switch_states(self, callback):
+        """Sends SA: at the end of the frame and calls callback with the
+        switch states when the answer was processed in a later tick."""
+        self._switch_state_callbacks.append(callback)
+
+        if self._switch_state_timeout:
+            # already waiting for an answer
+            return
+
+        self.net_connection.send('SA:')
+        self._switch_state_timeout = self.machine.clock.schedule_once(
+            self._switch_states_timed_out, self.config['reply_timeout'])
+
+    def _switch_states_timed_out(self, dt):
+        del dt
+        self.log.warning("FAST did not send the switch states within %ss",
+                         self.config['reply_timeout'])
+        self._switch_state_timeout = None
+        self._switch_state_callbacks = list()
+
     def receive_id(self, msg):
         pass
 
@@ -275,6 +330,15 @@ class HardwarePlatform(ServoPlatform, MatrixLightsPlatform, GiPlatform,
 
         self.hw_switch_data = hw_states
 
+        if self._switch_state_timeout:
+            self._switch_state_timeout.cancel()
+            self._switch_state_timeout = None
+
+        callbacks = self._switch_state_callbacks
+        self._switch_state_callbacks = list()
+        for callback in callbacks:
+            callback(hw_states)
+
     def _convert_number_from_config(self, number):
         if self.config['config_number_format'] == 'int':
             return Util.int_to_hex_string(number)
@@ -648,6 +712,17 @@ class FASTDMD(object):
         self.send(data)
 
 
+class FastDmdFraming(CrFraming):
+
+    """Framing of the DMD processor. Frames are sent after a BM: command
+    without carriage return."""
+
+    @staticmethod
+    def encode(message):
+        """Returns the command and the frame without joining them."""
+        return b'BM:', message
+
+
 # pylint: disable-msg=too-many-instance-attributes
 class SerialCommunicator(object):
 
@@ -658,9 +733,10 @@ class SerialCommunicator(object):
         self.platform = platform
         self.send_queue = send_queue
         self.receive_queue = receive_queue
-        self.debug = False
+        self.debug = self.platform.config['debug']
         self.log = None
         self.dmd = False
+        self.port = port
 
         self.remote_processor = None
         self.remote_model = None
@@ -689,18 +765,23 @@ class SerialCommunicator(object):
                                  ]
 
         self.platform.log.info("Connecting to %s at %sbps", port, baud)
-        self.serial_connection = serial.Serial(port=port, baudrate=baud,
-                                               timeout=1, writeTimeout=0)
+        self.transport = SerialTransport(
+            machine=machine, name=port,
+            open_port=partial(serial.Serial, port=port, baudrate=baud,
+                              timeout=1, writeTimeout=0),
+            framing=CrFraming, receive_queue=receive_queue,
+            send_queue=send_queue, log=self.platform.log,
+            ignored_messages=self.ignored_messages, debug=self.debug)
+        self.transport.open()
 
-        self.serial_io = io.TextIOWrapper(io.BufferedRWPair(
-            self.serial_connection, self.serial_connection, 1), newline='\r',
-            line_buffering=True)
-        # pylint: disable=W0212
-        self.serial_io._CHUNK_SIZE = 1
+        try:
+            self.identify_connection()
+        except Exception:
+            self.transport.stop()
+            raise
 
-        self.identify_connection()
         self.platform.register_processor_connection(self.remote_processor, self)
-        self._start_threads()
+        self.transport.start()
 
     def identify_connection(self):
         """Identifies which processor this serial connection is talking to."""
@@ -711,16 +792,23 @@ class SerialCommunicator(object):
 
         # send enough dummy commands to clear out any buffers on the FAST
         # board that might be waiting for more commands
-        self.serial_connection.write(((' ' * 256) + '\r').encode())
+        self.transport.write(((' ' * 256) + '\r').encode())
 
+        end_time = time.time() + self.platform.config['connection_timeout']
         while True:
             self.platform.debug_log("Sending 'ID:' command to port '%s'",
-                                    self.serial_connection.name)
-            self.serial_connection.write('ID:\r'.encode())
-            msg = self.serial_io.readline()  # todo timeout
+                                    self.port)
+            self.transport.write('ID:\r'.encode())
+            msg = self.transport.read_message() or ''
             if msg.startswith('ID:'):
                 break
 
+            if time.time() > end_time:
+                raise AssertionError('No answer to ID: from port {} within '
+                                     '{}s'.format(self.port,
+                                                  self.platform.config[
+                                                      'connection_timeout']))
+
         # examples of ID responses
         # ID:DMD FP-CPU-002-1 00.87
         # ID:NET FP-CPU-002-2 00.85
@@ -741,6 +829,7 @@ class SerialCommunicator(object):
             min_version = DMD_MIN_FW
             # latest_version = DMD_LATEST_FW
             self.dmd = True
+            self.transport.framing = FastDmdFraming
         elif self.remote_processor == 'NET':
             min_version = NET_MIN_FW
             # latest_version = NET_LATEST_FW
@@ -767,10 +856,21 @@ class SerialCommunicator(object):
 
         firmware_ok = True
 
-        for board_id in range(8):
-            self.serial_connection.write('NN:{0}\r'.format(board_id).encode())
-            msg = self.serial_io.readline()
+        # ask all boards at once and collect the answers until the timeout of
+        # the port
+        self.transport.write(''.join('NN:{0}\r'.format(board_id)
+                                     for board_id in range(8)).encode())
+        replies = dict()
+        while len(replies) < 8:
+            msg = self.transport.read_message()
+            if msg is None:
+                break
             if msg.startswith('NN:'):
+                replies[int(msg.split(',')[0][3:], 16)] = msg
+
+        for board_id in range(8):
+            msg = replies.get(board_id)
+            if msg:
 
                 node_id, model, fw, dr, sw, _, _, _, _, _, _ = msg.split(',')
                 node_id = node_id[3:]
@@ -798,87 +898,29 @@ class SerialCommunicator(object):
         if not firmware_ok:
             raise AssertionError("Exiting due to IO board firmware mismatch")
 
-    def _start_threads(self):
-
-        self.serial_connection.timeout = None
-
-        self.receive_thread = threading.Thread(target=self._receive_loop)
-        self.receive_thread.daemon = True
-        self.receive_thread.start()
-
-        self.sending_thread = threading.Thread(target=self._sending_loop)
-        self.sending_thread.daemon = True
-        self.sending_thread.start()
-
     def stop(self):
         """Stops and shuts down this serial connection."""
-        self.serial_connection.close()
-        self.serial_connection = None  # child threads stop when this is None
+        self.transport.stop()
 
         # todo clear the hw?
 
     def send(self, msg):
         """Sends a message to the remote processor over the serial connection.
 
+        Messages are buffered and all messages of a frame are written at once
+        at the end of the frame. Use flush() to write them right away.
+
         Args:
-            msg: String of the message you want to send. THe <CR> character will
-                be added automatically.
+            msg: String of the message you want to send. The <CR> character
+                will be added automatically. For the DMD processor bytes of a
+                frame.
 
         """
-        if self.dmd:
-            self.send_queue.put(msg)
-        else:
-            self.send_queue.put(msg + '\r')
-
-    def _sending_loop(self):
-
-        debug = self.platform.config['debug']
-
-        try:
-
-            if self.dmd:
-                while self.serial_connection:
+        if self.debug and not self.dmd and msg[0:2] != "WD":
+            self.platform.log.info("Sending: %s", msg)
 
-                    data = self.send_queue.get()
-                    msg = b'BM:' + data
-                    self.serial_connection.write(msg)
-
-            else:
+        self.transport.send(msg)
 
-                while self.serial_connection:
-                    msg = self.send_queue.get()
-                    self.serial_connection.write(msg.encode())
-
-                    if debug and msg[0:2] != "WD":
-                        self.platform.log.info("Sending: %s", msg)
-
-        # pylint: disable-msg=broad-except
-        except Exception:
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
-            msg = ''.join(line for line in lines)
-            self.machine.crash_queue.put(msg)
-
-    def _receive_loop(self):
-
-        debug = self.platform.config['debug']
-
-        if not self.dmd:
-
-            try:
-                while self.serial_connection:
-                    msg = self.serial_io.readline()[:-1]  # strip the \r
-
-                    if debug and msg[0:2] != "WD":
-                        self.platform.log.info("Received: %s", msg)
-
-                    if msg not in self.ignored_messages:
-                        self.receive_queue.put(msg)
-
-            # pylint: disable-msg=broad-except
-            except Exception:
-                exc_type, exc_value, exc_traceback = sys.exc_info()
-                lines = traceback.format_exception(exc_type, exc_value,
-                                                   exc_traceback)
-                msg = ''.join(line for line in lines)
-                self.machine.crash_queue.put(msg)
+    def flush(self):
+        """Writes all buffered messages."""
+        self.transport.flush()
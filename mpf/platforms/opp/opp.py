@@ -5,10 +5,8 @@ boards.
 """
 import logging
 import time
-import sys
-import threading
 import queue
-import traceback
+from functools import partial
 
 try:
     import serial
@@ -22,6 +20,7 @@ from mpf.platforms.opp.opp_incand import OPPIncandCard
 from mpf.platforms.opp.opp_neopixel import OPPNeopixelCard
 from mpf.platforms.opp.opp_switch import OPPInputCard
 from mpf.platforms.opp.opp_rs232_intf import OppRs232Intf
+from mpf.platforms.serial_transport import SerialTransport
 from mpf.devices.driver import ConfiguredHwDriver
 from mpf.core.platform import MatrixLightsPlatform, LedPlatform, SwitchPlatform, DriverPlatform
 
@@ -573,6 +572,59 @@ class HardwarePlatform(MatrixLightsPlatform, LedPlatform, SwitchPlatform, Driver
         self.reconfigure_driver(coil, not coil.hw_driver.can_be_pulsed)
 
 
+class OppFraming(object):
+
+    """Framing of OPP Gen2 messages.
+
+    Commands already end with EOM, so they are sent as they are. Received
+    data is split into 7 byte input messages. EOMs are skipped and if the
+    synch is lost bytes are dropped until the next card address.
+    """
+
+    @staticmethod
+    def encode(message):
+        """Returns a tuple of the buffers to send for message."""
+        return message,
+
+    @staticmethod
+    def split(buffer):
+        """Removes all complete messages from the bytearray buffer and returns
+        them as list of bytes."""
+        messages = []
+        pos = 0
+        end = len(buffer)
+        lost_synch = False
+
+        while end - pos >= 7:
+            # Check if this is a gen2 card address
+            if (buffer[pos] & 0xe0) == 0x20:
+                # Only command expect to receive back is
+                if buffer[pos + 1] == ord(OppRs232Intf.READ_GEN2_INP_CMD):
+                    messages.append(bytes(buffer[pos:pos + 7]))
+                    pos += 7
+                else:
+                    # Lost synch
+                    pos += 2
+                    lost_synch = True
+
+            elif buffer[pos] == ord(OppRs232Intf.EOM_CMD):
+                pos += 1
+            else:
+                # Lost synch
+                pos += 1
+                lost_synch = True
+
+            if lost_synch:
+                while pos < end:
+                    if (buffer[pos] & 0xe0) == 0x20:
+                        lost_synch = False
+                        break
+                    pos += 1
+
+        del buffer[:pos]
+        return messages
+
+
 class SerialCommunicator(object):
 
     # pylint: disable=too-many-arguments
@@ -581,23 +633,28 @@ class SerialCommunicator(object):
         self.platform = platform
         self.send_queue = send_queue
         self.receive_queue = receive_queue
-        self.debug = False
+        self.debug = self.platform.config['debug']
         self.log = self.platform.log
-        self.partMsg = b""
 
         self.remote_processor = "OPP Gen2"
         self.remote_model = None
 
         self.log.debug("Connecting to %s at %sbps", port, baud)
+        self.transport = SerialTransport(
+            machine=self.machine, name=port,
+            open_port=partial(serial.Serial, port=port, baudrate=baud,
+                              timeout=.01, writeTimeout=0),
+            framing=OppFraming, receive_queue=receive_queue,
+            send_queue=send_queue, log=self.log, debug=self.debug)
         try:
-            self.serial_connection = serial.Serial(port=port, baudrate=baud,
-                                                   timeout=.01, writeTimeout=0)
+            self.transport.open()
         except serial.SerialException:
             raise AssertionError('Could not open port: {}'.format(port))
 
+        self.port = port
         self.identify_connection()
         self.platform.register_processor_connection(self.remote_processor, self)
-        self._start_threads()
+        self.transport.start()
 
     def identify_connection(self):
         """Identifies which processor this serial connection is talking to."""
@@ -607,15 +664,15 @@ class SerialCommunicator(object):
         while True:
             if (count % 10) == 0:
                 self.log.debug("Sending EOM command to port '%s'",
-                               self.serial_connection.name)
+                               self.port)
             count += 1
-            self.serial_connection.write(OppRs232Intf.EOM_CMD)
+            self.transport.write(OppRs232Intf.EOM_CMD)
             time.sleep(.01)
-            resp = self.serial_connection.read(30)
+            resp = self.transport.read(30)
             if resp.startswith(OppRs232Intf.EOM_CMD):
                 break
             if count == 100:
-                raise AssertionError('No response from OPP hardware: {}'.format(self.serial_connection.name))
+                raise AssertionError('No response from OPP hardware: {}'.format(self.port))
 
         # Send inventory command to figure out number of cards
         msg = bytearray()
@@ -624,10 +681,10 @@ class SerialCommunicator(object):
         cmd = bytes(msg)
 
         self.log.debug("Sending inventory command: %s", "".join(" 0x%02x" % b for b in cmd))
-        self.serial_connection.write(cmd)
+        self.transport.write(cmd)
 
         time.sleep(.1)
-        resp = self.serial_connection.read(30)
+        resp = self.transport.read(30)
 
         # resp will contain the inventory response.
         self.platform.process_received_message(resp)
@@ -636,7 +693,7 @@ class SerialCommunicator(object):
         self.send_get_gen2_cfg_cmd()
 
         time.sleep(.1)
-        resp = self.serial_connection.read(30)
+        resp = self.transport.read(30)
 
         # resp will contain the gen2 cfg reponses.  That will end up creating all the
         # correct objects.
@@ -645,7 +702,7 @@ class SerialCommunicator(object):
         # get the version of the firmware
         self.send_vers_cmd()
         time.sleep(.1)
-        resp = self.serial_connection.read(30)
+        resp = self.transport.read(30)
         self.platform.process_received_message(resp)
 
         # see if version of firmware is new enough
@@ -656,9 +713,9 @@ class SerialCommunicator(object):
                                         self.create_vers_str(self.platform.minVersion)))
 
         # get initial value for inputs
-        self.serial_connection.write(self.platform.read_input_msg)
+        self.transport.write(self.platform.read_input_msg)
         time.sleep(.1)
-        resp = self.serial_connection.read(100)
+        resp = self.transport.read(100)
         self.log.debug("Init get input response: %s", "".join(" 0x%02x" % b for b in resp))
         self.platform.process_received_message(resp)
 
@@ -680,7 +737,7 @@ class SerialCommunicator(object):
         whole_msg.extend(OppRs232Intf.EOM_CMD)
         cmd = bytes(whole_msg)
         self.log.debug("Sending get Gen2 Cfg command: %s", "".join(" 0x%02x" % b for b in cmd))
-        self.serial_connection.write(cmd)
+        self.transport.write(cmd)
 
     def send_vers_cmd(self):
         # Now send get firmware version message
@@ -700,7 +757,7 @@ class SerialCommunicator(object):
         whole_msg.extend(OppRs232Intf.EOM_CMD)
         cmd = bytes(whole_msg)
         self.log.debug("Sending get version command: %s", "".join(" 0x%02x" % b for b in cmd))
-        self.serial_connection.write(cmd)
+        self.transport.write(cmd)
 
     @classmethod
     def create_vers_str(cls, version_int):
@@ -708,105 +765,23 @@ class SerialCommunicator(object):
                                          ((version_int >> 16) & 0xff), ((version_int >> 8) & 0xff),
                                          (version_int & 0xff)))
 
-    def _start_threads(self):
-
-        self.serial_connection.timeout = None
-
-        self.receive_thread = threading.Thread(target=self._receive_loop)
-        self.receive_thread.daemon = True
-        self.receive_thread.start()
-
-        self.sending_thread = threading.Thread(target=self._sending_loop)
-        self.sending_thread.daemon = True
-        self.sending_thread.start()
-
     def stop(self):
         """Stops and shuts down this serial connection."""
         self.log.error("Stop called on serial connection")
-        self.serial_connection.close()
-        self.serial_connection = None  # child threads stop when this is None
+        self.transport.stop()
 
     def send(self, msg):
         """Sends a message to the remote processor over the serial connection.
 
+        Messages are buffered and all messages of a frame are written at once
+        at the end of the frame.
+
         Args:
             msg: String of the message you want to send. We don't need no
             steenking line feed character
 
         """
-        self.send_queue.put(msg)
-
-    def _sending_loop(self):
-
-        debug = self.platform.config['debug']
-
-        try:
-            while self.serial_connection:
-                msg = self.send_queue.get()
-                self.serial_connection.write(msg)
+        if self.debug:
+            self.log.debug("Sending: %s", "".join(" 0x%02x" % b for b in msg))
 
-                if debug:
-                    self.log.debug("Sending: %s", "".join(" 0x%02x" % b for b in msg))
-
-        # pylint: disable-msg=broad-except
-        except Exception:
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
-            msg = ''.join(line for line in lines)
-            self.machine.crash_queue.put(msg)
-
-    def _receive_loop(self):
-
-        debug = self.platform.config['debug']
-
-        try:
-            self.log.debug("Starting receive loop")
-            while self.serial_connection:
-                resp = self.serial_connection.read(30)
-                if debug:
-                    self.log.debug("Received: %s", "".join(" 0x%02x" % b for b in resp))
-                self.partMsg += resp
-                end_string = False
-                strlen = len(self.partMsg)
-                lost_synch = False
-                # Split into individual responses
-                while strlen >= 7 and not end_string:
-                    # Check if this is a gen2 card address
-                    if (self.partMsg[0] & 0xe0) == 0x20:
-                        # Only command expect to receive back is
-                        if self.partMsg[1] == ord(OppRs232Intf.READ_GEN2_INP_CMD):
-                            self.receive_queue.put(self.partMsg[:7])
-                            self.partMsg = self.partMsg[7:]
-                            strlen -= 7
-                        else:
-                            # Lost synch
-                            self.partMsg = self.partMsg[2:]
-                            strlen -= 2
-                            lost_synch = True
-
-                    elif self.partMsg[0] == ord(OppRs232Intf.EOM_CMD):
-                        self.partMsg = self.partMsg[1:]
-                        strlen -= 1
-                    else:
-                        # Lost synch
-                        self.partMsg = self.partMsg[1:]
-                        strlen -= 1
-                        lost_synch = True
-                    if lost_synch:
-                        while strlen > 0:
-                            if (self.partMsg[0] & 0xe0) == 0x20:
-                                lost_synch = False
-                                break
-                            self.partMsg = self.partMsg[1:]
-                            strlen -= 1
-            self.log.critical("Exit rcv loop")
-
-        # pylint: disable-msg=broad-except
-        except Exception:
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            lines = traceback.format_exception(exc_type, exc_value,
-                                               exc_traceback)
-            msg = ''.join(line for line in lines)
-            self.log.critical("!!! Receive loop error exception")
-            self.machine.crash_queue.put(msg)
-        self.log.critical("!!! Receive loop exited")
+        self.transport.send(msg)
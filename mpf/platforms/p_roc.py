@@ -242,11 +242,12 @@ class PROCDMD(object):
         """Update the DMD with a new frame.
 
         Args:
-            data: A 4096-byte raw string.
+            data: A 4096-byte bytes-like object.
 
         """
         if len(data) == 4096:
-            self.dmd.set_data(data)
+            # pinproc only accepts read-only buffers
+            self.dmd.set_data(bytes(data))
             self.proc.dmd_draw(self.dmd)
         else:
             self.machine.log.warning("Received DMD frame of length %s instead"
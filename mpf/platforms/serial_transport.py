@@ -0,0 +1,314 @@
+"""Contains the SerialTransport which is shared by the serial platforms."""
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from queue import Queue
+
+from mpf.core.utility_functions import Util
+
+
+class CrFraming(object):
+
+    """Framing of ASCII messages which are terminated by a carriage return
+    (e.g. FAST)."""
+
+    @staticmethod
+    def encode(message):
+        """Returns a tuple of the buffers to send for message."""
+        return message.encode() + b'\r',
+
+    @staticmethod
+    def split(buffer):
+        """Removes all complete messages from the bytearray buffer and returns
+        them as list of strings without the carriage return."""
+        end = buffer.rfind(b'\r')
+        if end < 0:
+            return []
+
+        messages = buffer[:end].decode().split('\r')
+        del buffer[:end + 1]
+        return messages
+
+
+# pylint: disable-msg=too-many-instance-attributes
+class SerialTransport(object):
+
+    """Sends and receives framed messages over a serial port.
+
+    Messages passed to send() are only buffered. All messages of a frame are
+    written with a single (scatter) write when flush() is called at the end
+    of the frame. A sending thread does the writes and a receiving thread
+    splits the incoming data into messages with the framing and puts them on
+    the receive queue.
+
+    If the port fails, it is closed and opened again every
+    reconnect_interval seconds. Messages which are sent while the port is
+    disconnected are dropped.
+
+    Until start() is called, write(), read() and read_message() can be used
+    to talk to the hardware synchronously (e.g. to identify it).
+
+    Args:
+        machine: The main MachineController object.
+        name: Name of the port for log messages.
+        open_port: Callable which opens the port and returns a serial port
+            object. Called again to reconnect. Has to raise an OSError (e.g.
+            serial.SerialException) if the port cannot be opened.
+        framing: Object with encode(message) and split(buffer) methods. See
+            CrFraming.
+        receive_queue: Queue which gets all received messages.
+        send_queue: Queue for the sending thread. A new one if None.
+        log: Logger to use.
+        ignored_messages: Iterable of received messages which are not put on
+            the receive queue.
+        debug: Log every received message if True.
+
+    """
+
+    # pylint: disable-msg=too-many-arguments
+    def __init__(self, machine, name, open_port, framing, receive_queue,
+                 send_queue=None, log=None, ignored_messages=None,
+                 debug=False):
+        """Initialise serial transport."""
+        self.machine = machine
+        self.name = name
+        self.open_port = open_port
+        self.framing = framing
+        self.receive_queue = receive_queue
+        self.send_queue = Queue() if send_queue is None else send_queue
+        self.log = log or logging.getLogger('SerialTransport')
+        self.ignored_messages = set(ignored_messages or ())
+        self.debug = debug
+
+        self.reconnect_interval = 1.0
+        """Seconds between two attempts to open the port again."""
+
+        self.counters = dict(bytes_sent=0, bytes_received=0, messages_sent=0,
+                             messages_received=0, writes=0, reconnects=0)
+        """Number of bytes and messages sent and received, of writes to the
+        port and of reconnects."""
+
+        self.port = None
+        self.receive_thread = None
+        self.sending_thread = None
+
+        self._send_buffer = list()
+        self._num_messages = 0
+        self._receive_buffer = bytearray()
+        self._received = deque()
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def open(self):
+        """Opens the port."""
+        self.port = self.open_port()
+
+    def start(self):
+        """Starts the sending and receiving threads and flushes all sent
+        messages at the end of every frame."""
+        self.receive_thread = threading.Thread(target=self._receive_loop)
+        self.receive_thread.daemon = True
+        self.receive_thread.start()
+
+        self.sending_thread = threading.Thread(target=self._sending_loop)
+        self.sending_thread.daemon = True
+        self.sending_thread.start()
+
+        # after everything else in the frame
+        self.machine.clock.schedule_interval(self.flush, 0, priority=-1000)
+
+    def stop(self):
+        """Writes all sent messages, stops the threads and closes the port.
+
+        Waits up to a second for the sending thread since messages of the
+        last frame (e.g. of shutdown handlers) are still in the buffer.
+        """
+        self.machine.clock.unschedule(self.flush)
+        self.flush()
+        self.send_queue.put(None)
+
+        if self.sending_thread:
+            self.sending_thread.join(1)
+
+        self._stopped = True
+
+        with self._lock:
+            if self.port:
+                self.port.close()
+                self.port = None
+
+    def write(self, data):
+        """Writes bytes to the port right away."""
+        self.port.write(data)
+        self.counters['bytes_sent'] += len(data)
+        self.counters['writes'] += 1
+
+    def read(self, size):
+        """Reads up to size bytes from the port (with the timeout of the
+        port) and returns them without framing."""
+        data = self.port.read(size)
+        self.counters['bytes_received'] += len(data)
+        return data
+
+    def read_message(self):
+        """Returns the next received message or None if nothing was received
+        within the timeout of the port."""
+        while not self._received:
+            data = self._read(self.port)
+            if not data:
+                return None
+
+            self._received.extend(self._split(data))
+
+        return self._received.popleft()
+
+    def send(self, message):
+        """Buffers a message until the next flush()."""
+        self._send_buffer.extend(self.framing.encode(message))
+        self._num_messages += 1
+
+    def flush(self, dt=None):
+        """Hands all buffered messages to the sending thread as one write."""
+        del dt
+
+        if not self._send_buffer:
+            return
+
+        self.send_queue.put((self._send_buffer, self._num_messages))
+        self._send_buffer = list()
+        self._num_messages = 0
+
+    def _read(self, port):
+        # blocks until at least one byte or the timeout of the port
+        data = port.read(1)
+        waiting = getattr(port, 'in_waiting', 0)
+        if data and waiting:
+            data += port.read(waiting)
+
+        self.counters['bytes_received'] += len(data)
+        return data
+
+    def _split(self, data):
+        self._receive_buffer.extend(data)
+        messages = self.framing.split(self._receive_buffer)
+        self.counters['messages_received'] += len(messages)
+        return messages
+
+    def _sending_loop(self):
+        # None on the queue stops the thread after everything before it was
+        # written
+        stop = False
+        while not stop:
+            item = self.send_queue.get()
+            stop = item is None
+
+            # write everything which is waiting at once
+            while item and not self.send_queue.empty():
+                next_item = self.send_queue.get(False)
+                if not next_item:
+                    stop = True
+                    break
+                item = (item[0] + next_item[0], item[1] + next_item[1])
+
+            if item and not self._write(item):
+                return
+
+    def _write(self, item):
+        # returns False if the thread has to exit
+        buffers, num_messages = item
+        port = self.port
+        if not port:
+            return True
+
+        try:
+            Util.write_buffers(port, buffers)
+
+        # pylint: disable-msg=broad-except
+        except Exception as exception:
+            return self._handle_error(port, exception)
+
+        self.counters['bytes_sent'] += sum(len(x) for x in buffers)
+        self.counters['messages_sent'] += num_messages
+        self.counters['writes'] += 1
+        return True
+
+    def _receive_loop(self):
+        last_port = None
+
+        while not self._stopped:
+            port = self.port
+            if not port:
+                # wait until the reconnect is done
+                with self._lock:
+                    continue
+
+            if port is not last_port:
+                # drop what is left from the last connection
+                self._receive_buffer.clear()
+                last_port = port
+
+            try:
+                data = self._read(port)
+
+            # pylint: disable-msg=broad-except
+            except Exception as exception:
+                if not self._handle_error(port, exception):
+                    return
+                continue
+
+            if not data:
+                continue
+
+            for message in self._split(data):
+                if self.debug:
+                    self.log.debug("Received from %s: %s", self.name, message)
+
+                if message not in self.ignored_messages:
+                    self.receive_queue.put(message)
+
+    def _handle_error(self, port, exception):
+        # returns False if the thread has to exit
+        if self._stopped:
+            return False
+
+        if port is not self.port:
+            # the other thread already reconnected
+            return True
+
+        if isinstance(exception, OSError):
+            self._reconnect(port)
+            return True
+
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+        self.machine.crash_queue.put(''.join(lines))
+        return False
+
+    def _reconnect(self, port):
+        with self._lock:
+            if port is not self.port:
+                return
+
+            self.log.warning("Lost connection to %s. Reconnecting...",
+                             self.name)
+            try:
+                port.close()
+            except OSError:
+                pass
+
+            self.port = None
+
+            while not self._stopped:
+                time.sleep(self.reconnect_interval)
+
+                try:
+                    self.port = self.open_port()
+                except OSError:
+                    continue
+
+                self.counters['reconnects'] += 1
+                self.log.info("Reconnected to %s", self.name)
+                return
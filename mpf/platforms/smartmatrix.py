@@ -7,6 +7,9 @@ import traceback
 from queue import Queue
 import serial
 from mpf.core.platform import RgbDmdPlatform
+from mpf.core.utility_functions import Util
+
+FRAME_HEADER = b'\x01'
 
 
 class HardwarePlatform(RgbDmdPlatform):
@@ -51,21 +54,21 @@ class HardwarePlatform(RgbDmdPlatform):
 
     def update_non_thread(self, data):
         try:
-            self.serial_port.write(bytearray([0x01]))
-            self.serial_port.write(bytearray(data))
+            Util.write_buffers(self.serial_port, (FRAME_HEADER, data))
         except TypeError:
             pass
 
     def update_separate_thread(self, data):
-        self.queue.put(bytearray(data))
+        # BCP hands over a buffer which is not used again, so there is no
+        # need to copy it
+        self.queue.put(data)
 
     def dmd_sender_thread(self):
         while True:
             data = self.queue.get()  # this will block
 
             try:
-                self.serial_port.write(bytearray([0x01]))
-                self.serial_port.write(bytearray(data))
+                Util.write_buffers(self.serial_port, (FRAME_HEADER, data))
 
             except IOError:
                 exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -16,6 +16,20 @@ from mpf.platforms.interfaces.driver_platform_interface import DriverPlatformInt
 from mpf.core.rgb_color import RGBColor
 
 
+def _get_platform_config_sections(platform_cls):
+    sections = dict()
+    for method_name in ("get_switch_config_section",
+                        "get_switch_overwrite_section",
+                        "get_coil_config_section",
+                        "get_coil_overwrite_section"):
+        if hasattr(platform_cls, method_name):
+            sections[method_name] = getattr(platform_cls, method_name)()
+        else:
+            sections[method_name] = None
+
+    return sections
+
+
 class HardwarePlatform(AccelerometerPlatform, I2cPlatform, ServoPlatform, MatrixLightsPlatform, GiPlatform,
                        LedPlatform, SwitchPlatform, DriverPlatform):
     """Base class for the virtual hardware platform."""
@@ -31,6 +45,7 @@ class HardwarePlatform(AccelerometerPlatform, I2cPlatform, ServoPlatform, Matrix
         # switches
         self.hw_switches = dict()
         self.initial_states_sent = False
+        self._platform_sections = None
 
     def __repr__(self):
         return '<Platform.Virtual>'
@@ -94,49 +109,46 @@ class HardwarePlatform(AccelerometerPlatform, I2cPlatform, ServoPlatform, Matrix
 
         return self.hw_switches
 
-    def _get_platforms(self):
-        platforms = []
-        for name, platform in self.machine.config['mpf']['platforms'].items():
-            if name == "virtual" or name == "smart_virtual":
-                continue
-            platforms.append(Util.string_to_class(platform))
-        return platforms
+    def _get_platform_sections(self, method_name):
+        # Returns the additional config sections of all other platforms. The
+        # sections are kept in the config cache so the platform modules are
+        # only imported if they changed since the last boot.
+        if self._platform_sections is None:
+            self._platform_sections = list()
+            for name, platform in self.machine.config['mpf']['platforms'].items():
+                if name == "virtual" or name == "smart_virtual":
+                    continue
+
+                self._platform_sections.append(
+                    self.machine.config_cache.get_class_info(
+                        platform, _get_platform_config_sections))
+
+        return [x[method_name] for x in self._platform_sections
+                if x[method_name]]
 
     def validate_switch_section(self, switch, config):
-        sections = []
-        for platform in self._get_platforms():
-            if hasattr(platform, "get_switch_config_section") and platform.get_switch_config_section():
-                sections.append(platform.get_switch_config_section())
+        sections = self._get_platform_sections("get_switch_config_section")
         self.machine.config_validator.validate_config(
             "switches", config, switch.name,
             base_spec=sections)
         return config
 
     def validate_switch_overwrite_section(self, switch, config_overwrite):
-        sections = []
-        for platform in self._get_platforms():
-            if hasattr(platform, "get_switch_overwrite_section") and platform.get_switch_overwrite_section():
-                sections.append(platform.get_switch_overwrite_section())
+        sections = self._get_platform_sections("get_switch_overwrite_section")
         self.machine.config_validator.validate_config(
             "switch_overwrites", config_overwrite, switch.name,
             base_spec=sections)
         return config_overwrite
 
     def validate_coil_overwrite_section(self, driver, config_overwrite):
-        sections = []
-        for platform in self._get_platforms():
-            if hasattr(platform, "get_coil_overwrite_section") and platform.get_coil_overwrite_section():
-                sections.append(platform.get_coil_overwrite_section())
+        sections = self._get_platform_sections("get_coil_overwrite_section")
         self.machine.config_validator.validate_config(
             "coil_overwrites", config_overwrite, driver.name,
             base_spec=sections)
         return config_overwrite
 
     def validate_coil_section(self, driver, config):
-        sections = []
-        for platform in self._get_platforms():
-            if hasattr(platform, "get_coil_config_section") and platform.get_coil_config_section():
-                sections.append(platform.get_coil_config_section())
+        sections = self._get_platform_sections("get_coil_config_section")
         self.machine.config_validator.validate_config(
             "coils", config, driver.name,
             base_spec=sections)
@@ -1,6 +1,7 @@
 """MPF plugin for an auditor which records switch events, high scores, shots,
 etc."""
 
+import heapq
 import logging
 from mpf.core.data_manager import DataManager
 from mpf.devices.shot import Shot
@@ -8,6 +9,20 @@ from mpf.devices.shot import Shot
 
 class Auditor(object):
 
+    """Records audits of switches, events, shots and player variables.
+
+    Counters are kept in one list per category (e.g. switches) which is
+    indexed by the id of the switch, event or shot. The ids are assigned
+    once, so recording a switch hit is a single list increment. Player top
+    lists are bounded min-heaps and averages are running averages.
+
+    The dict in current_audits is a snapshot of the counters. It is only
+    updated for the counters which changed since the last snapshot and it
+    is handed to the data manager at most once per save_interval.
+    """
+
+    config_section = 'auditor'
+
     def __init__(self, machine):
         """Base class for the auditor.
 
@@ -25,9 +40,7 @@ class Auditor(object):
         self.machine = machine
 
         self.machine.auditor = self
-        self.switchnames_to_audit = set()
         self.config = None
-        self.current_audits = None
 
         self.enabled = False
         """Attribute that's viewed by other core components to let them know
@@ -35,6 +48,18 @@ class Auditor(object):
         disable() methods.
         """
 
+        self._snapshot = None
+        self._names = dict()
+        self._indexes = dict()
+        self._counters = dict()
+        self._snapshot_counters = dict()
+        self._switch_indexes = dict()
+        self._switch_counters = None
+        self._top_lists = dict()
+        self._dirty_player_items = set()
+        self._save_event = None
+        self._unsaved_changes = False
+
         self.data_manager = DataManager(self.machine, 'audits')
 
         self.machine.events.add_handler('init_phase_4', self._initialize)
@@ -42,45 +67,69 @@ class Auditor(object):
     def __repr__(self):
         return '<Auditor>'
 
+    @property
+    def current_audits(self):
+        """Dict with all audits by category. Updated when accessed."""
+        if self._snapshot is not None:
+            self._update_snapshot()
+
+        return self._snapshot
+
     def _initialize(self):
         # Initializes the auditor. We do this separate from __init__() since
         # we need everything else to be setup first.
 
         self.config = self.machine.config_validator.validate_config('auditor', self.machine.config['auditor'])
 
-        self.current_audits = self.data_manager.get_data()
-
-        if not self.current_audits:
-            self.current_audits = dict()
+        self._snapshot = self.data_manager.get_data()
 
         # Make sure we have all the sections we need in our audit dict
-        if 'switches' not in self.current_audits:
-            self.current_audits['switches'] = dict()
-
-        if 'events' not in self.current_audits:
-            self.current_audits['events'] = dict()
-
-        if 'player' not in self.current_audits:
-            self.current_audits['player'] = dict()
+        for category in ('switches', 'events', 'player'):
+            if not isinstance(self._snapshot.get(category), dict):
+                self._snapshot[category] = dict()
+
+        # every other section with only numbers is a category of counters
+        for category, values in self._snapshot.items():
+            if (category != 'player' and isinstance(values, dict) and
+                    all(isinstance(x, (int, float))
+                        for x in values.values())):
+                self._add_category(category)
+            elif category in ('switches', 'events'):
+                self.log.warning("Ignoring invalid %s audits", category)
+                self._snapshot[category] = dict()
+                self._add_category(category)
+
+        # index 0 of the switch counters is not audited. all switches with the
+        # no_audit tag count there so the switch monitor needs no check
+        self._names['switches'].insert(0, None)
+        self._counters['switches'].insert(0, 0)
+        self._snapshot_counters['switches'].insert(0, 0)
+        self._indexes['switches'] = {
+            name: index for index, name in enumerate(self._names['switches'])
+            if name is not None}
 
         # Make sure we have all the switches in our audit dict
         for switch in self.machine.switches:
-            if (switch.name not in self.current_audits['switches'] and
-                    'no_audit' not in switch.tags):
-                self.current_audits['switches'][switch.name] = 0
+            if 'no_audit' in switch.tags:
+                self._switch_indexes[switch.name] = 0
+            else:
+                self._switch_indexes[switch.name] = self._get_index(
+                    'switches', switch.name)
 
-        # build the list of switches we should audit
-        self.switchnames_to_audit = {x.name for x in self.machine.switches
-                                     if 'no_audit' not in x.tags}
+        self._switch_counters = self._counters['switches']
 
         # Make sure we have all the player stuff in our audit dict
         if 'player' in self.config['audit']:
             for item in self.config['player']:
-                if item not in self.current_audits['player']:
-                    self.current_audits['player'][item] = dict()
-                    self.current_audits['player'][item]['top'] = list()
-                    self.current_audits['player'][item]['average'] = 0
-                    self.current_audits['player'][item]['total'] = 0
+                if item not in self._snapshot['player']:
+                    self._snapshot['player'][item] = dict(top=list(),
+                                                          average=0,
+                                                          total=0)
+
+                top_list = self._snapshot['player'][item]['top'][
+                    :self.config['num_player_top_records']]
+                heapq.heapify(top_list)
+                self._top_lists[item] = top_list
 
         # Register for the events the auditor needs to do its job
         self.machine.events.add_handler('game_starting', self.enable)
@@ -88,12 +137,40 @@ class Auditor(object):
         if 'player' in self.config['audit']:
             self.machine.events.add_handler('game_ending', self.audit_player)
 
+        # write pending audits before the data manager flushes on shutdown
+        self.machine.events.add_handler('shutdown', self._write_audits,
+                                        priority=2)
+
         # Enable the shots monitor
         Shot.monitor_enabled = True
         self.machine.register_monitor('shots', self.audit_shot)
 
-        # Add the switches monitor
-        self.machine.switch_controller.add_monitor(self.audit_switch)
+    def _add_category(self, category):
+        names = list(self._snapshot.setdefault(category, dict()))
+        self._names[category] = names
+        self._indexes[category] = {name: index for index, name in
+                                   enumerate(names)}
+        self._counters[category] = [self._snapshot[category][name]
+                                    for name in names]
+        self._snapshot_counters[category] = list(self._counters[category])
+
+    def _get_index(self, category, name):
+        # returns the index of the counter for name and adds it if it is new
+        if category not in self._counters:
+            self._add_category(category)
+
+        try:
+            return self._indexes[category][name]
+        except KeyError:
+            pass
+
+        index = len(self._names[category])
+        self._names[category].append(name)
+        self._indexes[category][name] = index
+        self._counters[category].append(0)
+        # the snapshot gets the new entry on the next update
+        self._snapshot_counters[category].append(None)
+        return index
 
     def audit(self, audit_class, event, **kwargs):
         """Called to log an auditable event.
@@ -107,17 +184,17 @@ class Auditor(object):
         """
         del kwargs
 
-        if audit_class not in self.current_audits:
-            self.current_audits[audit_class] = dict()
-
-        if event not in self.current_audits[audit_class]:
-            self.current_audits[audit_class][event] = 0
+        try:
+            index = self._indexes[audit_class][event]
+        except KeyError:
+            index = self._get_index(audit_class, event)
 
-        self.current_audits[audit_class][event] += 1
+        self._counters[audit_class][index] += 1
 
     def audit_switch(self, switch_name, state):
-        if self.enabled and state and switch_name in self.switchnames_to_audit:
-            self.audit('switches', switch_name)
+        """Switch monitor which is added while the auditor is enabled."""
+        if state:
+            self._switch_counters[self._switch_indexes[switch_name]] += 1
 
     def audit_shot(self, name, profile, state):
         del profile
@@ -134,7 +211,7 @@ class Auditor(object):
         """
         del kwargs
 
-        self.current_audits['events'][eventname] += 1
+        self._counters['events'][self._indexes['events'][eventname]] += 1
 
     def audit_player(self, **kwargs):
         """Called to write player data to the audit log. Typically this is only
@@ -145,30 +222,49 @@ class Auditor(object):
                 kwargs.
         """
         del kwargs
+        num_items = self.config['num_player_top_records']
+
         for item in self.config['player']:
+            top_list = self._top_lists[item]
+            audits = self._snapshot['player'][item]
+
             for player in self.machine.game.player_list:
+                value = player[item]
+
+                if len(top_list) < num_items:
+                    heapq.heappush(top_list, value)
+                elif top_list and value > top_list[0]:
+                    heapq.heapreplace(top_list, value)
+
+                audits['total'] += 1
+                audits['average'] += (
+                    (value - audits['average']) / audits['total'])
 
-                self.current_audits['player'][item]['top'] = (
-                    self._merge_into_top_list(
-                        player[item],
-                        self.current_audits['player'][item]['top'],
-                        self.config['num_player_top_records']))
+            self._dirty_player_items.add(item)
 
-                self.current_audits['player'][item]['average'] = (
-                    ((self.current_audits['player'][item]['total'] *
-                      self.current_audits['player'][item]['average']) +
-                     self.machine.game.player[item]) /
-                    (self.current_audits['player'][item]['total'] + 1))
+    def _update_snapshot(self):
+        # copies all counters which changed since the last snapshot into it
 
-                self.current_audits['player'][item]['total'] += 1
+        for category, counters in self._counters.items():
+            snapshot_counters = self._snapshot_counters[category]
+            if counters == snapshot_counters:
+                continue
 
-    @classmethod
-    def _merge_into_top_list(cls, new_item, current_list, num_items):
-        # takes a list of top integers and a new item and merges the new item
-        # into the list, then trims it based on the num_items specified
-        current_list.append(new_item)
-        current_list.sort(reverse=True)
-        return current_list[0:num_items]
+            names = self._names[category]
+            section = self._snapshot[category]
+            for index, value in enumerate(counters):
+                if value != snapshot_counters[index] and names[index]:
+                    section[names[index]] = value
+
+            self._snapshot_counters[category] = list(counters)
+            self._unsaved_changes = True
+
+        for item in self._dirty_player_items:
+            self._snapshot['player'][item]['top'] = sorted(
+                self._top_lists[item], reverse=True)
+            self._unsaved_changes = True
+
+        self._dirty_player_items.clear()
 
     def enable(self, **kwags):
         """Enables the auditor.
@@ -192,21 +288,42 @@ class Auditor(object):
         # Register for the events we're auditing
         if 'events' in self.config['audit']:
             for event in self.config['events']:
+                # Make sure we have an entry in our audit file for this event
+                self._get_index('events', event)
                 self.machine.events.add_handler(event,
                                                 self.audit_event,
                                                 eventname=event,
                                                 priority=2)
-                # Make sure we have an entry in our audit file for this event
-                if event not in self.current_audits['events']:
-                    self.current_audits['events'][event] = 0
 
         for event in self.config['save_events']:
             self.machine.events.add_handler(event, self._save_audits,
                                             priority=0)
 
-    def _save_audits(self, delay_secs=3):
-        self.data_manager.save_all(data=self.current_audits,
-                                   delay_secs=delay_secs)
+        self.machine.switch_controller.add_monitor(self.audit_switch)
+
+    def _save_audits(self, **kwargs):
+        # rate limited. all saves within save_interval result in one snapshot
+        del kwargs
+
+        if self._save_event:
+            return
+
+        self._save_event = self.machine.clock.schedule_once(
+            self._write_audits, self.config['save_interval'])
+
+    def _write_audits(self, dt=None, **kwargs):
+        del dt
+        del kwargs
+
+        if self._save_event:
+            self._save_event.cancel()
+            self._save_event = None
+
+        self._update_snapshot()
+
+        if self._unsaved_changes:
+            self._unsaved_changes = False
+            self.data_manager.save_all(data=self._snapshot)
 
     def disable(self, **kwargs):
         """Disables the auditor."""
@@ -215,7 +332,11 @@ class Auditor(object):
         self.enabled = False
 
         # remove switch and event handlers
+        self.machine.switch_controller.remove_monitor(self.audit_switch)
         self.machine.events.remove_handler(self.audit_event)
         self.machine.events.remove_handler(self._save_audits)
 
+        # save everything which was recorded during the game
+        self._save_audits()
+
 plugin_class = Auditor
@@ -8,6 +8,8 @@ from mpf.devices.led import Led
 
 class InfoLights(object):
 
+    config_section = 'info_lights'
+
     def __init__(self, machine):
         self.log = logging.getLogger('infolights')
         self.machine = machine
@@ -21,6 +21,8 @@ except ImportError:
 
 class OSC(object):
 
+    config_section = 'osc'
+
     def __init__(self, machine):
 
         if 'osc' not in machine.config:
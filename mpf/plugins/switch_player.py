@@ -7,6 +7,9 @@ from mpf.core.utility_functions import Util
 
 
 class SwitchPlayer(object):
+
+    config_section = 'switch_player'
+
     def __init__(self, machine):
         self.log = logging.getLogger('switch_player')
 
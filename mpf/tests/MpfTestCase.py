@@ -1,8 +1,10 @@
 import copy
+import hashlib
 import inspect
 import logging
 import os
 import sys
+import tempfile
 import time
 import unittest
 
@@ -39,6 +41,12 @@ class TestMachineController(MachineController):
         if self._enable_plugins:
             super()._register_plugin_config_players()
 
+    def _get_mpfcache_file_name(self):
+        # keep the test machine folders clean
+        path_hash = hashlib.md5(bytes(self.machine_path, 'UTF-8')).hexdigest()
+        return os.path.join(tempfile.gettempdir(), 'mpf-test-cache',
+                            path_hash + '.mpfcache')
+
     def _load_config(self):
         super()._load_config()
         self.config = Util.dict_merge(self.config, self.test_config_patches)
@@ -255,6 +263,8 @@ class MpfTestCase(unittest.TestCase):
                 self.machine.stop()
             except AttributeError:
                 pass
+            # tearDown() is not called when setUp() fails
+            self._unmock_data_manager()
             raise e
 
         self.assertFalse(self.machine.done, "Machine crashed during start")
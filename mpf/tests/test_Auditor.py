@@ -1,3 +1,5 @@
+import copy
+
 from mpf.plugins.auditor import Auditor
 from mpf.tests.MpfTestCase import MpfTestCase
 from unittest.mock import patch, MagicMock
@@ -5,13 +7,13 @@ from mpf.plugins import auditor
 
 class TestDataManager:
     def __init__(self, machine, section):
-        pass
+        self.saved_data = list()
 
     def get_data(self):
         return dict()
 
-    def save_all(self, data, delay_secs):
-        pass
+    def save_all(self, data, delay_secs=0):
+        self.saved_data.append(copy.deepcopy(data))
 
 
 class TestAuditor(MpfTestCase):
@@ -96,3 +98,55 @@ class TestAuditor(MpfTestCase):
         self.advance_time_and_run(1)
 
         self.assertEqual(2, auditor.current_audits['switches']['s_test'])
+
+    def _play_game(self, score):
+        self.machine.switch_controller.process_switch("s_start", 1)
+        self.advance_time_and_run(0.1)
+        self.machine.switch_controller.process_switch("s_start", 0)
+        self.advance_time_and_run(10)
+        self.assertNotEqual(None, self.machine.game)
+
+        self.machine.game.player.score = score
+        self.machine.switch_controller.process_switch("s_test", 1)
+        self.machine.switch_controller.process_switch("s_test", 0)
+        self.advance_time_and_run(1)
+
+        self.machine.switch_controller.process_switch("s_ball", 1)
+        self.advance_time_and_run(1)
+        self.assertEqual(None, self.machine.game)
+
+    def test_player_audits_and_saves(self):
+        self.machine.ball_controller.num_balls_known = 1
+        self.machine.playfield.available_balls = 1
+        self.machine.playfield.balls = 1
+        self.machine.switch_controller.process_switch("s_ball", 1)
+        self.advance_time_and_run(1)
+
+        auditor = self.machine.plugins[0]
+        auditor.config['num_player_top_records'] = 3
+        auditor.config['save_interval'] = 60
+        saved_data = auditor.data_manager.saved_data
+
+        for score in (100, 400, 200, 300):
+            self._play_game(score)
+
+        self.assertEqual([400, 300, 200],
+                         auditor.current_audits['player']['score']['top'])
+        self.assertEqual(250,
+                         auditor.current_audits['player']['score']['average'])
+        self.assertEqual(4, auditor.current_audits['player']['score']['total'])
+        self.assertEqual(4, auditor.current_audits['events']['game_ended'])
+        self.assertEqual(4, auditor.current_audits['switches']['s_test'])
+
+        # all games were played within one save interval
+        self.assertEqual([], saved_data)
+        self.advance_time_and_run(60)
+        self.assertEqual(1, len(saved_data))
+        self.assertEqual(4, saved_data[0]['switches']['s_test'])
+        self.assertEqual([400, 300, 200],
+                         saved_data[0]['player']['score']['top'])
+
+        # nothing is saved without changes
+        auditor.disable()
+        self.advance_time_and_run(60)
+        self.assertEqual(1, len(saved_data))
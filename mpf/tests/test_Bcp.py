@@ -1,16 +1,31 @@
+import json
+import socket
+import threading
+import unittest
+from queue import Queue
 from unittest.mock import MagicMock, patch, call
 
+from mpf.benchmarks import bcp_encoding, bcp_loopback
 from mpf.tests.MpfTestCase import MpfTestCase
-from mpf.core.bcp import decode_command_string, encode_command_string
+from mpf.core.bcp import decode_command_string, encode_command_string, \
+    BcpReceiveBuffer, BCPClientSocket, encode_command_json, decode_message, \
+    BcpParamTemplate
 
 
 class TestBcpClient:
+    encoding = 'bcp'
+    subscriptions = None
+
     def __init__(self, queue):
         self.queue = queue
 
-    def send(self, msg):
+    def send(self, msg, priority=False):
+        del priority
         self.queue.put(decode_command_string(msg))
 
+    def flush(self):
+        pass
+
 
 class TestBcp(MpfTestCase):
 
@@ -108,6 +123,131 @@ class TestBcp(MpfTestCase):
         self.assertEqual(decoded_dict['dict2'][1],
                          dict(key3='value5', key4='value6'))
 
+    def test_json_encoding(self):
+        kwargs = dict(name='a&bytes=3\nb', state=1, value=2.5, flag=False,
+                      empty=None, items=[1, dict(a='b')])
+        message = encode_command_json('Trigger', **kwargs)
+
+        # a single line without & so it is never taken for a payload
+        self.assertEqual(message.split('&'), [message])
+        self.assertEqual(message.split('\n'), [message])
+        self.assertTrue(message.startswith('["trigger",'))
+
+        self.assertEqual(('trigger', kwargs), decode_message(message))
+        self.assertEqual(('trigger', kwargs),
+                         decode_message(message.encode()))
+
+        # json.loads() of Python 3.4 and 3.5 does not accept bytes
+        with patch('mpf.core.bcp.json.loads', side_effect=json.loads) as \
+                loads:
+            decode_message(message.encode())
+        self.assertIsInstance(loads.call_args[0][0], str)
+
+        # URL encoded messages are still decoded
+        self.assertEqual(('switch', dict(name='s1', state=1)),
+                         decode_message(b'switch?name=s1&state=int:1'))
+
+    def test_encoding_benchmark(self):
+        results = bcp_encoding.run(num_messages=60)
+        self.assertEqual({'bcp', 'json'}, set(results))
+
+    def test_loopback_benchmark(self):
+        # every reply is checked by the benchmark itself
+        for encoding in ('bcp', 'json'):
+            result = bcp_loopback.run(num_messages=100, encoding=encoding,
+                                      batch_size=10, frame_size=4096)
+            self.assertGreater(result['rate'], 0)
+            self.assertLessEqual(result['p50'], result['p99'])
+
+    @patch.object(BCPClientSocket, 'setup_client_socket')
+    def test_negotiate_encoding(self, setup_client_socket):
+        del setup_client_socket
+        client = BCPClientSocket(self.machine, 'test', dict(host='x'),
+                                 self.machine.bcp.receive_queue)
+        legacy_client = BCPClientSocket(self.machine, 'legacy',
+                                        dict(host='x'),
+                                        self.machine.bcp.receive_queue)
+
+        client.send_hello()
+        client.flush()
+        self.assertEqual('json', decode_command_string(
+            client.sending_queue.get(False).decode().strip())[1]['encodings'])
+
+        # a host which supports json picks it in its hello
+        client._process_command(b'hello?version=1.1&encoding=json')
+        self.assertEqual('json', client.encoding)
+
+        # old hosts do not answer with an encoding
+        legacy_client._process_command(b'hello?version=1.0')
+        self.assertEqual('bcp', legacy_client.encoding)
+
+        self.machine.bcp.bcp_clients = [client, legacy_client]
+        self.machine.bcp.send('switch', name='s1', state=1)
+        self.advance_time_and_run()
+
+        self.assertEqual(b'["switch",{"name":"s1","state":1}]\n',
+                         client.sending_queue.get(False))
+        self.assertEqual(b'switch?name=s1&state=int:1\n',
+                         legacy_client.sending_queue.get(False))
+
+    @patch.object(BCPClientSocket, 'setup_client_socket')
+    def test_send_batching(self, setup_client_socket):
+        del setup_client_socket
+        client = BCPClientSocket(self.machine, 'test',
+                                 dict(host='x', send_buffer_size=100),
+                                 self.machine.bcp.receive_queue)
+        self.machine.bcp.bcp_clients = [client]
+        self.machine.bcp.priority_commands = {'reset'}
+
+        # everything sent in one frame is written at once at the end of it
+        for i in range(3):
+            self.machine.bcp.send('trigger', name='t{}'.format(i))
+
+        self.assertTrue(client.sending_queue.empty())
+        self.advance_time_and_run()
+        self.assertEqual(b'trigger?name=t0\ntrigger?name=t1\n'
+                         b'trigger?name=t2\n',
+                         client.sending_queue.get(False))
+        self.assertTrue(client.sending_queue.empty())
+
+        # priority commands are sent right away with everything before them
+        self.machine.bcp.send('trigger', name='t3')
+        self.machine.bcp.send('reset')
+        self.assertEqual(b'trigger?name=t3\nreset\n',
+                         client.sending_queue.get(False))
+
+        # and so is a full buffer
+        for i in range(10):
+            self.machine.bcp.send('trigger', name='t{}'.format(i))
+
+        self.assertEqual(7, len(client.sending_queue.get(False).split()))
+        self.advance_time_and_run()
+        self.assertEqual(3, len(client.sending_queue.get(False).split()))
+
+    def test_event_map(self):
+        queue = Queue()
+        self.machine.bcp.bcp_clients = [TestBcpClient(queue)]
+
+        self.machine.bcp.bcp_events = dict(
+            test_event=dict(command='trigger',
+                            params=dict(name='test', text='%text: %count',
+                                        priority=100)),
+            test_event2=dict(command='reset'))
+        self.machine.bcp.process_bcp_events()
+
+        self.machine.events.post('test_event', text='hello', count=3)
+        self.machine.events.post('test_event2')
+        # params from the event_map in mpfconfig.yaml
+        self.machine.events.post('clear', key='mode1')
+        self.advance_time_and_run()
+
+        self.assertEqual(('trigger', dict(name='test', text='hello: 3',
+                                          priority=100)),
+                         queue.get(False))
+        self.assertEqual(('reset', dict()), queue.get(False))
+        self.assertEqual(('trigger', dict(name='clear', key='mode1')),
+                         queue.get(False))
+
     def test_receive_register_trigger(self):
         self.machine.bcp.receive_queue.put(('register_trigger',
                                             {'event': 'test_event'}, None))
@@ -115,6 +255,18 @@ class TestBcp(MpfTestCase):
 
         self.assertIn('test_event', self.machine.bcp.registered_trigger_events)
 
+    def test_receive_dmd_frame(self):
+        self.machine.bcp.physical_rgb_dmd_update_callback = MagicMock()
+        frame = bytearray(128 * 32 * 3)
+        self.machine.bcp.receive_queue.put(('rgb_dmd_frame', dict(), frame))
+        self.advance_time_and_run()
+
+        # the platform gets a view of the received frame and not a copy
+        data = self.machine.bcp.physical_rgb_dmd_update_callback.call_args[
+            0][0]
+        self.assertIsInstance(data, memoryview)
+        self.assertIs(frame, data.obj)
+
     def test_bcp_mpf_and_mpf_mc(self):
         self.kivy = MagicMock()
         self.kivy.clock.Clock = self.machine.clock
@@ -152,3 +304,186 @@ class TestBcp(MpfTestCase):
         ])
 
         self.module_patcher.stop()
+
+
+class TestBcpSubscriptions(MpfTestCase):
+
+    def __init__(self, methodName):
+        super().__init__(methodName)
+        # remove config patch which disables bcp
+        del self.machine_config_patches['bcp']
+
+    def getConfigFile(self):
+        return 'bcp.yaml'
+
+    def getMachinePath(self):
+        return 'tests/machine_files/bcp/'
+
+    def get_platform(self):
+        return 'virtual'
+
+    def _get_messages(self, client):
+        client.flush()
+        messages = list()
+        while not client.sending_queue.empty():
+            messages.extend(
+                decode_message(x) for x in
+                client.sending_queue.get(False).splitlines())
+
+        return messages
+
+    @patch.object(BCPClientSocket, 'setup_client_socket')
+    def test_subscriptions(self, setup_client_socket):
+        del setup_client_socket
+        subscriber = BCPClientSocket(self.machine, 'subscriber',
+                                     dict(host='x'),
+                                     self.machine.bcp.receive_queue)
+        other_client = BCPClientSocket(self.machine, 'other', dict(host='x'),
+                                       self.machine.bcp.receive_queue)
+        self.machine.bcp.bcp_clients = [subscriber, other_client]
+
+        self.machine.create_machine_var('credits', 0)
+        self.machine.create_machine_var('volume', 0)
+
+        # clients get all machine vars until they subscribe to something
+        subscriber._process_command(
+            b'subscribe?topic=machine_variable&names=credits')
+        subscriber._process_command(
+            b'["subscribe",{"topic":"switch","tags":"playfield"}]')
+        subscriber._process_command(
+            b'subscribe?topic=event&names=ball_started,tilt')
+        self.advance_time_and_run()
+        self._get_messages(subscriber)
+        self._get_messages(other_client)
+
+        self.machine.set_machine_var('credits', 1)
+        self.machine.set_machine_var('volume', 5)
+        self.hit_and_release_switch('s_left_sling')
+        self.hit_and_release_switch('s_start')
+        self.machine.events.post('tilt', warnings=3)
+        self.machine.events.post('slam_tilt')
+        self.advance_time_and_run()
+
+        self.assertEqual([
+            ('machine_variable', dict(name='credits', value=1, prev_value=0,
+                                      change=1)),
+            ('switch', dict(name='s_left_sling', state=1)),
+            ('switch', dict(name='s_left_sling', state=0)),
+            ('trigger', dict(name='tilt', warnings=3))],
+            self._get_messages(subscriber))
+
+        self.assertEqual(['credits', 'volume'],
+                         [x[1]['name'] for x in
+                          self._get_messages(other_client)])
+
+        # nothing is sent anymore after unsubscribing
+        subscriber._process_command(b'unsubscribe?topic=switch')
+        subscriber._process_command(b'unsubscribe?topic=event&names=tilt')
+        self.advance_time_and_run()
+        self.hit_and_release_switch('s_left_sling')
+        self.machine.events.post('tilt')
+        self.advance_time_and_run()
+        self.assertEqual([], self._get_messages(subscriber))
+        self.assertNotIn(self.machine.bcp._switch_change,
+                         self.machine.switch_controller.monitors)
+
+    @patch.object(BCPClientSocket, 'setup_client_socket')
+    def test_rate_limit(self, setup_client_socket):
+        del setup_client_socket
+        client = BCPClientSocket(self.machine, 'test', dict(host='x'),
+                                 self.machine.bcp.receive_queue)
+        self.machine.bcp.bcp_clients = [client]
+        self.machine.create_machine_var('credits', 0)
+        self.machine.create_machine_var('volume', 0)
+
+        client._process_command(b'subscribe?topic=machine_variable&'
+                                b'names=__all__&max_rate=float:2')
+        self.advance_time_and_run()
+        self._get_messages(client)
+
+        # the first change is sent right away. later changes within the
+        # next 0.5s only send the latest value when the interval passed
+        for value in range(1, 5):
+            self.machine.set_machine_var('credits', value)
+            self.machine.set_machine_var('volume', value * 10)
+            self.advance_time_and_run(.1)
+
+        self.assertEqual([1, 10], [x[1]['value'] for x in
+                                   self._get_messages(client)])
+
+        self.advance_time_and_run(.5)
+        self.assertEqual([4, 40], [x[1]['value'] for x in
+                                   self._get_messages(client)])
+
+        self.advance_time_and_run(1)
+        self.assertEqual([], self._get_messages(client))
+
+        self.machine.set_machine_var('credits', 5)
+        self.assertEqual([5], [x[1]['value'] for x in
+                               self._get_messages(client)])
+
+
+class TestBcpParamTemplate(unittest.TestCase):
+
+    def test_expand(self):
+        template = BcpParamTemplate('{%name%} has %score% points, 100%')
+        self.assertEqual('{%name%} has 4000 points, 100%',
+                         template.expand(dict(score=4000), dict()))
+        self.assertEqual('{Bob} has 4000 points, 100%',
+                         template.expand(dict(score=4000, number=1),
+                                         dict(name='Bob')))
+
+        # player variables are used before event kwargs
+        template = BcpParamTemplate('%number% %number')
+        self.assertEqual('1 2', template.expand(dict(number=1),
+                                                dict(number=2)))
+        self.assertEqual([('number', True, '%number%'),
+                          ('number', False, '%number')], template.variables)
+
+
+class TestBcpReceiveBuffer(unittest.TestCase):
+
+    def test_partial_messages(self):
+        receive_buffer = BcpReceiveBuffer(size=16, min_read=4)
+        stream = (b'hello?version=1.0\nswitch?name=s1&state=int:1\n'
+                  b'dmd_frame&bytes=5\n\n\x00\n\x01\ngoodbye\n')
+
+        messages = list()
+        for i in range(0, len(stream), 3):
+            receive_buffer.feed(stream[i:i + 3])
+            messages.extend(receive_buffer.get_messages())
+
+        self.assertEqual([(b'hello?version=1.0', None),
+                          (b'switch?name=s1&state=int:1', None),
+                          (b'dmd_frame', b'\n\x00\n\x01\n'),
+                          (b'goodbye', None)], messages)
+        self.assertEqual(0, len(receive_buffer))
+
+        # all complete messages of one read are returned at once
+        receive_buffer.feed(stream)
+        self.assertEqual(4, len(receive_buffer.get_messages()))
+
+    def test_large_payloads_from_socket(self):
+        payload = bytes(range(256)) * 8192
+        stream = (b'dmd_frame&bytes=' + str(len(payload)).encode() + b'\n' +
+                  payload + b'reset\n') * 3
+
+        sender, receiver = socket.socketpair()
+        thread = threading.Thread(target=sender.sendall, args=(stream, ))
+        thread.start()
+
+        receive_buffer = BcpReceiveBuffer()
+        messages = list()
+        while len(messages) < 6:
+            self.assertTrue(receive_buffer.recv_into(receiver))
+            messages.extend(receive_buffer.get_messages())
+
+        thread.join()
+        sender.close()
+        receiver.close()
+
+        self.assertEqual([(b'dmd_frame', payload), (b'reset', None)] * 3,
+                         messages)
+        # payloads are read into their own buffers. the buffer did not grow
+        self.assertIsInstance(messages[0][1], bytearray)
+        self.assertEqual(65536, len(receive_buffer.buffer))
@@ -0,0 +1,167 @@
+import json
+import socket
+import time
+from unittest.mock import patch
+
+from mpf.core.bcp import BCP
+from mpf.tests.MpfTestCase import MpfTestCase
+
+
+class TestBcpServer(MpfTestCase):
+
+    def __init__(self, methodName):
+        super().__init__(methodName)
+        # only run the server. do not connect to a media controller
+        self.machine_config_patches['bcp'] = dict(
+            server=dict(port=0, max_send_buffer=100000))
+
+    def get_use_bcp(self):
+        # the server is only started with BCP enabled
+        return True
+
+    def _connect(self, receive_buffer=None):
+        sock = socket.socket()
+        if receive_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                            receive_buffer)
+        sock.connect(('127.0.0.1', self.machine.bcp.server.port))
+        sock.settimeout(5)
+        self.sockets.append(sock)
+        return sock
+
+    def _wait_for(self, condition):
+        # the server runs in its own thread
+        for _ in range(500):
+            self.advance_time_and_run(.01)
+            if condition():
+                return
+            time.sleep(.01)
+
+        self.fail('Timeout')
+
+    def _read_lines(self, sock, num_lines):
+        data = b''
+        while data.count(b'\n') < num_lines:
+            data += sock.recv(4096)
+        return data.splitlines()
+
+    def _read_all_lines(self, sock):
+        # everything which arrives until nothing came for a moment
+        sock.settimeout(.2)
+        data = b''
+        try:
+            while True:
+                received = sock.recv(4096)
+                if not received:
+                    break
+                data += received
+        except socket.timeout:
+            pass
+
+        sock.settimeout(5)
+        return data.splitlines()
+
+    def setUp(self):
+        self.sockets = list()
+        self._no_media_controller = patch.object(BCP,
+                                                 '_setup_bcp_connections')
+        self._no_media_controller.start()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self._no_media_controller.stop()
+        for sock in self.sockets:
+            sock.close()
+
+    def test_clients(self):
+        bcp = self.machine.bcp
+        self.machine.create_machine_var('credits', 0)
+
+        client1 = self._connect()
+        client1.sendall(b'hello?version=1.1&encodings=json\n')
+        hello = self._read_lines(client1, 1)[0]
+        self.assertTrue(hello.startswith(b'hello?'))
+        self.assertIn(b'encoding=json', hello)
+
+        client2 = self._connect()
+        self._wait_for(lambda: len(bcp.bcp_clients) == 2)
+        self.advance_time_and_run()
+
+        # new clients get all machine variables
+        self.assertIn(['machine_variable', dict(name='credits', value=0)],
+                      [json.loads(line.decode())
+                       for line in self._read_all_lines(client1)])
+        self.assertIn(b'machine_variable?name=credits&value=int:0',
+                      self._read_all_lines(client2))
+
+        # every client subscribes on its own
+        client1.sendall(b'["subscribe",{"topic":"machine_variable",'
+                        b'"names":"credits"}]\n')
+        self._wait_for(lambda: bcp.bcp_clients[0].subscriptions)
+        self.assertIsNone(bcp.bcp_clients[1].subscriptions)
+
+        self.machine.set_machine_var('credits', 3)
+        self.machine.set_machine_var('other', 1)
+        self.advance_time_and_run()
+
+        self.assertEqual(
+            ['machine_variable', dict(name='credits', value=3, prev_value=0,
+                                      change=3)],
+            json.loads(self._read_lines(client1, 1)[0].decode()))
+        self.assertEqual(
+            [b'machine_variable?name=credits&value=int:3&prev_value=int:0&'
+             b'change=int:3'], self._read_lines(client2, 1)[:1])
+
+        # a client which says goodbye is removed
+        client2.sendall(b'goodbye\n')
+        self._wait_for(lambda: len(bcp.bcp_clients) == 1)
+
+        # clients get one goodbye when MPF stops
+        self.machine.bcp.shutdown()
+        self.machine.bcp.server.stop()
+        self.assertEqual([b'goodbye'], self._read_all_lines(client1))
+        self.assertEqual([], bcp.bcp_clients)
+
+    def test_dmd_start(self):
+        bcp = self.machine.bcp
+        bcp.physical_dmd_update_callback = lambda data: None
+
+        client = self._connect()
+        self._wait_for(lambda: len(bcp.bcp_clients) == 1)
+        self.advance_time_and_run()
+
+        # a client which connects later still learns that MPF has a DMD
+        self.assertIn('dmd_start?fps=int:{}'.format(
+            self.machine.clock.max_fps).encode(),
+            self._read_all_lines(client))
+
+    def test_slow_client(self):
+        bcp = self.machine.bcp
+        self.machine.create_machine_var('text', '')
+
+        fast_client = self._connect()
+        slow_client = self._connect(receive_buffer=4096)
+        self._wait_for(lambda: len(bcp.bcp_clients) == 2)
+        fast_client.settimeout(.01)
+
+        # the slow client never reads and is dropped when its buffer is full.
+        # the fast client is not affected
+        received = 0
+        for i in range(500):
+            self.machine.set_machine_var('text', str(i % 10) * 20000)
+            self.advance_time_and_run(.01)
+            try:
+                while True:
+                    received += len(fast_client.recv(100000))
+            except socket.timeout:
+                pass
+
+            if len(bcp.bcp_clients) == 1:
+                break
+
+        self._wait_for(lambda: len(bcp.bcp_clients) == 1)
+        self.assertEqual(fast_client.getsockname(),
+                         bcp.bcp_clients[0].transport.get_extra_info(
+                             'peername'))
+        self.assertGreater(received, 100000)
@@ -1,3 +1,6 @@
+import unittest
+
+from mpf.benchmarks import config_validation
 from mpf.tests.MpfTestCase import MpfTestCase
 from mpf.core.config_validator import ConfigValidator
 
@@ -435,3 +438,34 @@ class TestConfig(MpfTestCase):
         results = self.machine.config_validator.validate_config_item(
             validation_string, validation_failure_info, False)
         self.assertEqual('no', results)
+
+    def test_compiled_spec_cache(self):
+        validator = self.machine.config_validator
+        spec1 = validator._build_spec('show_player', 'config_player_common')
+        spec2 = validator._build_spec('show_player', 'config_player_common')
+        self.assertIs(spec1, spec2)
+        self.assertIn('priority', spec1.spec)
+
+        # replacing a spec invalidates the cached entry
+        self.add_to_config_validator('test_section',
+                                     dict(__valid_in__='machine',
+                                          new_key='single|int|5'))
+        self.assertEqual(
+            5, validator.validate_config('test_section', dict())['new_key'])
+        self.add_to_config_validator('test_section',
+                                     dict(__valid_in__='machine',
+                                          new_key='single|int|7'))
+        self.assertEqual(
+            7, validator.validate_config('test_section', dict())['new_key'])
+
+
+class TestConfigValidationBenchmark(unittest.TestCase):
+
+    def test_benchmark(self):
+        results = config_validation.run(
+            boots=1, tests=['mpf.tests.test_Shots.TestShots'])
+        self.assertEqual({'cached', 'uncached'}, set(results))
+        # both passes validate the same configs
+        self.assertGreater(results['cached']['calls'], 0)
+        self.assertEqual(results['cached']['calls'],
+                         results['uncached']['calls'])
@@ -0,0 +1,82 @@
+import os
+import pickle
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from mpf.commands.bundle import save_bundle
+from mpf.core.config_bundle import ConfigBundle
+from mpf.core.file_manager import FileManager
+from mpf.tests.MpfTestCase import MpfTestCase
+
+
+class TestConfigBundle(MpfTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+        self.temp_dir = tempfile.mkdtemp()
+        self.bundle_file = os.path.join(self.temp_dir, 'config.mpfbundle')
+        self.bundle_options = dict(build_config_bundle=self.bundle_file)
+
+    def getConfigFile(self):
+        return 'test_shows.yaml'
+
+    def getMachinePath(self):
+        return 'tests/machine_files/shows/'
+
+    def get_platform(self):
+        return 'smart_virtual'
+
+    def getOptions(self):
+        options = super().getOptions()
+        options.update(self.bundle_options)
+        return options
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _boot_from_bundle(self):
+        super().tearDown()
+        self.bundle_options = dict(config_bundle=self.bundle_file)
+        self.setUp()
+
+    def test_build_and_boot(self):
+        save_bundle(self.machine)
+        self.assertTrue(os.path.isfile(self.bundle_file))
+
+        # no config file or show is parsed and no folder is walked
+        with patch.object(FileManager, 'load',
+                          side_effect=AssertionError('file loaded')), \
+                patch('os.walk', side_effect=AssertionError('walked')), \
+                patch('os.scandir', side_effect=AssertionError('listed')):
+            self._boot_from_bundle()
+
+            self.assertIsInstance(self.machine.config_cache, ConfigBundle)
+            self.assertIn('mode1', self.machine.modes)
+            self.assertIn('test_show1', self.machine.shows)
+            self.assertTrue(
+                self.machine.shows['test_show1'].load_show_from_disk())
+
+            self.machine.modes.mode1.start()
+            self.advance_time_and_run()
+            self.assertTrue(self.machine.modes.mode1.active)
+
+    def test_refuse_other_version(self):
+        save_bundle(self.machine)
+
+        with open(self.bundle_file, 'rb') as f:
+            data = pickle.load(f)
+
+        data['version'] = ('0.1',) + data['version'][1:]
+
+        with open(self.bundle_file, 'wb') as f:
+            pickle.dump(data, f)
+
+        with self.assertRaises(ValueError):
+            ConfigBundle(self.bundle_file, self.machine.machine_path,
+                         self.machine.mpf_path)
+
+        with self.assertRaises(ValueError):
+            ConfigBundle(os.path.join(self.temp_dir, 'missing'),
+                         self.machine.machine_path, self.machine.mpf_path)
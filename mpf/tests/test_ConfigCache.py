@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mpf.core.config_cache import ConfigCache
+
+
+class TestConfigCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.temp_dir, 'cache', 'config.mpfcache')
+        self.config_file = os.path.join(self.temp_dir, 'config.yaml')
+        self._write_config('a: 1\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_config(self, content, mtime=None):
+        with open(self.config_file, 'w') as f:
+            f.write(content)
+
+        if mtime is not None:
+            os.utime(self.config_file, (mtime, mtime))
+
+    def test_put_and_get(self):
+        cache = ConfigCache(self.cache_file)
+        self.assertIsNone(cache.get(self.config_file))
+
+        cache.put(self.config_file, dict(a=1))
+        data = cache.get(self.config_file)
+        self.assertEqual(dict(a=1), data)
+
+        # every get returns a fresh copy
+        data['a'] = 2
+        self.assertEqual(dict(a=1), cache.get(self.config_file))
+
+        # sections are independent
+        self.assertIsNone(cache.get(self.config_file, 'shows'))
+
+    def test_save_and_load(self):
+        cache = ConfigCache(self.cache_file)
+        cache.put(self.config_file, dict(a=1))
+        cache.put(self.config_file, [1, 2], 'shows')
+        cache.save()
+        self.assertTrue(os.path.isfile(self.cache_file))
+        self.assertFalse(cache.dirty)
+
+        cache = ConfigCache(self.cache_file)
+        self.assertEqual(dict(a=1), cache.get(self.config_file))
+        self.assertEqual([1, 2], cache.get(self.config_file, 'shows'))
+
+        # load=False ignores the existing cache
+        cache = ConfigCache(self.cache_file, load=False)
+        self.assertIsNone(cache.get(self.config_file))
+
+    def test_invalidate_changed_file(self):
+        cache = ConfigCache(self.cache_file)
+        self._write_config('a: 1\n', mtime=1000)
+        cache.put(self.config_file, dict(a=1))
+        cache.put(self.config_file, [1], 'shows')
+
+        # touched but same content. entries stay valid
+        self._write_config('a: 1\n', mtime=2000)
+        self.assertEqual(dict(a=1), cache.get(self.config_file))
+
+        # changed content invalidates all sections of the file
+        self._write_config('a: 2\n', mtime=3000)
+        self.assertIsNone(cache.get(self.config_file))
+        self.assertIsNone(cache.get(self.config_file, 'shows'))
+
+    def test_other_files_stay_valid(self):
+        other_file = os.path.join(self.temp_dir, 'other.yaml')
+        with open(other_file, 'w') as f:
+            f.write('b: 1\n')
+
+        cache = ConfigCache(self.cache_file)
+        cache.put(self.config_file, dict(a=1))
+        cache.put(other_file, dict(b=1))
+
+        self._write_config('a: 22\n')
+        self.assertIsNone(cache.get(self.config_file))
+        self.assertEqual(dict(b=1), cache.get(other_file))
+
+    def test_version_mismatch(self):
+        cache = ConfigCache(self.cache_file)
+        cache.put(self.config_file, dict(a=1))
+        cache.save()
+
+        cache = ConfigCache(self.cache_file)
+        cache._get_version = lambda: ('0.1', '1', '1')
+        cache.manifest = dict()
+        cache.entries = dict()
+        cache._load()
+        self.assertIsNone(cache.get(self.config_file))
@@ -0,0 +1,88 @@
+import unittest
+
+from mpf.core.case_insensitive_dict import CaseInsensitiveDict
+from mpf.core.config_overlay import ConfigOverlay
+from mpf.core.utility_functions import Util
+
+
+class TestConfigOverlay(unittest.TestCase):
+
+    def test_lookup(self):
+        base = dict(a=1, b=dict(c=1, d=[1]), e=[1, 2])
+        overlay = ConfigOverlay(base, dict(a=2, b=dict(d=[2], f=3), e=[3]))
+
+        self.assertEqual(2, overlay['a'])
+        self.assertEqual([1, 2, 3], overlay['e'])
+        self.assertIn('b', overlay)
+        self.assertNotIn('x', overlay)
+        self.assertEqual(['a', 'b', 'e'], list(overlay))
+        self.assertEqual(3, len(overlay))
+        self.assertRaises(KeyError, lambda: overlay['x'])
+        self.assertIsNone(overlay.get('x'))
+
+        # nested dicts are views as well
+        self.assertIsInstance(overlay['b'], ConfigOverlay)
+        self.assertEqual(1, overlay['b']['c'])
+        self.assertEqual([1, 2], overlay['b']['d'])
+        self.assertEqual(3, overlay['b']['f'])
+
+        # layers are not changed
+        self.assertEqual(dict(a=1, b=dict(c=1, d=[1]), e=[1, 2]), base)
+
+    def test_flatten(self):
+        base = dict(a=1, b=dict(c=1, d=[dict(x=1)]), e=[1, 2], g=dict(h=1))
+        top = dict(a=2, b=dict(d=[2], f=3), e=[3], g='override')
+        overlay = ConfigOverlay(base)
+        overlay.add_layer(top)
+        overlay.add_layer(None)
+        result = overlay.flatten()
+
+        self.assertEqual(dict(a=2, b=dict(c=1, d=[dict(x=1), 2], f=3),
+                              e=[1, 2, 3], g='override'), result)
+
+        # the result is independent of all layers
+        result['b']['d'][0]['x'] = 5
+        result['e'].append(4)
+        self.assertEqual(1, base['b']['d'][0]['x'])
+        self.assertEqual([1, 2], base['e'])
+        self.assertEqual([3], top['e'])
+
+    def test_combine_lists(self):
+        overlay = ConfigOverlay(dict(a=[1], b=dict(c=[1])),
+                                dict(a=[2], b=dict(c=[2])),
+                                combine_lists=False)
+
+        # only applies to the top level (like in dict_merge)
+        self.assertEqual(dict(a=[2], b=dict(c=[1, 2])), overlay.flatten())
+
+    def test_override_resets_merge(self):
+        # a non-dict value in between hides all dicts below it
+        overlay = ConfigOverlay(dict(a=dict(b=1)), dict(a=None),
+                                dict(a=dict(c=2)))
+        self.assertEqual(dict(a=dict(c=2)), overlay.flatten())
+
+        overlay = ConfigOverlay(dict(a=[1]), dict(a='x'), dict(a=[2]))
+        self.assertEqual(dict(a=[2]), overlay.flatten())
+
+    def test_case_insensitive(self):
+        base = CaseInsensitiveDict(Foo=dict(a=1))
+        result = ConfigOverlay(base, dict(foo=dict(b=2))).flatten()
+
+        self.assertIsInstance(result, CaseInsensitiveDict)
+        self.assertEqual(dict(a=1, b=2), result['FOO'])
+
+    def test_many_layers(self):
+        layers = [dict(a=1, b=dict(c=[1], d=dict(e=1)), f=[1]),
+                  dict(b=dict(c=[2], d=dict(g=2)), f=[2], h=3),
+                  dict(a=4, b=dict(d=dict(e=5)), f=[3])]
+
+        self.assertEqual(dict(a=4, b=dict(c=[1, 2], d=dict(e=5, g=2)),
+                              f=[1, 2, 3], h=3),
+                         ConfigOverlay(*layers).flatten())
+
+        # same result as merging one after the other
+        result = layers[0]
+        for layer in layers[1:]:
+            result = Util.dict_merge(result, layer)
+
+        self.assertEqual(ConfigOverlay(*layers).flatten(), result)
@@ -0,0 +1,294 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from mpf.core.data_manager import DataManager
+from mpf.core.file_manager import FileManager
+from mpf.file_interfaces.yaml_interface import YamlInterface
+
+
+class TestDataManager(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.machine = MagicMock()
+        self.machine.machine_path = self.temp_dir
+        self.machine.config = {'mpf': {'paths': {'machine_vars':
+                                                 'data/machine_vars.yaml',
+                                                 'audits': 'data/audits.yaml',
+                                                 'earnings':
+                                                 'data/earnings.yaml',
+                                                 'database': 'db/mpf.sqlite'},
+                                       'data_storage': 'yaml',
+                                       'data_journal_max_records': 5,
+                                       'audit_history_days': 365}}
+        self.filename = os.path.join(self.temp_dir, 'data',
+                                     'machine_vars.yaml')
+
+        # MpfTestCase enables the file cache. we need to read the real files
+        self._yaml_cache = patch.object(YamlInterface, 'cache', False)
+        self._yaml_cache.start()
+
+    def tearDown(self):
+        self._yaml_cache.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def _run_scheduled_snapshot(self):
+        callback = self.machine.clock.schedule_once.call_args[0][0]
+        callback(0)
+
+    def test_coalesced_writes(self):
+        data_manager = DataManager(self.machine, 'machine_vars')
+        self.machine.events.add_handler.assert_called_once_with(
+            'shutdown', data_manager.flush)
+
+        with patch.object(FileManager, 'save',
+                          side_effect=FileManager.save) as save:
+            for value in range(10):
+                data_manager.save_key('credits', value)
+
+            # only one write is scheduled for all changes
+            self.assertEqual(1, self.machine.clock.schedule_once.call_count)
+            self.assertFalse(save.called)
+
+            self._run_scheduled_snapshot()
+            data_manager.flush()
+
+            self.assertEqual(1, save.call_count)
+
+        self.assertEqual(dict(credits=9), FileManager.load(self.filename))
+        self.assertEqual(['machine_vars.yaml'],
+                         os.listdir(os.path.dirname(self.filename)))
+
+        # the next change schedules the next write
+        data_manager.save_key('credits', 10)
+        self.assertEqual(2, self.machine.clock.schedule_once.call_count)
+
+    def test_flush(self):
+        data_manager = DataManager(self.machine, 'machine_vars')
+        data_manager.save_all(data=dict(a=1), delay_secs=3)
+        self.assertEqual(3, self.machine.clock.schedule_once.call_args[0][1])
+
+        # flush writes immediately and cancels the scheduled write
+        data_manager.flush()
+        self.machine.clock.schedule_once.return_value.cancel.\
+            assert_called_once_with()
+        self.assertEqual(dict(a=1), FileManager.load(self.filename))
+
+        # loaded again on the next start
+        self.assertEqual(dict(a=1),
+                         DataManager(self.machine, 'machine_vars').get_data())
+
+    def test_journal(self):
+        self.machine.config['mpf']['data_storage'] = 'journal'
+        journal_file = self.filename + '.journal'
+
+        data_manager = DataManager(self.machine, 'machine_vars')
+        data_manager.save_all(data=dict(a=dict(value=1), b=dict(value=2)))
+        data_manager.flush()
+
+        # only changes are appended. the data file is not written
+        self.assertFalse(os.path.isfile(self.filename))
+        self.assertEqual(2, data_manager._journal.num_records)
+
+        data_manager.save_key('a', dict(value=3))
+        data_manager.remove_key('b')
+        data_manager.flush()
+
+        # the header and four records
+        with open(journal_file) as f:
+            self.assertEqual(5, len(f.readlines()))
+
+        # the file is compacted when the journal is full
+        data_manager.save_key('c', [1, 2, 3])
+        data_manager.save_key('d', 4)
+        data_manager.flush()
+
+        self.assertEqual(dict(a=dict(value=3), c=[1, 2, 3], d=4),
+                         FileManager.load(self.filename))
+        self.assertFalse(os.path.isfile(journal_file))
+
+        data_manager.save_key('d', 5)
+        data_manager.flush()
+        self.assertEqual(1, data_manager._journal.num_records)
+
+        # a partly written record is ignored on replay
+        with open(journal_file, 'a') as f:
+            f.write('{"p":["e"')
+
+        data_manager = DataManager(self.machine, 'machine_vars')
+        self.assertEqual(dict(a=dict(value=3), c=[1, 2, 3], d=5),
+                         data_manager.get_data())
+
+        # and the journal is compacted on the next write
+        data_manager.save_key('e', 6)
+        data_manager.flush()
+        self.assertFalse(os.path.isfile(journal_file))
+        self.assertEqual(dict(a=dict(value=3), c=[1, 2, 3], d=5, e=6),
+                         FileManager.load(self.filename))
+
+    def test_journal_crash_during_compaction(self):
+        self.machine.config['mpf']['data_storage'] = 'journal'
+        self.machine.config['mpf']['data_journal_max_records'] = 2
+        journal_file = self.filename + '.journal'
+
+        data_manager = DataManager(self.machine, 'machine_vars')
+        data_manager.save_key('credits', 5)
+        data_manager.flush()
+        data_manager.save_key('balls', 3)
+        data_manager.flush()
+        self.assertEqual(2, data_manager._journal.num_records)
+
+        # MPF stops after the file was compacted but before the journal
+        # was removed
+        with patch('mpf.core.data_journal.DataJournal.clear'):
+            data_manager.save_key('credits', 6)
+            data_manager.flush()
+
+        self.assertTrue(os.path.isfile(journal_file))
+        self.assertEqual(dict(credits=6, balls=3),
+                         FileManager.load(self.filename))
+
+        # the stale journal must not put credits back to 5
+        data_manager = DataManager(self.machine, 'machine_vars')
+        self.assertEqual(dict(credits=6, balls=3), data_manager.get_data())
+
+        # and it is compacted on the next write
+        data_manager.save_key('credits', 7)
+        data_manager.flush()
+        self.assertFalse(os.path.isfile(journal_file))
+        self.assertEqual(dict(credits=7, balls=3),
+                         DataManager(self.machine,
+                                     'machine_vars').get_data())
+
+    def test_journal_compaction_to_same_file(self):
+        self.machine.config['mpf']['data_storage'] = 'journal'
+        self.machine.config['mpf']['data_journal_max_records'] = 1
+        journal_file = self.filename + '.journal'
+
+        data_manager = DataManager(self.machine, 'machine_vars')
+        data_manager.save_key('credits', 5)
+        data_manager.flush()
+        data_manager.save_key('balls', 3)
+        data_manager.flush()
+        data_manager.save_key('credits', 6)
+        data_manager.flush()
+        self.assertTrue(os.path.isfile(journal_file))
+
+        # credits go back to 5, so the compacted file is the same as the one
+        # the journal was started for. the journal is removed before the
+        # file is replaced since it could not be detected as stale
+        with patch('os.replace', side_effect=OSError):
+            data_manager.save_key('credits', 5)
+            with self.assertRaises(OSError):
+                data_manager.flush()
+
+        self.assertFalse(os.path.isfile(journal_file))
+        self.assertEqual(dict(credits=5, balls=3),
+                         DataManager(self.machine,
+                                     'machine_vars').get_data())
+
+    def test_sqlite(self):
+        self.machine.config['mpf']['data_storage'] = 'sqlite'
+
+        # existing files are imported
+        os.makedirs(os.path.dirname(self.filename))
+        FileManager.save(self.filename, dict(credits=dict(value=3)))
+
+        machine_vars = DataManager(self.machine, 'machine_vars')
+        self.assertEqual(dict(credits=dict(value=3)), machine_vars.get_data())
+        machine_vars.save_key('credits', dict(value=4))
+        machine_vars.save_key('temp', dict(value='a', expire=100.0))
+        machine_vars.flush()
+
+        audits = DataManager(self.machine, 'audits')
+        audit_data = dict(switches=dict(s_start=1, s_tilt=0),
+                          events=dict(ball_started=1),
+                          player=dict(score=dict(top=[300, 200],
+                                                 average=250.0, total=2)),
+                          other=[1, 2])
+        audits.save_all(data=audit_data)
+        audits.flush()
+
+        audit_data['switches']['s_start'] = 2
+        audits.save_all(data=audit_data)
+        audits.flush()
+
+        # the files are not written
+        os.remove(self.filename)
+        self.assertEqual(['mpf.sqlite'], [
+            x for x in os.listdir(os.path.join(self.temp_dir, 'db'))
+            if x.endswith('.sqlite')])
+
+        self.assertEqual(dict(credits=dict(value=4),
+                              temp=dict(value='a', expire=100.0)),
+                         DataManager(self.machine, 'machine_vars').get_data())
+        self.assertEqual(audit_data,
+                         DataManager(self.machine, 'audits').get_data())
+
+        self.assertEqual(
+            [1, 2], [x[1] for x in audits.database.get_audit_history(
+                'switches', 's_start')])
+        self.assertEqual(
+            [], audits.database.get_audit_history('switches', 's_start',
+                                                  since=time.time() + 10))
+
+        machine_vars.database.close()
+        audits.database.close()
+
+    def test_sqlite_types(self):
+        self.machine.config['mpf']['data_storage'] = 'sqlite'
+
+        machine_vars = DataManager(self.machine, 'machine_vars')
+        machine_vars.save_all(data={'tilted': dict(value=True),
+                                    'coin': dict(value=False),
+                                    'credits': dict(value=1),
+                                    3: dict(value=0.5)})
+        machine_vars.flush()
+
+        earnings = DataManager(self.machine, 'earnings')
+        earnings.save_all(data={'free': True, 1: 'one', (2, 3): [4],
+                                '1': 'string one'})
+        earnings.flush()
+
+        audits = DataManager(self.machine, 'audits')
+        audits.save_all(data=dict(switches=dict(s_start=1),
+                                  flags=dict(a=True), numbers={1: 2}))
+        audits.flush()
+
+        # bools and keys which are no strings are loaded unchanged
+        for name, data in (('machine_vars', machine_vars.data),
+                           ('earnings', earnings.data),
+                           ('audits', audits.data)):
+            loaded = DataManager(self.machine, name)
+            self.assertEqual(data, loaded.get_data())
+            for key, value in data.items():
+                self.assertIs(type(value), type(loaded.get_data()[key]))
+            loaded.database.close()
+
+        self.assertIs(True, DataManager(
+            self.machine, 'machine_vars').get_data()['tilted']['value'])
+
+    def test_sqlite_audit_history_retention(self):
+        self.machine.config['mpf']['data_storage'] = 'sqlite'
+
+        audits = DataManager(self.machine, 'audits')
+        audit_data = dict(switches=dict(s_start=1))
+        with patch('time.time', return_value=time.time() - 100 * 86400):
+            audits.save_all(data=audit_data)
+            audits.flush()
+
+        audit_data['switches']['s_start'] = 2
+        audits.save_all(data=audit_data)
+        audits.flush()
+        audits.database.close()
+
+        # old entries are removed when the database is opened
+        self.machine.config['mpf']['audit_history_days'] = 30
+        audits = DataManager(self.machine, 'audits')
+        self.assertEqual([2], [x[1] for x in audits.database.get_audit_history(
+            'switches', 's_start')])
+        audits.database.close()
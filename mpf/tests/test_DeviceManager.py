@@ -33,3 +33,22 @@ class TestDeviceManager(MpfTestCase):
                 self.assertEqual(sig.parameters['kwargs'].kind, inspect._VAR_KEYWORD,
                     "Method {}.{} kwargs param is missing '**'".format(
                     device_type, method_name))
+
+    def test_lazy_device_classes(self):
+        device_manager = self.machine.device_manager
+
+        # collections exist for all device types but classes are only loaded
+        # for sections which are used
+        self.assertIn('servos', device_manager.collections)
+        self.assertFalse(self.machine.servos)
+        self.assertNotIn('servos', device_manager.device_classes)
+
+        device_manager.load_device_classes({'servos': dict()})
+        self.assertEqual('servos',
+                         device_manager.device_classes['servos'].collection)
+
+        # classes stay in the order of the device_modules list
+        self.assertEqual(
+            [x for x in device_manager.collections if
+             x in device_manager.device_classes],
+            list(device_manager.device_classes.keys()))
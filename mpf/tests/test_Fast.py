@@ -1,3 +1,5 @@
+from unittest.mock import MagicMock
+
 from mpf.core.rgb_color import RGBColor
 from mpf.tests.MpfTestCase import MpfTestCase
 from mpf.platforms.fast import fast
@@ -44,6 +46,9 @@ class MockSerialCommunicator:
         else:
             raise Exception(cmd)
 
+    def flush(self):
+        pass
+
     def stop(self):
         pass
 
@@ -250,6 +255,44 @@ class TestFast(MpfTestCase):
         self.assertFalse(self.switch_hit)
         self.assertFalse(self.machine.switch_controller.is_active("s_test"))
 
+    def test_verify_switches(self):
+        self.machine.switch_controller.log = MagicMock()
+        self.assertFalse(self.machine.switch_controller.is_active("s_flipper"))
+
+        # s_flipper changed without MPF noticing
+        MockSerialCommunicator.expected_commands['NET'] = {
+            "SA:": "SA:1,00,8,07000000",
+        }
+        self.machine.switch_controller.verify_switches()
+        self.assertFalse(MockSerialCommunicator.expected_commands['NET'])
+
+        # does not wait for the answer
+        self.assertFalse(self.machine.switch_controller.log.warning.called)
+
+        self.advance_time_and_run(.1)
+        self.machine.switch_controller.log.warning.assert_called_once_with(
+            "Switch State Error! Switch: %s, HW State: %s, MPF State: %s",
+            "s_flipper", 1, 0)
+
+    def test_verify_switches_timeout(self):
+        self.machine.switch_controller.log = MagicMock()
+        self.machine.default_platform.log = MagicMock()
+        MockSerialCommunicator.expected_commands['NET'] = {
+            "SA:": False,
+        }
+        self.machine.switch_controller.verify_switches()
+        self.assertFalse(MockSerialCommunicator.expected_commands['NET'])
+
+        self.advance_time_and_run(2)
+        self.machine.default_platform.log.warning.assert_called_once_with(
+            "FAST did not send the switch states within %ss", 1.0)
+
+        # a late answer does not call the old callbacks
+        self.machine.default_platform.net_connection.receive_queue.put(
+            "SA:1,00,8,07000000")
+        self.advance_time_and_run(.1)
+        self.assertFalse(self.machine.switch_controller.log.warning.called)
+
     def test_switch_changes_nc(self):
         self.switch_hit = False
         self.advance_time_and_run(1)
@@ -47,6 +47,14 @@ class SerialMock:
         return length
 
     def write(self, msg):
+        # all messages of a frame are written at once
+        parts = msg.split(b'\r')
+        for part in parts[:-1]:
+            self._write_command(part + b'\r')
+        if parts[-1]:
+            self._write_command(parts[-1])
+
+    def _write_command(self, msg):
         if msg in self.permanent_commands:
             self.queue.put(self.permanent_commands[msg])
             return
@@ -76,7 +84,7 @@ class TestFastSerial(unittest.TestCase):
     def setUp(self):
         self.machine = MagicMock()
         self.platform = MagicMock()
-        self.platform.config['debug'] = True
+        self.platform.config = dict(debug=True, connection_timeout=10)
         self.platform.machine_type = "fast"
         self.send_queue = Queue()
         self.receive_queue = Queue()
@@ -99,6 +107,10 @@ class TestFastSerial(unittest.TestCase):
         self.assertFalse(self.serialMock.expected_commands)
 
         self.communicator.send("test".encode())
+        self.communicator.flush()
+        # frames are not logged in debug mode
+        self.assertNotIn(call('Sending: %s', "test".encode()),
+                         self.platform.log.info.mock_calls)
         self.serialMock.expected_commands = {
             'BM:test'.encode(): False
         }
@@ -110,6 +122,24 @@ class TestFastSerial(unittest.TestCase):
 
         self.assertFalse(self.serialMock.expected_commands)
 
+    def test_SerialCommunicator_no_id(self):
+        self.platform.config['connection_timeout'] = .1
+        self.serialMock.expected_commands = {
+            ((' ' * 256) + '\r').encode(): False
+        }
+        self.serialMock.permanent_commands = {
+            'ID:\r'.encode(): 'XX:F\r'.encode()
+        }
+
+        # gives up instead of waiting forever
+        with self.assertRaises(AssertionError):
+            fast.SerialCommunicator(
+                machine=self.machine, platform=self.platform,
+                port="port_name", baud=1234, send_queue=Queue(),
+                receive_queue=self.receive_queue)
+
+        self.assertFalse(self.platform.register_processor_connection.called)
+
     def test_SerialCommunicator_RGB(self):
         self.serialMock.expected_commands = {
             'ID:\r'.encode(): 'ID:RGB FP-CPU-002-1 00.88\r'.encode(),
@@ -163,6 +193,7 @@ class TestFastSerial(unittest.TestCase):
         ])
 
         self.communicator.send("SA:")
+        self.communicator.flush()
         self.serialMock.expected_commands = {
             "SA:\r".encode(): "SA:1,00,8,00000000\r".encode()
         }
@@ -153,6 +153,25 @@ class TestLedPlayer(MpfTestCase):
         self.assertEqual(list(RGBColor('off').rgb),
                          self.machine.leds.led3.hw_driver.current_color)
 
+    def test_play_does_not_modify_settings(self):
+        led1 = self.machine.leds.led1
+        self.machine.modes['mode1'].start()
+        self.advance_time_and_run()
+
+        self.machine.events.post('event5')
+        self.advance_time_and_run()
+        self.machine.events.post('event5')
+        self.advance_time_and_run()
+
+        self.assertEqual(300, self.machine.leds.led3.stack[0]['priority'])
+        self.assertEqual(200, self.machine.config['led_player']['event1']
+                         ['leds'][led1]['priority'])
+
+        self.machine.events.post('event1')
+        self.advance_time_and_run()
+        self.assertEqual('red', self.machine.config['led_player']['event1']
+                         ['leds'][led1]['color'])
+
     def test_single_step_show(self):
         # with single step shows, loops are automatically set to 0, hold is
         # automatically set to true
@@ -310,3 +329,29 @@ class TestLedPlayer(MpfTestCase):
                          self.machine.leds.led3.hw_driver.current_color)
         self.assertEqual(0, self.machine.leds.led3.stack[0]['priority'])
         self.assertEqual(1, len(self.machine.leds.led3.stack))
+
+
+class TestLedPlayerPrerenderedShows(TestLedPlayer):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+        self.machine_config_patches['mpf']['prerender_led_shows'] = True
+
+    def test_show_frames(self):
+        show = self.machine.shows['show2']
+        self.assertIsNotNone(show.led_frames)
+        self.assertEqual(('led1', 'led2', 'led3'),
+                         tuple(sorted(show.led_frames.led_names)))
+
+        frame = show.led_frames.get_frame(self.machine, 0)
+        self.assertEqual(3, len(frame))
+        led, color, fade_ms, priority = frame[0]
+        self.assertIn(led.name, self.machine.leds)
+        self.assertEqual(RGBColor('red'), color)
+        self.assertEqual(0, fade_ms)
+        self.assertEqual(0, priority)
+
+        # looping a show must not accumulate its priority
+        show.play(priority=10)
+        self.advance_time_and_run(2.5)
+        self.assertEqual(10, self.machine.leds.led1.stack[0]['priority'])
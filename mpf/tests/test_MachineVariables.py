@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+from mpf.tests.MpfTestCase import MpfTestCase
+
+
+class TestMachineVariables(MpfTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+        self.machine_config_patches['mpf']['save_machine_vars_to_disk'] = True
+        self.machine_config_patches['mpf']['machine_vars_save_interval'] = '2s'
+
+    def setUp(self):
+        super().setUp()
+        self.machine.machine_var_data_manager.save_keys = MagicMock()
+        self.machine.machine_var_data_manager.flush = MagicMock()
+
+    def test_batched_saves(self):
+        save_keys = self.machine.machine_var_data_manager.save_keys
+        self.machine.create_machine_var('credits', 0, persist=True,
+                                        silent=True)
+        self.machine.create_machine_var('temp', 0, persist=True,
+                                        expire_secs=100, silent=True)
+        self.machine.create_machine_var('not_saved', 0, silent=True)
+
+        for value in range(1, 6):
+            self.machine.set_machine_var('credits', value)
+            self.machine.set_machine_var('not_saved', value)
+            self.advance_time_and_run(.1)
+
+        self.machine.set_machine_var('temp', 7)
+        expire = self.machine.clock.get_time() + 100
+        self.assertEqual(5, self.machine.get_machine_var('credits'))
+        self.assertFalse(save_keys.called)
+
+        # all changes are saved together once the interval passed
+        self.advance_time_and_run(2)
+        save_keys.assert_called_once_with(dict(credits=dict(value=5),
+                                               temp=dict(value=7,
+                                                         expire=expire)))
+
+        # changes are flushed on power off
+        save_keys.reset_mock()
+        self.machine.set_machine_var('credits', 6)
+        self.machine.remove_machine_var('temp')
+        self.machine.power_off()
+        save_keys.assert_called_once_with(dict(credits=dict(value=6)))
+        self.machine.machine_var_data_manager.flush.assert_called_once_with()
+
+        # nothing left to save
+        save_keys.reset_mock()
+        self.advance_time_and_run(5)
+        self.assertFalse(save_keys.called)
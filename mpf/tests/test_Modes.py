@@ -1,4 +1,8 @@
-from unittest.mock import MagicMock
+import os
+from unittest.mock import MagicMock, patch
+
+from mpf.core.config_processor import ConfigProcessor
+from mpf.core.mode import Mode, LazyMode
 from mpf.tests.MpfTestCase import MpfTestCase
 
 
@@ -186,3 +190,115 @@ class TestModes(MpfTestCase):
         self.assertTrue(self.machine.modes.mode1.active)
         self.assertFalse(self.machine.modes.mode2.active)
         self.assertFalse(self.machine.modes.mode3.active)
+
+
+class TestLazyModes(MpfTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+        self.machine_config_patches['mpf']['lazy_mode_loading'] = True
+
+    def getConfigFile(self):
+        return 'test_modes.yaml'
+
+    def getMachinePath(self):
+        return 'tests/machine_files/mode_tests/'
+
+    def setUp(self):
+        # remembers which config files are fully loaded
+        self.loaded_files = list()
+        load_config_file = ConfigProcessor.load_config_file
+
+        def _load_config_file(filename, *args, **kwargs):
+            self.loaded_files.append(os.path.basename(filename))
+            return load_config_file(filename, *args, **kwargs)
+
+        self._load_patch = patch.object(ConfigProcessor, 'load_config_file',
+                                        staticmethod(_load_config_file))
+        self._load_patch.start()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self._load_patch.stop()
+
+    def test_lazy_mode_config_loaded_once(self):
+        # only the mode: section was read at boot
+        self.assertIsInstance(self.machine.modes.mode1, LazyMode)
+        self.assertNotIn('mode1.yaml', self.loaded_files)
+        self.assertEqual(200,
+                         self.machine.modes.mode1.config['mode']['priority'])
+
+        self.machine.events.post('start_mode1')
+        self.advance_time_and_run()
+        self.assertTrue(self.machine.modes.mode1.active)
+        self.assertEqual(1, self.loaded_files.count('mode1.yaml'))
+
+    def test_lazy_mode_start(self):
+        # attract has been started at boot so it is loaded
+        self.assertIsInstance(self.machine.modes.attract, Mode)
+
+        mode1 = self.machine.modes.mode1
+        self.assertIsInstance(mode1, LazyMode)
+        self.assertIsInstance(self.machine.modes.mode3, LazyMode)
+        self.assertEqual(200, mode1.config['mode']['priority'])
+
+        self.machine.events.post('start_mode1')
+        self.advance_time_and_run()
+        self.assertIsInstance(self.machine.modes.mode1, Mode)
+        self.assertTrue(self.machine.modes.mode1.active)
+        self.assertEqual(200, self.machine.modes.mode1.priority)
+
+        # the start handler of the placeholder has been removed
+        handlers = [x[0] for x in
+                    self.machine.events.registered_handlers['start_mode1']]
+        self.assertNotIn(mode1.start, handlers)
+        self.assertIn(self.machine.modes.mode1.start, handlers)
+
+        self.machine.events.post('stop_mode1')
+        self.advance_time_and_run()
+        self.assertFalse(self.machine.modes.mode1.active)
+
+        # start again
+        self.machine.events.post('start_mode1')
+        self.advance_time_and_run()
+        self.assertTrue(self.machine.modes.mode1.active)
+
+    def test_lazy_custom_mode_code(self):
+        self.machine.modes.mode3.start()
+        self.advance_time_and_run()
+        self.assertTrue(self.machine.modes.mode3.custom_code)
+        self.assertTrue(self.machine.modes.mode3.active)
+
+
+class TestPrewarmLazyModes(TestLazyModes):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+        self.machine_config_patches['mpf']['prewarm_modes_in_attract'] = True
+
+    def test_lazy_mode_config_loaded_once(self):
+        # mode1 is loaded in attract
+        for _ in range(5):
+            self.advance_time_and_run(.1)
+
+        self.assertIsInstance(self.machine.modes.mode1, Mode)
+        self.assertEqual(1, self.loaded_files.count('mode1.yaml'))
+
+        # and not again when it starts
+        self.machine.events.post('start_mode1')
+        self.advance_time_and_run()
+        self.assertTrue(self.machine.modes.mode1.active)
+        self.assertEqual(1, self.loaded_files.count('mode1.yaml'))
+
+    def test_lazy_mode_start(self):
+        # all modes are loaded in attract. one per frame
+        for _ in range(5):
+            self.advance_time_and_run(.1)
+
+        for mode in self.machine.modes:
+            self.assertIsInstance(mode, Mode)
+
+        self.machine.events.post('start_mode1')
+        self.advance_time_and_run()
+        self.assertTrue(self.machine.modes.mode1.active)
@@ -15,6 +15,14 @@ class SerialMock:
         return msg
 
     def write(self, msg):
+        # all commands of a frame are written at once
+        while msg:
+            command = max((x for x in list(self.expected_commands) + list(self.permanent_commands)
+                           if msg.startswith(x)), key=len, default=msg)
+            self._write_command(command)
+            msg = msg[len(command):]
+
+    def _write_command(self, msg):
         if msg in self.permanent_commands:
             self.queue.put(self.permanent_commands[msg])
             return
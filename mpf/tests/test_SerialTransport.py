@@ -0,0 +1,141 @@
+import os
+import select
+import time
+import unittest
+from queue import Queue
+from unittest.mock import MagicMock
+
+from mpf.platforms.opp.opp import OppFraming
+from mpf.platforms.serial_transport import SerialTransport, CrFraming
+
+
+@unittest.skipUnless(hasattr(os, 'openpty'), 'needs a pty')
+class TestSerialTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.machine = MagicMock()
+        self.devices = list()
+        self.receive_queue = Queue()
+        self.transport = SerialTransport(self.machine, 'pty', self._open_port,
+                                         CrFraming, self.receive_queue)
+
+    def tearDown(self):
+        self.transport.stop()
+        for device in self.devices:
+            if device is not None:
+                os.close(device)
+
+    def _open_port(self):
+        # other tests replace serial.Serial with a mock
+        from serial.serialposix import Serial
+
+        # the master side of a pty stands in for the hardware
+        device, port_fd = os.openpty()
+        self.devices.append(device)
+        port = Serial(os.ttyname(port_fd), baudrate=115200, timeout=.1)
+        os.close(port_fd)
+        return port
+
+    def _read_device(self, device, num_bytes):
+        data = b''
+        while len(data) < num_bytes:
+            self.assertTrue(select.select([device], [], [], 5)[0])
+            data += os.read(device, num_bytes - len(data))
+        return data
+
+    def _wait_for(self, condition):
+        for _ in range(500):
+            if condition():
+                return
+            time.sleep(.01)
+
+        self.fail('Timeout')
+
+    def test_send_and_receive(self):
+        self.transport.open()
+        self.transport.start()
+        self.machine.clock.schedule_interval.assert_called_once_with(
+            self.transport.flush, 0, priority=-1000)
+
+        # all messages of a frame are written at once
+        self.transport.send('WD:3e8')
+        self.transport.send('SA:')
+        self.assertEqual(0, self.transport.counters['writes'])
+
+        self.transport.flush()
+        self.assertEqual(b'WD:3e8\rSA:\r',
+                         self._read_device(self.devices[0], 11))
+        self._wait_for(lambda: self.transport.counters['writes'])
+        self.assertEqual(1, self.transport.counters['writes'])
+        self.assertEqual(2, self.transport.counters['messages_sent'])
+        self.assertEqual(11, self.transport.counters['bytes_sent'])
+
+        # messages are split at CR. incomplete messages are kept
+        os.write(self.devices[0], b'SA:1,00,8,00\r-N:12\r-N')
+        self.assertEqual('SA:1,00,8,00', self.receive_queue.get(timeout=5))
+        self.assertEqual('-N:12', self.receive_queue.get(timeout=5))
+
+        os.write(self.devices[0], b':13\r')
+        self.assertEqual('-N:13', self.receive_queue.get(timeout=5))
+        self.assertEqual(3, self.transport.counters['messages_received'])
+        self.assertEqual(25, self.transport.counters['bytes_received'])
+
+    def test_stop_writes_last_frame(self):
+        self.transport.open()
+        self.transport.start()
+
+        # e.g. sent by shutdown handlers in the last frame
+        self.transport.send('DN:04,81')
+        self.transport.send('WD:1')
+        self.transport.stop()
+
+        self.assertFalse(self.transport.sending_thread.is_alive())
+        self.assertIsNone(self.transport.port)
+        self.assertEqual(b'DN:04,81\rWD:1\r',
+                         self._read_device(self.devices[0], 14))
+        self.assertEqual(2, self.transport.counters['messages_sent'])
+
+    def test_reconnect(self):
+        self.transport.reconnect_interval = .01
+        self.transport.open()
+        self.transport.start()
+
+        # the device goes away and comes back
+        os.close(self.devices[0])
+        self.devices[0] = None
+        self._wait_for(lambda: self.transport.counters['reconnects'])
+
+        os.write(self.devices[1], b'-N:12\r')
+        self.assertEqual('-N:12', self.receive_queue.get(timeout=5))
+
+        self.transport.send('SA:')
+        self.transport.flush()
+        self.assertEqual(b'SA:\r', self._read_device(self.devices[1], 4))
+
+    def test_synchronous_read(self):
+        self.transport.open()
+        os.write(self.devices[0], b'ID:NET FP-CPU-002-2 00.88\rNN:0\r')
+        self.transport.write(b'ID:\r')
+
+        self.assertEqual(b'ID:\r', self._read_device(self.devices[0], 4))
+        self.assertEqual('ID:NET FP-CPU-002-2 00.88',
+                         self.transport.read_message())
+        self.assertEqual('NN:0', self.transport.read_message())
+
+        # nothing within the timeout of the port
+        self.assertIsNone(self.transport.read_message())
+
+
+class TestOppFraming(unittest.TestCase):
+
+    def test_split(self):
+        buffer = bytearray(b'\xff\x20\x08\x00\x00\x00\x0c\x8d\xff'
+                           b'\x55\x99\x21\x08\x00\x00\x00\x00\xa4\x21\x08')
+
+        # EOMs and garbage are skipped, incomplete messages are kept
+        self.assertEqual([b'\x20\x08\x00\x00\x00\x0c\x8d',
+                          b'\x21\x08\x00\x00\x00\x00\xa4'],
+                         OppFraming.split(buffer))
+        self.assertEqual(b'\x21\x08', buffer)
+        self.assertEqual((b'\x20\x08\xff', ),
+                         OppFraming.encode(b'\x20\x08\xff'))
@@ -1,11 +1,26 @@
+import logging
+import os
 import time
+import unittest
 
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+from mpf.assets.show import load_show_file
+from mpf.core.config_processor import ConfigProcessor
 from mpf.core.rgb_color import RGBColor
+from mpf.file_interfaces.yaml_interface import YamlInterface
 from mpf.tests.MpfTestCase import MpfTestCase
 
 
+def _load_show_file_with_pid(filename):
+    # tells which process parsed the file
+    return dict(pid=os.getpid(), show=load_show_file(filename))
+
+
+def _fail_to_load(filename):
+    raise ValueError('broken {}'.format(os.path.basename(filename)))
+
+
 class TestShows(MpfTestCase):
     def getConfigFile(self):
         return 'test_shows.yaml'
@@ -735,3 +750,113 @@ class TestShows(MpfTestCase):
     #
     #     self.machine.events.post('adjust_running_show_by_key')
     #     self.advance_time_and_run()
+
+
+class TestParallelFileLoading(MpfTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+        self.machine_config_patches['mpf']['config_loader_processes'] = 2
+
+    def getConfigFile(self):
+        return 'test_shows.yaml'
+
+    def getMachinePath(self):
+        return 'tests/machine_files/shows/'
+
+    def getOptions(self):
+        options = super().getOptions()
+        # start with an empty cache so no file is cached yet
+        options['no_load_cache'] = True
+        return options
+
+    def setUp(self):
+        self.parsed_in_workers = list()
+        preload_files = ConfigProcessor.preload_files
+
+        def _preload_files(*args, **kwargs):
+            num_parsed = preload_files(*args, **kwargs)
+            self.parsed_in_workers.append(num_parsed)
+            return num_parsed
+
+        self._preload_patch = patch.object(ConfigProcessor, 'preload_files',
+                                           staticmethod(_preload_files))
+        self._preload_patch.start()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self._preload_patch.stop()
+
+    def test_small_config_parsed_serially(self):
+        config_cache = self.machine.config_cache
+
+        # the mode config files and the three shows are too few to start a
+        # pool. they are parsed in the main process and cached as usual
+        self.assertEqual([0, 0], self.parsed_in_workers)
+
+        show = self.machine.shows['test_show1']
+        self.assertTrue(config_cache.has_entry(show.file, 'shows'))
+        self.assertEqual(load_show_file(show.file),
+                         config_cache.get(show.file, 'shows'))
+        self.assertTrue(show.loaded)
+
+        mode_config = self.machine.modes.mode1.config
+        self.assertEqual(['start_mode1'], mode_config['mode']['start_events'])
+        self.assertTrue(config_cache.has_entry(os.path.join(
+            self.machine.machine_path, 'modes', 'mode1', 'config',
+            'mode1.yaml')))
+
+
+class TestPreloadFiles(unittest.TestCase):
+
+    def setUp(self):
+        show_path = os.path.join(os.path.dirname(__file__), 'machine_files',
+                                 'shows', 'shows')
+        self.filenames = [os.path.join(show_path, x) for x in
+                          ('test_show1.yaml', 'test_show2.yaml',
+                           'test_show3.yaml')]
+        self.config_cache = MagicMock()
+        self.config_cache.has_entry.return_value = False
+
+        # MpfTestCase enables the file cache. shows change the cached data
+        self._yaml_cache = patch.object(YamlInterface, 'cache', False)
+        self._yaml_cache.start()
+
+    def tearDown(self):
+        self._yaml_cache.stop()
+
+    def test_parsed_in_workers(self):
+        self.assertEqual(3, ConfigProcessor.preload_files(
+            self.filenames, self.config_cache, 2, 'shows',
+            _load_show_file_with_pid, min_files=0))
+
+        self.assertEqual(3, self.config_cache.put.call_count)
+        for put_call, filename in zip(self.config_cache.put.call_args_list,
+                                      self.filenames):
+            path, data, section = put_call[0]
+            self.assertEqual((filename, 'shows'), (path, section))
+            self.assertNotEqual(os.getpid(), data['pid'])
+            self.assertEqual(load_show_file(filename), data['show'])
+
+    def test_too_few_files(self):
+        with patch('multiprocessing.get_context') as get_context:
+            self.assertEqual(0, ConfigProcessor.preload_files(
+                self.filenames, self.config_cache, 2, 'shows',
+                _load_show_file_with_pid))
+
+        self.assertFalse(get_context.called)
+        self.assertFalse(self.config_cache.put.called)
+
+    def test_errors_are_logged(self):
+        with patch.object(logging.getLogger('ConfigProcessor'),
+                          'warning') as warning:
+            self.assertEqual(0, ConfigProcessor.preload_files(
+                self.filenames[:2], self.config_cache, 2, 'shows',
+                _fail_to_load, min_files=0))
+
+        self.assertFalse(self.config_cache.put.called)
+        warning.assert_any_call(
+            "Could not parse %s in a worker process (%s). Loading it again.",
+            self.filenames[0], 'ValueError: broken test_show1.yaml')
+        self.assertEqual(2, warning.call_count)
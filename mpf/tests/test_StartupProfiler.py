@@ -0,0 +1,54 @@
+import json
+import os
+import shutil
+import tempfile
+
+from mpf.tests.MpfTestCase import MpfTestCase
+
+
+class TestStartupProfiler(MpfTestCase):
+
+    def getConfigFile(self):
+        return 'test_modes.yaml'
+
+    def getMachinePath(self):
+        return 'tests/machine_files/mode_tests/'
+
+    def getOptions(self):
+        options = super().getOptions()
+        self.temp_dir = tempfile.mkdtemp()
+        self.json_file = os.path.join(self.temp_dir, 'profile.json')
+        options['profile_startup'] = self.json_file
+        options['no_load_cache'] = True
+        return options
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_profile(self):
+        profiler = self.machine.startup_profiler
+        self.assertFalse(profiler.running)
+        self.assertGreater(profiler.total, 0)
+
+        with open(self.json_file) as f:
+            report = json.load(f)
+
+        phases = [x['name'] for x in report['phases']]
+        for phase in ('load_config', 'load_hardware_platforms',
+                      'load_core_modules', 'init_phase_1', 'init_phase_2',
+                      'load_plugins', 'load_scriptlets', 'init_phase_5',
+                      'reset'):
+            self.assertIn(phase, phases)
+
+        handlers = [x['name'] for x in report['handlers']]
+        self.assertIn('init_phase_1: DeviceManager._load_device_modules',
+                      handlers)
+        self.assertIn('init_phase_2: ModeController._load_modes', handlers)
+
+        files = [x['name'] for x in report['files']]
+        self.assertIn(os.path.join(self.machine.machine_path, 'modes',
+                                   'mode1', 'config', 'mode1.yaml'), files)
+
+        self.assertIn('imports', report)
+        self.assertIn('load_config', profiler.get_table())
@@ -1,4 +1,7 @@
+import os
 import unittest
+from unittest.mock import MagicMock
+
 from mpf.core.utility_functions import Util
 
 
@@ -232,3 +235,19 @@ class TestUtil(unittest.TestCase):
         self.assertTrue(Util.is_power2(256))
         self.assertFalse(Util.is_power2(3))
         self.assertFalse(Util.is_power2(222))
+
+    def test_write_buffers(self):
+        frame = bytearray(range(256)) * 16
+
+        # scatter write to the file descriptor
+        read_fd, write_fd = os.pipe()
+        with open(write_fd, 'wb', buffering=0) as port:
+            Util.write_buffers(port, (b'BM:', memoryview(frame)))
+
+        with open(read_fd, 'rb') as port:
+            self.assertEqual(b'BM:' + frame, port.read())
+
+        # ports without a file descriptor get one write
+        port = MagicMock(spec=['write'])
+        Util.write_buffers(port, (b'BM:', memoryview(frame)))
+        port.write.assert_called_once_with(b'BM:' + frame)
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import ruamel.yaml as yaml
 from ruamel.yaml.loader import RoundTripLoader
@@ -78,6 +80,32 @@ sound_system:
 
         self.assertEqual(orig_config, saved_config)
 
+    def test_load_section(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.yaml',
+                                         delete=False) as f:
+            f.write('#config_version=4\n'
+                    'shows:\n'
+                    '  show1: [1, 2]\n'
+                    'Mode:\n'
+                    '  start_events: ball_started\n'
+                    '\n'
+                    '# comment\n'
+                    '  priority: 200\n'
+                    'mode_settings:\n'
+                    '  a: &anchor 1\n'
+                    'other:\n'
+                    '  b: *anchor\n')
+        self.addCleanup(os.remove, f.name)
+
+        # keys are lower case. the section ends with the next top-level key
+        self.assertEqual(dict(start_events='ball_started', priority=200),
+                         YamlInterface.load_section(f.name, 'mode'))
+        self.assertIsNone(YamlInterface.load_section(f.name, 'lights'))
+
+        # an alias to an anchor in another section cannot work on its own
+        with self.assertRaises(ValueError):
+            YamlInterface.load_section(f.name, 'other')
+
     def test_rename_key(self):
         yaml_str = '''
 